@@ -0,0 +1,61 @@
+"""
+Measure the cold import time of the backend modules in fresh interpreters.
+
+Usage:
+    python -m benchmarks.bench_import_time --repeat 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from benchmarks.common import print_table
+
+
+MODULES = [
+    "fastapi_backend.helpers.llm_manager",
+    "fastapi_backend.pipelines.factory",
+    "fastapi_backend.pipelines.hybrid_rag_pipeline",
+    "fastapi_backend.pipelines.vanilla_rag_pipeline",
+    "fastapi_backend.routes",
+]
+
+# routes.py reads Settings at import time; these only need to be present
+DUMMY_ENV = {
+    "PROVIDER": "openai",
+    "API_KEY": "benchmark",
+    "LLM_MODEL_NAME": "benchmark",
+    "EMBEDDING_MODEL_NAME": "benchmark",
+    "DOC_DIR_PATH": "",
+    "TOP_K_DOCS": "5",
+    "CHUNK_SIZE": "1000",
+    "CHUNK_OVERLAP": "0",
+    "CHROMA_DB_NAME": "benchmark",
+    "SCORE_THRESHOLD": "0.4",
+}
+
+
+def import_seconds(module: str) -> float:
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    env = {**DUMMY_ENV, **os.environ}
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", code], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    for module in MODULES:
+        timings = np.asarray([import_seconds(module) for _ in range(args.repeat)])
+        rows.append({"module": module, "min_s": float(timings.min()), "median_s": float(np.median(timings))})
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Measure memory, latency and recall@k of quantized NumpyVectorStore storage
+against the float32 baseline.
+
+Usage:
+    python -m benchmarks.bench_quantization --chunks 50000 --dim 768 --k 5
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.common import PrecomputedEmbeddings, synthetic_corpus, synthetic_queries, time_calls, print_table
+from fastapi_backend.helpers.numpy_vector_store import NumpyVectorStore
+
+
+def recall_at_k(expected, found) -> float:
+    """
+    Mean fraction of the baseline top-k ids that were also returned.
+    """
+    return float(np.mean([len(set(e) & set(f)) / len(e) for e, f in zip(expected, found) if e]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[0, 2, 4])
+    args = parser.parse_args()
+
+    texts, metadatas, embeddings = synthetic_corpus(args.chunks, args.dim)
+    queries = synthetic_queries(embeddings, args.queries)
+    embedding_function = PrecomputedEmbeddings(dict(zip(texts, embeddings)))
+    ids = [m["chunk_id"] for m in metadatas]
+
+    def search(store):
+        return [[doc.id for doc, _ in hits] for hits in store.similarity_search_by_vectors(queries, k=args.k)]
+
+    baseline = NumpyVectorStore.from_texts(texts, embedding_function, metadatas=metadatas, ids=ids)
+    expected = search(baseline)
+
+    rows = []
+    for embedding_dtype in ("float32", "float16", "int8"):
+        for rescore_factor in (args.rescore_factors if embedding_dtype != "float32" else [0]):
+            store = NumpyVectorStore.from_texts(texts, embedding_function, metadatas=metadatas, ids=ids,
+                                                embedding_dtype=embedding_dtype, rescore_factor=rescore_factor)
+            latency = time_calls(lambda q: store.similarity_search_by_vectors([q], k=args.k), list(queries))
+            rows.append({
+                "dtype": embedding_dtype,
+                "rescore_factor": rescore_factor,
+                "scan_mb": store.scoring_nbytes / 2**20,
+                f"recall@{args.k}": recall_at_k(expected, search(store)),
+                **latency,
+            })
+
+    print(f"{args.chunks} chunks, dim={args.dim}, {args.queries} queries, k={args.k}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measure snapshot export and cold-start load time on a synthetic corpus.
+
+Usage:
+    python -m benchmarks.bench_snapshot --chunks 50000 --dim 768
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import PrecomputedEmbeddings, synthetic_corpus, print_table
+from fastapi_backend.helpers.numpy_vector_store import NumpyVectorStore
+from fastapi_backend.helpers.snapshot import export_snapshot, load_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+
+    texts, metadatas, embeddings = synthetic_corpus(args.chunks, args.dim)
+    texts = [f"{text} " + "documentation text about agents, tools and handoffs " * 15 for text in texts]
+    embedding_function = PrecomputedEmbeddings(dict(zip(texts, embeddings)))
+    store = NumpyVectorStore.from_texts(texts, embedding_function, metadatas=metadatas,
+                                        ids=[m["chunk_id"] for m in metadatas])
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = os.path.join(tmp_dir, "index.snapshot")
+        start = time.perf_counter()
+        export_snapshot(snapshot_path, store)
+        export_s = time.perf_counter() - start
+
+        for verify in (True, False):
+            start = time.perf_counter()
+            snapshot = load_snapshot(snapshot_path, verify=verify)
+            snapshot.vector_store(embedding_function)
+            rows.append({
+                "verify": verify,
+                "size_mb": os.path.getsize(snapshot_path) / 2**20,
+                "export_s": export_s,
+                "load_s": time.perf_counter() - start,
+            })
+
+    print(f"{args.chunks} chunks, dim={args.dim}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare the memory-mapped NumpyVectorStore against Chroma on a synthetic corpus.
+
+Usage:
+    python -m benchmarks.bench_vector_store --chunks 20000 --dim 768
+"""
+import argparse
+import tempfile
+import time
+
+from langchain_community.vectorstores import Chroma
+
+from benchmarks.common import PrecomputedEmbeddings, synthetic_corpus, synthetic_queries, time_calls, print_table
+from fastapi_backend.helpers.numpy_vector_store import NumpyVectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    texts, metadatas, embeddings = synthetic_corpus(args.chunks, args.dim)
+    queries = synthetic_queries(embeddings, args.queries)
+    embedding_function = PrecomputedEmbeddings(dict(zip(texts, embeddings)))
+    ids = [m["chunk_id"] for m in metadatas]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, store_class in (("chroma", Chroma), ("numpy", NumpyVectorStore)):
+            start = time.perf_counter()
+            store = store_class.from_texts(texts, embedding_function, metadatas=metadatas, ids=ids,
+                                           collection_name="bench", persist_directory=f"{tmp_dir}/{name}")
+            build_s = time.perf_counter() - start
+
+            # reopen from disk, as a freshly started worker would
+            start = time.perf_counter()
+            store = store_class(collection_name="bench", embedding_function=embedding_function,
+                                persist_directory=f"{tmp_dir}/{name}")
+            open_s = time.perf_counter() - start
+
+            single = time_calls(lambda q: store.similarity_search_by_vector(q.tolist(), k=args.k), list(queries))
+            row = {"backend": name, "build_s": build_s, "open_s": open_s, **single}
+
+            if name == "numpy":
+                start = time.perf_counter()
+                store.similarity_search_by_vectors(queries, k=args.k)
+                row["batch_ms_per_query"] = (time.perf_counter() - start) * 1000 / len(queries)
+            else:
+                row["batch_ms_per_query"] = float("nan")
+            rows.append(row)
+
+    print(f"{args.chunks} chunks, dim={args.dim}, {args.queries} queries, k={args.k}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
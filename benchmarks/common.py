@@ -0,0 +1,110 @@
+import hashlib
+import re
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """
+    Embeddings backed by a text -> vector lookup, so benchmarks measure the
+    vector stores rather than an embedding provider.
+    """
+
+    def __init__(self, vectors: Dict[str, np.ndarray]):
+        self.vectors = vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.vectors[text].tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[text].tolist()
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic bag-of-words embeddings (hashed word counts), for offline
+    runs without an embedding provider. Retrieval quality is only indicative.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % self.dim] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def synthetic_corpus(num_chunks: int, dim: int, num_pages: int = None, seed: int = 0) -> Tuple[List[str], List[dict], np.ndarray]:
+    """
+    Build a clustered synthetic corpus: every page is a cluster centre and its
+    chunks are noisy copies of it, which gives realistic nearest-neighbour
+    structure (unlike uniformly random vectors).
+
+    Returns:
+        Tuple of (texts, metadatas, embeddings)
+    """
+    rng = np.random.default_rng(seed)
+    num_pages = num_pages or max(1, num_chunks // 10)
+    centres = rng.standard_normal((num_pages, dim)).astype(np.float32)
+    pages = rng.integers(0, num_pages, size=num_chunks)
+    embeddings = centres[pages] + 0.6 * rng.standard_normal((num_chunks, dim)).astype(np.float32)
+
+    texts = [f"chunk {i} of page {page}" for i, page in enumerate(pages)]
+    metadatas = [{
+        "title": f"Page {page}",
+        "source_url": f"https://docs.example.com/page-{page}/",
+        "file_path": f"data/documentation/page-{page}.json",
+        "scrape_id": f"scrape-{page}",
+        "chunk_id": f"chunk-{i}",
+    } for i, page in enumerate(pages)]
+    return texts, metadatas, embeddings
+
+
+def synthetic_queries(embeddings: np.ndarray, num_queries: int, seed: int = 1) -> np.ndarray:
+    """
+    Queries are perturbed copies of random corpus vectors.
+    """
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(embeddings), size=num_queries)
+    return embeddings[picks] + 0.3 * rng.standard_normal((num_queries, embeddings.shape[1])).astype(np.float32)
+
+
+def time_calls(fn: Callable, args: List, repeat: int = 1) -> Dict[str, float]:
+    """
+    Call ``fn(arg)`` for every arg and report latency percentiles in milliseconds.
+    """
+    latencies = []
+    for _ in range(repeat):
+        for arg in args:
+            start = time.perf_counter()
+            fn(arg)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.asarray(latencies)
+    return {
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def print_table(rows: List[Dict[str, object]]):
+    """
+    Print a list of dicts as an aligned text table.
+    """
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+    cells = [[f"{row[c]:.3f}" if isinstance(row[c], float) else str(row[c]) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for r in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
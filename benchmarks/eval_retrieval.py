@@ -0,0 +1,261 @@
+"""
+Evaluate retrieval quality and latency of the RAG pipelines over a config grid.
+
+Runs a labelled query set (see benchmarks/eval_queries.json) through the
+vanilla and hybrid pipelines for every combination of chunk size, top_k,
+fusion weights (hybrid only) and query preprocessing, and reports recall@k,
+MRR@k, LLM calls per query and p50/p95 retrieval latency in one table.
+
+Each query is labelled by hand with ``relevant_files``: the pages that should
+be retrieved for it, given as page file names or source URLs (URLs survive a
+re-scrape into different file names). Relevance is judged per page, so
+different chunk sizes are comparable. Labels are not derived from the query
+terms: that would reward lexical matching and bias the comparison towards
+BM25 and hybrid retrieval. Queries without labels (e.g. negative queries)
+count towards latency and LLM calls only.
+
+Every (pipeline, chunk size) index is built once in a temporary directory;
+indexes are built and evaluated in parallel (``--workers``). Latencies are
+then measured under concurrent load; use ``--workers 1`` for isolated timings.
+
+Usage:
+    python -m benchmarks.eval_retrieval --chunk-sizes 500 1000 --top-k 3 5 \\
+        --fusion-weights 0.4,0.6 0.5,0.5 --preprocessing on off
+    python -m benchmarks.eval_retrieval --offline  # hashed embeddings, no LLM
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Set
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from benchmarks.common import HashingEmbeddings, print_table
+from fastapi_backend.config import settings
+from fastapi_backend.helpers.snapshot import list_page_files
+from fastapi_backend.pipelines.factory import create_rag_pipeline
+
+
+DEFAULT_QUERY_SET = os.path.join(os.path.dirname(__file__), "eval_queries.json")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Shares document embeddings between the indexes of the grid (the same
+    chunk text is embedded once). Query embeddings are not cached so that
+    retrieval latency includes them.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.cache: Dict[str, List[float]] = {}
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self.lock:
+            missing = list(dict.fromkeys(text for text in texts if text not in self.cache))
+        if missing:
+            vectors = self.embeddings.embed_documents(missing)
+            with self.lock:
+                self.cache.update(zip(missing, vectors))
+        return [self.cache[text] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+class CountingLLMManager:
+    """
+    Wraps an ``LLMManager`` and counts LLM calls (query preprocessing).
+    """
+
+    def __init__(self, llm_manager, embeddings: Embeddings):
+        self.llm_manager = llm_manager
+        self.llm_model = llm_manager.llm_model if llm_manager else None
+        self.embeddings = embeddings
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        if self.llm_manager is None:
+            raise RuntimeError("no LLM configured")
+        return self.llm_manager.invoke(prompt, **kwargs)
+
+    def batch(self, prompt, inputs, max_concurrency: int = 8):
+        self.calls += len(inputs)
+        if self.llm_manager is None:
+            raise RuntimeError("no LLM configured")
+        return self.llm_manager.batch(prompt, inputs, max_concurrency=max_concurrency)
+
+
+def load_query_set(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    for query in queries:
+        if "relevant_terms" in query:
+            raise ValueError(f"Query {query['query']!r} is labelled with relevant_terms, which is no longer "
+                             f"supported: list the relevant pages in relevant_files instead")
+    return queries
+
+
+def label_pages(queries: List[Dict[str, Any]], doc_dir_path: str) -> List[Set[str]]:
+    """
+    Resolve each query's ``relevant_files`` labels (file names or source
+    URLs) to the set of relevant page file paths. Labels that match no
+    english page of the corpus are reported.
+    """
+    pages = {}
+    for file_path in list_page_files(doc_dir_path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            metadata = json.load(f).get("metadata", {})
+        # only english pages are indexed
+        if metadata.get("language", "") == "en":
+            pages[file_path] = metadata.get("sourceURL", "").rstrip("/")
+
+    relevant = []
+    for query in queries:
+        relevant_pages = set()
+        for label in query.get("relevant_files", []):
+            matches = {file_path for file_path, source_url in pages.items()
+                       if label == os.path.basename(file_path) or label.rstrip("/") == source_url}
+            if not matches:
+                print(f"Label {label!r} of {query['query']!r} matches no page in {doc_dir_path}")
+            relevant_pages |= matches
+        relevant.append(relevant_pages)
+    return relevant
+
+
+def score_query(found_docs, relevant: Set[str], k: int) -> Dict[str, float]:
+    """
+    recall@k (relevant pages among the first k chunks) and reciprocal rank of
+    the first chunk from a relevant page among the first k chunks (0 if none).
+    """
+    file_paths = [doc.metadata.get("file_path") for doc in found_docs][:k]
+    recall = len(relevant.intersection(file_paths)) / len(relevant)
+    reciprocal_rank = next((1.0 / rank for rank, file_path in enumerate(file_paths, start=1) if file_path in relevant), 0.0)
+    return {"recall": recall, "reciprocal_rank": reciprocal_rank}
+
+
+def evaluate_index(method: str, chunk_size: int, cells: List[Dict[str, Any]], queries: List[Dict[str, Any]],
+                   relevant: List[Set[str]], llm_manager, embeddings: Embeddings, args) -> List[Dict[str, Any]]:
+    """
+    Build one index and evaluate every grid cell (top_k, fusion weights,
+    preprocessing) that shares it.
+    """
+    counting_manager = CountingLLMManager(llm_manager, embeddings)
+    with tempfile.TemporaryDirectory() as persist_dir:
+        pipeline_settings = settings.model_copy(update={"RETRIEVAL_METHOD": method, "DOC_DIR_PATH": args.doc_dir})
+        pipeline = create_rag_pipeline(counting_manager, pipeline_settings,
+                                       chunk_size=chunk_size,
+                                       chunk_overlap=args.chunk_overlap,
+                                       chroma_persist_dir=persist_dir,
+                                       vector_store_backend=args.backend)
+        start = time.perf_counter()
+        pipeline.warm_up()
+        # one untimed query, so one-off lazy loading is not counted as query latency
+        pipeline.retrieve_documents(queries[0]["query"], use_preprocessing=False)
+        build_s = time.perf_counter() - start
+
+        rows = []
+        for cell in cells:
+            pipeline.top_k_docs = cell["top_k"]
+            if cell["fusion_weights"] is not None:
+                pipeline.fusion_weights = cell["fusion_weights"]
+            counting_manager.calls = 0
+
+            latencies, recalls, reciprocal_ranks = [], [], []
+            for query, relevant_pages in zip(queries, relevant):
+                start = time.perf_counter()
+                found_docs, _ = pipeline.retrieve_documents(query["query"], use_preprocessing=cell["preprocessing"])
+                latencies.append((time.perf_counter() - start) * 1000)
+                if relevant_pages:
+                    scores = score_query(found_docs, relevant_pages, cell["top_k"])
+                    recalls.append(scores["recall"])
+                    reciprocal_ranks.append(scores["reciprocal_rank"])
+
+            rows.append({
+                "pipeline": method,
+                "chunk_size": chunk_size,
+                "top_k": cell["top_k"],
+                "fusion": ",".join(f"{w:g}" for w in cell["fusion_weights"]) if cell["fusion_weights"] else "-",
+                "preprocess": "on" if cell["preprocessing"] else "off",
+                "recall@k": float(np.mean(recalls)) if recalls else 0.0,
+                "mrr@k": float(np.mean(reciprocal_ranks)) if reciprocal_ranks else 0.0,
+                "llm_calls/q": counting_manager.calls / len(queries),
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+                "build_s": build_s,
+            })
+    print(f"Evaluated {method} pipeline, chunk size {chunk_size}: {len(cells)} configs")
+    return rows
+
+
+def parse_weights(value: str) -> List[float]:
+    weights = [float(w) for w in value.split(",")]
+    if len(weights) != 2:
+        raise argparse.ArgumentTypeError("fusion weights are two comma-separated numbers: BM25,vector")
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=DEFAULT_QUERY_SET, help="labelled query set (JSON)")
+    parser.add_argument("--doc-dir", default=settings.DOC_DIR_PATH)
+    parser.add_argument("--pipelines", nargs="+", choices=["vanilla", "hybrid"], default=["vanilla", "hybrid"])
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[settings.CHUNK_SIZE])
+    parser.add_argument("--chunk-overlap", type=int, default=settings.CHUNK_OVERLAP)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[settings.TOP_K_DOCS])
+    parser.add_argument("--fusion-weights", type=parse_weights, nargs="+", default=[settings.FUSION_WEIGHTS])
+    parser.add_argument("--preprocessing", choices=["on", "off"], nargs="+", default=["off", "on"])
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default=settings.VECTOR_STORE_BACKEND)
+    parser.add_argument("--workers", type=int, default=4, help="indexes built and evaluated in parallel")
+    parser.add_argument("--offline", action="store_true", help="hashed embeddings and no LLM (preprocessing off)")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.offline:
+        llm_manager, embeddings = None, HashingEmbeddings()
+        args.preprocessing = ["off"]
+    else:
+        from fastapi_backend.helpers.llm_manager import LLMManager
+
+        llm_manager = LLMManager(api_key=settings.API_KEY,
+                                 provider=settings.PROVIDER,
+                                 llm_model_name=settings.LLM_MODEL_NAME,
+                                 embedding_model_name=settings.EMBEDDING_MODEL_NAME)
+        embeddings = llm_manager.embeddings
+    embeddings = CachedEmbeddings(embeddings)
+
+    queries = load_query_set(args.queries)
+    relevant = label_pages(queries, args.doc_dir)
+    for query, relevant_pages in zip(queries, relevant):
+        if not relevant_pages:
+            print(f"No labelled pages for {query['query']!r}: counted for latency and LLM calls only")
+
+    jobs = []
+    for method in args.pipelines:
+        fusion_grid = args.fusion_weights if method == "hybrid" else [None]
+        cells = [{"top_k": top_k, "fusion_weights": weights, "preprocessing": preprocessing == "on"}
+                 for top_k in args.top_k for weights in fusion_grid for preprocessing in args.preprocessing]
+        jobs.extend((method, chunk_size, cells) for chunk_size in args.chunk_sizes)
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(evaluate_index, method, chunk_size, cells, queries, relevant, llm_manager, embeddings, args)
+                   for method, chunk_size, cells in jobs]
+        rows = [row for future in futures for row in future.result()]
+
+    labelled = sum(1 for relevant_pages in relevant if relevant_pages)
+    print(f"\n{len(queries)} queries ({labelled} labelled), {len(rows)} configs, {args.backend} backend")
+    print_table(rows)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
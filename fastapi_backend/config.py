@@ -1,4 +1,5 @@
 import os
+from typing import Any, Dict, List
 
 from pydantic_settings import BaseSettings
 
@@ -28,6 +29,70 @@ class Settings(BaseSettings):
 
     # Retrieval method
     RETRIEVAL_METHOD: str = "hybrid"
+    # Hybrid retrieval: reciprocal rank fusion weights of the [BM25, vector] rankings
+    FUSION_WEIGHTS: List[float] = [0.4, 0.6]
+
+    # Additional documentation corpora served by this process, as JSON mapping a name
+    # to setting overrides, e.g. CORPORA='{"sdk": {"DOC_DIR_PATH": "data/sdk", "CHROMA_DB_NAME": "chroma_sdk"}}'.
+    # The settings above form DEFAULT_CORPUS. Corpora are loaded on first use and the
+    # least recently used ones are evicted above CORPUS_MEMORY_BUDGET_MB (0 = no limit).
+    CORPORA: Dict[str, Dict[str, Any]] = {}
+    DEFAULT_CORPUS: str = "default"
+    CORPUS_MEMORY_BUDGET_MB: float = 0
+
+    # Vector store backend: "chroma" or "numpy" (memory-mapped exact search)
+    VECTOR_STORE_BACKEND: str = "chroma"
+
+    # Embedding storage for the numpy backend: "float32", "float16" or "int8".
+    # RESCORE_FACTOR > 0 re-scores the top k * RESCORE_FACTOR candidates in float32.
+    EMBEDDING_DTYPE: str = "float32"
+    RESCORE_FACTOR: int = 0
+
+    # Serve from an index snapshot when this file exists (see helpers/snapshot.py)
+    SNAPSHOT_PATH: str = ""
+    SNAPSHOT_VERIFY: bool = True
+
+    # Startup: build/open the index before serving; optionally in a background thread (see /ready)
+    WARMUP_ON_STARTUP: bool = True
+    WARMUP_IN_BACKGROUND: bool = False
+
+    # Watch DOC_DIR_PATH and re-index changed pages in the background
+    # (inotify, or polling every WATCH_POLL_SECONDS where inotify is unavailable)
+    WATCH_DOC_DIR: bool = False
+    WATCH_DEBOUNCE_SECONDS: float = 2.0
+    WATCH_MAX_DELAY_SECONDS: float = 30.0
+    WATCH_POLL_SECONDS: float = 5.0
+    WATCH_USE_INOTIFY: bool = True
+
+    # Suggestion output: "edits" (find/replace ops applied server-side, falls back
+    # to full regeneration when they do not apply) or "full" (rewrite every chunk)
+    SUGGESTION_MODE: str = "edits"
+
+    # Maximum concurrent LLM calls when a request makes several (batch endpoint, suggestions)
+    LLM_MAX_CONCURRENCY: int = 8
+
+    # Token budget for the /chat context; CONTEXT_TOKEN_BUDGETS overrides it per
+    # LLM model name, e.g. CONTEXT_TOKEN_BUDGETS='{"gpt-4o-mini": 6000}'
+    CONTEXT_TOKEN_BUDGET: int = 3000
+    CONTEXT_TOKEN_BUDGETS: Dict[str, int] = {}
+
+    # Semantic /chat answer cache: a question whose embedding is at least
+    # ANSWER_CACHE_SIMILARITY (cosine) close to an answered one reuses its answer
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY: float = 0.95
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+
+    # Gzip responses of at least GZIP_MIN_BYTES for clients that accept it (0 = off)
+    GZIP_MIN_BYTES: int = 4096
+    GZIP_COMPRESS_LEVEL: int = 5
+
+    # On-demand profiling: with PROFILING_ENABLED, requests sent with "X-Profile: 1"
+    # (or ?profile=1) are run under cProfile and kept for /admin/profiles, and
+    # /admin/profile/sample samples all threads. Nothing is installed when disabled.
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: str = ""
+    PROFILE_HISTORY: int = 20
+    PROFILE_MAX_SAMPLE_SECONDS: float = 30.0
 
     # Frontend
     FRONTEND_URL: str = "http://localhost:3000"
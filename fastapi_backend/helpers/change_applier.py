@@ -0,0 +1,201 @@
+import os
+import re
+import json
+import time
+import bisect
+import difflib
+from collections import OrderedDict
+from uuid import uuid4
+from typing import Dict, List, Optional, Tuple
+
+from fastapi_backend.helpers.file_lock import file_lock
+from fastapi_backend.models import DocumentUpdate
+
+
+TOKEN_PATTERN = re.compile(r"\S+")
+
+
+def group_updates_by_file(updates: List[DocumentUpdate]) -> Dict[str, List[DocumentUpdate]]:
+    """
+    Group approved updates by the page file they belong to, keeping request order.
+    """
+    grouped: Dict[str, List[DocumentUpdate]] = OrderedDict()
+    for update in updates:
+        grouped.setdefault(update.document_metadata.file_path, []).append(update)
+    return grouped
+
+
+def write_json_atomic(file_path: str, data: dict):
+    """
+    Write ``data`` next to ``file_path`` and rename it into place, so readers
+    (and the index watcher) never see a half-written page.
+    """
+    tmp_path = os.path.join(os.path.dirname(file_path) or ".", f".{os.path.basename(file_path)}.{uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def token_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    ``(start, end)`` offsets of the whitespace-separated tokens of ``text``.
+    """
+    return [match.span() for match in TOKEN_PATTERN.finditer(text)]
+
+
+def find_token_run(markdown: str, original: str) -> Optional[List[Tuple[int, int]]]:
+    """
+    Locate ``original`` in ``markdown`` ignoring whitespace only.
+
+    Cleaning strips indentation and blank lines but keeps every other token,
+    so a chunk cut from the cleaned page is found as the same run of tokens in
+    the raw markdown. Chunks that lost or changed tokens in cleaning (HTML,
+    entities, dropped punctuation-only lines such as code fence closers) are
+    not found.
+
+    Returns:
+        The raw offsets of the matching tokens (first match), or None.
+    """
+    tokens = original.split()
+    if not tokens:
+        return None
+    spans = token_spans(markdown)
+    # search on the token sequence, with a separator that cannot occur in a token
+    haystack = "\0".join(markdown[start:end] for start, end in spans)
+    needle = "\0".join(tokens)
+    token_starts = []
+    position = 0
+    for start, end in spans:
+        token_starts.append(position)
+        position += end - start + 1
+
+    position = haystack.find(needle)
+    while position != -1:
+        end = position + len(needle)
+        if (position == 0 or haystack[position - 1] == "\0") and (end == len(haystack) or haystack[end] == "\0"):
+            first = bisect.bisect_left(token_starts, position)
+            return spans[first:first + len(tokens)]
+        position = haystack.find(needle, position + 1)
+    return None
+
+
+def patch_token_run(markdown: str, run: List[Tuple[int, int]], original: str, suggested: str) -> str:
+    """
+    Apply the token-level difference between ``original`` and ``suggested``
+    to the raw tokens ``run`` (see ``find_token_run``). Only changed tokens are
+    rewritten, so indentation, blank lines and markup around unchanged tokens
+    stay as they are in the raw page.
+    """
+    original_tokens = original.split()
+    suggested_spans = token_spans(suggested)
+    suggested_tokens = [suggested[start:end] for start, end in suggested_spans]
+
+    # collect raw replacements first and apply them back to front, so offsets stay valid
+    patches = []
+    matcher = difflib.SequenceMatcher(None, original_tokens, suggested_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if j1 < j2:
+            text = suggested[suggested_spans[j1][0]:suggested_spans[j2 - 1][1]]
+        else:
+            text = ""
+        if i1 < i2:
+            start, end = run[i1][0], run[i2 - 1][1]
+            if not text:
+                # drop the whitespace in front of removed tokens too (or after them at the start)
+                if i1 > 0:
+                    start = run[i1 - 1][1]
+                elif i2 < len(run):
+                    end = run[i2][0]
+        elif i1 > 0:
+            # insertion after raw token i1 - 1, with the whitespace the suggestion puts in front of it
+            start = end = run[i1 - 1][1]
+            text = suggested[suggested_spans[j1 - 1][1]:suggested_spans[j2 - 1][1]] if j1 > 0 else " " + text
+        else:
+            start = end = run[0][0]
+            text = suggested[suggested_spans[j1][0]:suggested_spans[j2][0]] if j2 < len(suggested_spans) else text + " "
+        patches.append((start, end, text))
+
+    for start, end, text in reversed(patches):
+        markdown = markdown[:start] + text + markdown[end:]
+    return markdown
+
+
+class ChangeApplier:
+    """
+    Writes approved chunk edits back into the page JSON files.
+
+    Chunks are cut from the *cleaned* page text, so an approved ``original`` is
+    first looked up verbatim in the raw markdown. Otherwise its tokens are
+    located in the raw markdown (cleaning only changes whitespace for most
+    chunks) and just the changed tokens are rewritten there. Chunks that
+    cannot be mapped back are reported as not found; cleaned text is never
+    written over the raw page.
+
+    Each page is read, patched and written under a per-file lock, so
+    concurrent requests (or workers) cannot lose each other's edits.
+    """
+
+    @staticmethod
+    def replacement(update: DocumentUpdate) -> str:
+        if update.model_output.change_type == "removed":
+            return ""
+        return update.model_output.suggested
+
+    def patch_markdown(self, markdown: str, updates: List[DocumentUpdate]) -> Tuple[str, List[str], List[str]]:
+        """
+        Apply ``updates`` to a page's markdown.
+
+        Returns:
+            Tuple of (patched_markdown, applied_chunk_ids, not_found_chunk_ids)
+        """
+        applied, not_found = [], []
+        for update in updates:
+            if update.model_output.change_type == "unchanged":
+                continue
+            original = update.document_metadata.original
+            if original and original in markdown:
+                markdown = markdown.replace(original, self.replacement(update), 1)
+                applied.append(update.document_metadata.chunk_id)
+                continue
+            run = find_token_run(markdown, original or "")
+            if run is None:
+                not_found.append(update.document_metadata.chunk_id)
+                continue
+            markdown = patch_token_run(markdown, run, original, self.replacement(update))
+            applied.append(update.document_metadata.chunk_id)
+
+        return markdown, applied, not_found
+
+    @staticmethod
+    def lock_path(file_path: str) -> str:
+        # hidden and not *.json, so the index watcher ignores it
+        return os.path.join(os.path.dirname(file_path) or ".", f".{os.path.basename(file_path)}.lock")
+
+    def apply_to_file(self, file_path: str, updates: List[DocumentUpdate]) -> Dict[str, object]:
+        """
+        Patch one page file with all of its approved updates in a single write.
+        """
+        start = time.perf_counter()
+        result = {"file_path": file_path, "updates": len(updates), "applied": [], "not_found": [], "error": None}
+        try:
+            with file_lock(self.lock_path(file_path)):
+                with open(file_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                markdown, applied, not_found = self.patch_markdown(data.get("markdown", ""), updates)
+                if applied:
+                    data["markdown"] = markdown
+                    write_json_atomic(file_path, data)
+            result["applied"], result["not_found"] = applied, not_found
+        except (OSError, ValueError) as e:
+            result["error"] = str(e)
+            result["not_found"] = [u.document_metadata.chunk_id for u in updates]
+        result["write_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
@@ -0,0 +1,303 @@
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+class PageRecord:
+    """
+    Page-level metadata, stored once per page and shared by all of its chunks.
+    """
+    __slots__ = ("title", "source_url", "file_path", "scrape_id")
+
+    def __init__(self, title: str, source_url: str, file_path: str, scrape_id: str):
+        self.title = title
+        self.source_url = source_url
+        self.file_path = file_path
+        self.scrape_id = scrape_id
+
+
+class ChunkRecord:
+    """
+    A chunk: its id, the index of its page and its span in the text buffer.
+    """
+    __slots__ = ("chunk_id", "page", "start", "end")
+
+    def __init__(self, chunk_id: str, page: int, start: int, end: int):
+        self.chunk_id = chunk_id
+        self.page = page
+        self.start = start
+        self.end = end
+
+
+PAGE_METADATA_KEYS = ("title", "source_url", "file_path", "scrape_id")
+
+# share of tombstoned chunk slots above which an updated store is compacted
+COMPACTION_TOMBSTONE_RATIO = 0.2
+
+
+def match_chunks(existing_ids: List[str],
+                existing_texts: List[str],
+                existing_metadatas: List[Dict[str, Any]],
+                new_chunks: List[Document],
+                ) -> Tuple[List[str], List[str], List[Document]]:
+    """
+    Match a page's freshly split chunks against the chunks already indexed for
+    it. Chunks with identical text and page metadata keep their id (and their
+    embedding); everything else is removed or added.
+
+    Returns:
+        Tuple of (kept_ids, removed_ids, added_chunks)
+    """
+    unmatched: Dict[Tuple, List[str]] = {}
+    for chunk_id, text, metadata in zip(existing_ids, existing_texts, existing_metadatas):
+        key = (text, *((metadata or {}).get(k, "") for k in PAGE_METADATA_KEYS))
+        unmatched.setdefault(key, []).append(chunk_id)
+
+    kept, added = [], []
+    for chunk in new_chunks:
+        key = (chunk.page_content, *(chunk.metadata.get(k, "") for k in PAGE_METADATA_KEYS))
+        if unmatched.get(key):
+            kept.append(unmatched[key].pop())
+        else:
+            added.append(chunk)
+
+    removed = [chunk_id for ids in unmatched.values() for chunk_id in ids]
+    return kept, removed, added
+
+
+class ChunkStore:
+    """
+    Compact, columnar in-memory store of document chunks.
+
+    Chunk texts live in one contiguous string buffer addressed by offsets, page
+    metadata is interned in ``PageRecord``s and every chunk is a ``ChunkRecord``
+    with ``__slots__``. LangChain ``Document`` objects are only materialized for
+    the chunks that are actually returned via ``to_document``.
+
+    Chunks are addressed by a stable integer index (their position in
+    ``chunks``), which is what the lexical index stores. Updates never move
+    existing chunks: removed chunks leave a ``None`` tombstone and new chunks
+    are appended, so indices held by the lexical index stay valid. Once
+    tombstones pass ``COMPACTION_TOMBSTONE_RATIO``, ``compacted`` rebuilds
+    the store without them (and without the dead text and unused pages),
+    renumbering the chunks; the lexical index is remapped alongside.
+    """
+
+    def __init__(self, pages: List[PageRecord] = None, chunks: List[ChunkRecord] = None, buffer: str = ""):
+        self.pages = pages or []
+        self.chunks = chunks or []
+        self.buffer = buffer
+        self._page_by_path = {page.file_path: i for i, page in enumerate(self.pages)}
+        self._index_by_id = {chunk.chunk_id: i for i, chunk in enumerate(self.chunks) if chunk is not None}
+        self._chunk_pages = None
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str], metadatas: Iterable[Dict[str, Any]]) -> "ChunkStore":
+        """
+        Build a store from chunk texts and their LangChain-style metadata dicts.
+        Every metadata dict must contain ``chunk_id``.
+        """
+        store = cls()
+        parts = []
+        offset = 0
+        for text, metadata in zip(texts, metadatas):
+            page = store._intern_page(metadata)
+            store._index_by_id[metadata["chunk_id"]] = len(store.chunks)
+            store.chunks.append(ChunkRecord(metadata["chunk_id"], page, offset, offset + len(text)))
+            parts.append(text)
+            offset += len(text)
+        store.buffer = "".join(parts)
+        return store
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document]) -> "ChunkStore":
+        documents = list(documents)
+        return cls.from_texts([doc.page_content for doc in documents], [doc.metadata for doc in documents])
+
+    def _intern_page(self, metadata: Dict[str, Any]) -> int:
+        file_path = metadata.get("file_path", "")
+        page = self._page_by_path.get(file_path)
+        if page is None:
+            page = len(self.pages)
+            self.pages.append(PageRecord(
+                title=metadata.get("title", ""),
+                source_url=metadata.get("source_url", ""),
+                file_path=file_path,
+                scrape_id=metadata.get("scrape_id", ""),
+            ))
+            self._page_by_path[file_path] = page
+        return page
+
+    def __len__(self) -> int:
+        return len(self._index_by_id)
+
+    def __iter__(self):
+        return (i for i, chunk in enumerate(self.chunks) if chunk is not None)
+
+    @property
+    def num_slots(self) -> int:
+        """
+        Number of chunk indices in use, including tombstones.
+        """
+        return len(self.chunks)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate in-memory size of the text buffer, chunk and page records.
+        """
+        size = sys.getsizeof(self.buffer) + sys.getsizeof(self.chunks)
+        for chunk in self.chunks:
+            if chunk is not None:
+                size += sys.getsizeof(chunk) + sys.getsizeof(chunk.chunk_id)
+        for page in self.pages:
+            size += sys.getsizeof(page) + sum(sys.getsizeof(getattr(page, k)) for k in PageRecord.__slots__)
+        return size
+
+    @property
+    def tombstone_ratio(self) -> float:
+        """
+        Share of chunk slots that are tombstones of removed chunks.
+        """
+        return 1.0 - len(self) / self.num_slots if self.num_slots else 0.0
+
+    def needs_compaction(self, max_tombstone_ratio: float = COMPACTION_TOMBSTONE_RATIO) -> bool:
+        return self.tombstone_ratio > max_tombstone_ratio
+
+    def compacted(self) -> Tuple["ChunkStore", np.ndarray]:
+        """
+        Return a new store with only the live chunks, their text and their
+        pages, plus the index remapping (old chunk index -> new index, -1 for
+        tombstones) to apply to anything that stores chunk indices.
+        """
+        remap = np.full(len(self.chunks), -1, dtype=np.int32)
+        page_map: Dict[int, int] = {}
+        pages, chunks, parts = [], [], []
+        offset = 0
+        for i in self:
+            chunk = self.chunks[i]
+            if chunk.page not in page_map:
+                page_map[chunk.page] = len(pages)
+                pages.append(self.pages[chunk.page])
+            text = self.buffer[chunk.start:chunk.end]
+            remap[i] = len(chunks)
+            chunks.append(ChunkRecord(chunk.chunk_id, page_map[chunk.page], offset, offset + len(text)))
+            parts.append(text)
+            offset += len(text)
+        return ChunkStore(pages=pages, chunks=chunks, buffer="".join(parts)), remap
+
+    def chunk_indices_for_file(self, file_path: str) -> List[int]:
+        page = self._page_by_path.get(file_path)
+        if page is None:
+            return []
+        return [i for i in self if self.chunks[i].page == page]
+
+    def chunk_mask(self, pages: Iterable[int]) -> np.ndarray:
+        """
+        Boolean mask over chunk indices that selects the live chunks of ``pages``
+        (page indices into ``self.pages``).
+        """
+        if self._chunk_pages is None:
+            # page of every chunk slot (-1 for tombstones), built once per store
+            self._chunk_pages = np.fromiter((c.page if c is not None else -1 for c in self.chunks),
+                                            dtype=np.int32, count=len(self.chunks))
+        return np.isin(self._chunk_pages, np.fromiter(pages, dtype=np.int32))
+
+    def updated(self, removed_chunk_ids: Iterable[str], new_texts: List[str], new_metadatas: List[Dict[str, Any]]) -> "ChunkStore":
+        """
+        Return a new store with ``removed_chunk_ids`` tombstoned and the new
+        chunks appended. ``self`` is left untouched, so readers holding it keep
+        a consistent view while the new store is being built.
+        """
+        store = ChunkStore.__new__(ChunkStore)
+        store.pages = list(self.pages)
+        store.chunks = list(self.chunks)
+        store._page_by_path = dict(self._page_by_path)
+        store._index_by_id = dict(self._index_by_id)
+        store._chunk_pages = None
+
+        for chunk_id in removed_chunk_ids:
+            index = store._index_by_id.pop(chunk_id, None)
+            if index is not None:
+                store.chunks[index] = None
+
+        parts = []
+        offset = len(self.buffer)
+        for text, metadata in zip(new_texts, new_metadatas):
+            # page metadata (e.g. the title) may have changed with the edit
+            page = store._page_by_path.get(metadata.get("file_path", ""))
+            if page is not None:
+                store.pages[page] = PageRecord(
+                    title=metadata.get("title", ""),
+                    source_url=metadata.get("source_url", ""),
+                    file_path=metadata.get("file_path", ""),
+                    scrape_id=metadata.get("scrape_id", ""),
+                )
+            else:
+                page = store._intern_page(metadata)
+            store._index_by_id[metadata["chunk_id"]] = len(store.chunks)
+            store.chunks.append(ChunkRecord(metadata["chunk_id"], page, offset, offset + len(text)))
+            parts.append(text)
+            offset += len(text)
+        store.buffer = self.buffer + "".join(parts)
+        return store
+
+    def is_live(self, index: int) -> bool:
+        return 0 <= index < len(self.chunks) and self.chunks[index] is not None
+
+    def index_of(self, chunk_id: str) -> Optional[int]:
+        return self._index_by_id.get(chunk_id)
+
+    def text(self, index: int) -> str:
+        chunk = self.chunks[index]
+        return self.buffer[chunk.start:chunk.end]
+
+    def page_metadata(self, page: int) -> Dict[str, Any]:
+        record = self.pages[page]
+        return {
+            "title": record.title,
+            "source_url": record.source_url,
+            "file_path": record.file_path,
+            "scrape_id": record.scrape_id,
+        }
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        chunk = self.chunks[index]
+        metadata = self.page_metadata(chunk.page)
+        metadata["chunk_id"] = chunk.chunk_id
+        return metadata
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """
+        Columnar representation used by snapshots (see ``from_arrays``). A
+        store with tombstones is compacted first, so its chunk indices are
+        renumbered (see ``compacted``).
+        """
+        if len(self) != self.num_slots:
+            return self.compacted()[0].to_arrays()
+        return {
+            "pages": [[p.title, p.source_url, p.file_path, p.scrape_id] for p in self.pages],
+            "chunk_ids": [c.chunk_id for c in self.chunks],
+            "chunk_pages": np.fromiter((c.page for c in self.chunks), dtype=np.int32, count=len(self.chunks)),
+            "chunk_offsets": np.fromiter((c.start for c in self.chunks), dtype=np.int64, count=len(self.chunks)),
+            "chunk_ends": np.fromiter((c.end for c in self.chunks), dtype=np.int64, count=len(self.chunks)),
+            "buffer": self.buffer,
+        }
+
+    @classmethod
+    def from_arrays(cls, pages, chunk_ids, chunk_pages, chunk_offsets, chunk_ends, buffer: str) -> "ChunkStore":
+        return cls(
+            pages=[PageRecord(*page) for page in pages],
+            chunks=[ChunkRecord(chunk_id, int(page), int(start), int(end))
+                    for chunk_id, page, start, end in zip(chunk_ids, chunk_pages, chunk_offsets, chunk_ends)],
+            buffer=buffer,
+        )
+
+    def to_document(self, index: int) -> Document:
+        return Document(
+            page_content=self.text(index),
+            metadata=self.metadata(index),
+            id=self.chunks[index].chunk_id,
+        )
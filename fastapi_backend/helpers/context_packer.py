@@ -0,0 +1,159 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.documents import Document
+
+
+CHARS_PER_TOKEN = 4
+MIN_OVERLAP_CHARS = 20
+
+
+class TokenCounter:
+    """
+    Counts (and truncates to) tokens with the model's tiktoken encoding.
+
+    Falls back to ``CHARS_PER_TOKEN`` characters per token when tiktoken is not
+    installed or its encoding files cannot be loaded (e.g. no network access).
+    """
+
+    def __init__(self, model_name: str = None):
+        self.encoding = None
+        try:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.encoding_for_model(model_name or "")
+            except KeyError:
+                # not an OpenAI model (e.g. Gemini): a close enough approximation
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"Using approximate token counts ({CHARS_PER_TOKEN} chars/token): {e}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return self.encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * CHARS_PER_TOKEN]
+
+
+@lru_cache(maxsize=8)
+def get_token_counter(model_name: str = None) -> TokenCounter:
+    return TokenCounter(model_name)
+
+
+def text_overlap(left: str, right: str, min_overlap: int = MIN_OVERLAP_CHARS) -> int:
+    """
+    Length of the longest suffix of ``left`` that is also a prefix of ``right``
+    (0 if shorter than ``min_overlap``). This is how consecutive chunks of a
+    page split with ``chunk_overlap`` > 0 line up.
+    """
+    probe = right[:min_overlap]
+    if len(probe) < min_overlap:
+        return 0
+    pos = left.find(probe, max(0, len(left) - len(right)))
+    while pos != -1:
+        if right.startswith(left[pos:]):
+            return len(left) - pos
+        pos = left.find(probe, pos + 1)
+    return 0
+
+
+class ContextPacker:
+    """
+    Assembles the LLM context from ranked chunks within a token budget.
+
+    Chunks are taken best first. Duplicates and chunks already contained in the
+    packed text are skipped, chunks from the same page are grouped into one
+    block, and consecutive chunks are stitched together without repeating the
+    text they overlap on. A chunk that does not fit in the remaining budget is
+    skipped (the top chunk is truncated instead, so the context is never empty).
+
+    Consecutive chunks are recognised by their shared text only, so stitching
+    needs ``CHUNK_OVERLAP`` of at least ``MIN_OVERLAP_CHARS``. With the default
+    ``CHUNK_OVERLAP=0`` nothing is stitched: chunks of the same page are still
+    grouped, in rank order.
+    """
+
+    def __init__(self, token_budget: int, model_name: str = None, separator: str = "\n\n"):
+        self.token_budget = token_budget
+        self.token_counter = get_token_counter(model_name)
+        self.separator = separator
+
+    def pack(self, documents: List[Document]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Pack ``documents`` (ranked best first) into a single context string.
+
+        Args:
+            documents (List[Document]): Candidate chunks, best first.
+
+        Returns:
+            Tuple of (context, packing_info) where packing_info holds the packed
+            token count, the budget, chunk counters, the packed chunk ids and one
+            source per packed page.
+        """
+        count = self.token_counter.count
+        separator_tokens = count(self.separator)
+        remaining = self.token_budget
+        # page key -> list of text segments; dict keeps first-seen (rank) order
+        pages: Dict[str, List[str]] = {}
+        sources: Dict[str, Dict[str, str]] = {}
+        info = {"token_budget": self.token_budget, "candidates": len(documents),
+                "packed_chunks": 0, "merged_chunks": 0, "duplicates": 0, "skipped": 0, "truncated": False,
+                "chunk_ids": []}
+
+        for rank, doc in enumerate(documents):
+            text = doc.page_content.strip()
+            if not text or any(text in segment for segments in pages.values() for segment in segments):
+                info["duplicates"] += 1
+                continue
+
+            page_key = doc.metadata.get("file_path") or f"#{rank}"
+            segments = pages.get(page_key, [])
+
+            # stitch onto a segment of the same page it overlaps with
+            merged_index, merged, added_text = None, None, text
+            for i, segment in enumerate(segments):
+                overlap = text_overlap(segment, text)
+                if overlap:
+                    merged_index, merged, added_text = i, segment + text[overlap:], text[overlap:]
+                    break
+                overlap = text_overlap(text, segment)
+                if overlap:
+                    merged_index, merged, added_text = i, text[:-overlap] + segment, text[:-overlap]
+                    break
+
+            cost = count(added_text) + (separator_tokens if merged is None and pages else 0)
+            if cost > remaining:
+                if pages:
+                    info["skipped"] += 1
+                    continue
+                text = self.token_counter.truncate(text, remaining)
+                info["truncated"] = True
+
+            if merged is not None:
+                segments[merged_index] = merged
+                info["merged_chunks"] += 1
+            else:
+                segments.append(text)
+            pages[page_key] = segments
+            remaining -= min(cost, remaining)
+            info["packed_chunks"] += 1
+            if doc.metadata.get("chunk_id"):
+                info["chunk_ids"].append(doc.metadata["chunk_id"])
+
+            if page_key not in sources and doc.metadata.get("file_path"):
+                sources[page_key] = {"title": doc.metadata.get("title", "Unknown"),
+                                     "source_url": doc.metadata.get("source_url", "")}
+
+        context = self.separator.join(segment for segments in pages.values() for segment in segments)
+        info["packed_tokens"] = count(context)
+        info["sources"] = list(sources.values())
+        return context, info
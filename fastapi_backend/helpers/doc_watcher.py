@@ -0,0 +1,278 @@
+"""
+Background watcher that keeps the index in sync with ``DOC_DIR_PATH``.
+
+File events are collected from inotify (Linux, via ctypes, no extra
+dependency) or, where inotify is unavailable, from periodic directory scans.
+Bursts of events are debounced and handed to ``on_change`` as one batch of
+page files, which the pipelines apply with ``reindex_files``.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Set
+
+from fastapi_backend.helpers.snapshot import build_ingestion_manifest, diff_ingestion_manifest, list_page_files
+
+
+# inotify event masks (see inotify(7))
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_page_file(path: str) -> bool:
+    name = os.path.basename(path)
+    return name.endswith(".json") and not name.startswith(".")
+
+
+class PollingEventSource:
+    """
+    Detects changes by re-scanning the directory every ``poll_interval`` seconds
+    and comparing file sizes and modification times.
+    """
+    name = "polling"
+
+    def __init__(self, doc_dir_path: str, poll_interval: float = 5.0):
+        self.doc_dir_path = doc_dir_path
+        self.poll_interval = poll_interval
+        self.last_scan = build_ingestion_manifest(list_page_files(doc_dir_path))
+        self.next_poll = time.monotonic() + poll_interval
+
+    def read(self, timeout: float, stop_event: threading.Event) -> Set[str]:
+        if stop_event.wait(max(0.0, min(timeout, self.next_poll - time.monotonic()))):
+            return set()
+        if time.monotonic() < self.next_poll:
+            return set()
+        self.next_poll = time.monotonic() + self.poll_interval
+        scan = build_ingestion_manifest(list_page_files(self.doc_dir_path))
+        changed = diff_ingestion_manifest(self.last_scan, scan)
+        self.last_scan = scan
+        return set(changed)
+
+    def close(self):
+        pass
+
+
+class InotifyEventSource:
+    """
+    Linux inotify watches on ``doc_dir_path`` and all of its subdirectories.
+
+    Pages are reported when they are closed after writing, moved in or out, or
+    deleted. Directory events and queue overflows fall back to a rescan of the
+    affected tree.
+    """
+    name = "inotify"
+
+    def __init__(self, doc_dir_path: str):
+        self.doc_dir_path = doc_dir_path
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+        self.known_files: Set[str] = set(list_page_files(doc_dir_path))
+        for root, dirs, files in os.walk(doc_dir_path):
+            self.add_watch(root)
+
+    def add_watch(self, path: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.watches[wd] = path
+
+    def rescan(self, directory: str) -> Set[str]:
+        """
+        Every page known or present under ``directory``; watches new subdirectories.
+        """
+        prefix = directory.rstrip(os.sep) + os.sep
+        changed = {path for path in self.known_files if path.startswith(prefix)}
+        if os.path.isdir(directory):
+            for root, dirs, files in os.walk(directory):
+                if root not in self.watches.values():
+                    self.add_watch(root)
+            changed.update(list_page_files(directory))
+        return changed
+
+    def read(self, timeout: float, stop_event: threading.Event) -> Set[str]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+
+        changed = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # events were lost: treat the whole tree as changed
+                changed.update(self.rescan(self.doc_dir_path))
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                changed.update(self.rescan(path))
+            elif is_page_file(path) and mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                # IN_CREATE alone is skipped: the page is reported once it is closed
+                changed.add(path)
+
+        for path in changed:
+            if os.path.exists(path):
+                self.known_files.add(path)
+            else:
+                self.known_files.discard(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DocumentWatcher:
+    """
+    Watches ``doc_dir_path`` in a background thread and calls ``on_change``
+    with debounced batches of changed page files.
+
+    A batch is flushed once no new event arrived for ``debounce_seconds``, or
+    at the latest ``max_delay_seconds`` after its first event, so a steady
+    stream of writes cannot postpone updates forever. If ``on_change`` raises,
+    the batch stays queued and is retried with exponential backoff (starting
+    at twice ``debounce_seconds``, capped at ``max_delay_seconds``).
+
+    Args:
+        doc_dir_path (str): Directory with the page JSON files.
+        on_change (Callable[[List[str]], dict]): Receives the changed files (added,
+            modified and deleted) and applies them, e.g. ``pipeline.reindex_files``.
+        debounce_seconds (float): Quiet period before a batch is flushed.
+        max_delay_seconds (float): Upper bound on how long a batch is held back.
+        poll_interval (float): Scan interval of the polling fallback.
+        use_inotify (bool): Try inotify first; polling is used if it is unavailable.
+    """
+
+    def __init__(self,
+                 doc_dir_path: str,
+                 on_change: Callable[[List[str]], dict],
+                 debounce_seconds: float = 2.0,
+                 max_delay_seconds: float = 30.0,
+                 poll_interval: float = 5.0,
+                 use_inotify: bool = True,
+                 ):
+        self.doc_dir_path = doc_dir_path
+        self.on_change = on_change
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.source = None
+        self.pending: Set[str] = set()
+        self.first_event = None
+        self.last_event = None
+        # consecutive failed flushes and when the failed batch is retried
+        self.failures = 0
+        self.retry_at = None
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stats = {"backend": None, "batches": 0, "files": 0, "errors": 0, "last_batch_ms": 0.0}
+
+    def create_source(self):
+        if self.use_inotify:
+            try:
+                return InotifyEventSource(self.doc_dir_path)
+            except (OSError, AttributeError) as e:
+                # no inotify (non-Linux) or watch limit reached
+                print(f"inotify unavailable, falling back to polling every {self.poll_interval}s: {e}")
+        return PollingEventSource(self.doc_dir_path, poll_interval=self.poll_interval)
+
+    def start(self, initial_paths: List[str] = None):
+        """
+        Start watching. ``initial_paths`` (e.g. pages changed while the server
+        was down) are queued as the first batch.
+        """
+        self.source = self.create_source()
+        self.stats["backend"] = self.source.name
+        if initial_paths:
+            self.record(initial_paths)
+        self.thread = threading.Thread(target=self.run, name="doc-watcher", daemon=True)
+        self.thread.start()
+        print(f"Watching {self.doc_dir_path} for page changes ({self.source.name})")
+
+    def stop(self, timeout: float = 5.0):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        if self.source is not None:
+            self.source.close()
+
+    def record(self, paths):
+        now = time.monotonic()
+        self.pending.update(paths)
+        self.first_event = self.first_event or now
+        self.last_event = now
+
+    def flush_due_in(self) -> float:
+        """
+        Seconds until the pending batch should be flushed (1s idle wait if none).
+        """
+        if not self.pending:
+            return 1.0
+        now = time.monotonic()
+        due = min(self.last_event + self.debounce_seconds, self.first_event + self.max_delay_seconds)
+        if self.retry_at is not None:
+            due = max(due, self.retry_at)
+        return max(0.0, due - now)
+
+    def flush(self):
+        paths = sorted(self.pending)
+        self.pending, self.first_event, self.last_event = set(), None, None
+        start = time.perf_counter()
+        try:
+            result = self.on_change(paths)
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.failures += 1
+            delay = min(self.debounce_seconds * 2 ** self.failures, self.max_delay_seconds)
+            # keep the pages queued, or they stay stale until they happen to change again
+            self.record(paths)
+            self.retry_at = time.monotonic() + delay
+            print(f"Index update for {len(paths)} changed pages failed, retrying in {delay:.1f}s: {e}")
+            return
+        self.failures, self.retry_at = 0, None
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        updated = [path for path, info in (result or {}).get("files", {}).items() if "error" not in info]
+        self.stats["batches"] += 1
+        self.stats["files"] += len(updated)
+        self.stats["last_batch_ms"] = elapsed_ms
+        if updated:
+            print(f"Re-indexed {len(updated)} changed pages in {elapsed_ms} ms")
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                changed = self.source.read(self.flush_due_in(), self.stop_event)
+            except OSError as e:
+                print(f"Document watcher error: {e}")
+                self.stop_event.wait(self.poll_interval)
+                continue
+            if changed:
+                self.record(changed)
+            if self.pending and self.flush_due_in() <= 0:
+                self.flush()
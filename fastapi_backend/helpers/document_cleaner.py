@@ -1,7 +1,6 @@
 import re
 import html
 from typing import List, Tuple
-from bs4 import BeautifulSoup
 
 
 class DocumentCleaner:
@@ -18,6 +17,8 @@ class DocumentCleaner:
         """
         Remove HTML tags and entities from text.
         """
+        from bs4 import BeautifulSoup
+
         # Decode HTML entities
         text = html.unescape(text)
         
@@ -137,7 +138,7 @@ class DocumentCleaner:
         cleaning_info['reduction_percentage'] = round(
             (cleaning_info['original_length'] - cleaning_info['final_length']) / 
             cleaning_info['original_length'] * 100, 2
-        )
+        ) if cleaning_info['original_length'] else 0
         
         return text, cleaning_info
 
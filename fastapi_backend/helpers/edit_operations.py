@@ -0,0 +1,76 @@
+from typing import List, Tuple
+
+from fastapi_backend.models import EditOperation, EditOutput, ModelOutput
+
+
+class EditApplyError(ValueError):
+    """
+    Raised when a set of edit operations cannot be applied unambiguously.
+    """
+
+
+def locate_edits(original: str, edits: List[EditOperation]) -> List[Tuple[int, int, str]]:
+    """
+    Resolve every edit to (start, end, replacement) spans of ``original``.
+
+    All anchors are matched against the original text (not the partially
+    edited one), so the result does not depend on the order of the edits.
+    """
+    spans = []
+    for edit in edits:
+        if not edit.find:
+            raise EditApplyError("Edit operation with an empty 'find' anchor")
+        starts = []
+        pos = original.find(edit.find)
+        while pos != -1:
+            starts.append(pos)
+            pos = original.find(edit.find, pos + len(edit.find))
+        if not starts:
+            raise EditApplyError(f"Anchor not found: {edit.find[:80]!r}")
+        if len(starts) > 1 and not edit.replace_all:
+            raise EditApplyError(f"Anchor is ambiguous ({len(starts)} matches): {edit.find[:80]!r}")
+        spans.extend((start, start + len(edit.find), edit.replace) for start in starts)
+
+    spans.sort()
+    for (_, prev_end, _), (start, _, _) in zip(spans, spans[1:]):
+        if start < prev_end:
+            raise EditApplyError("Edit operations overlap")
+    return spans
+
+
+def apply_edit_operations(original: str, edits: List[EditOperation]) -> str:
+    """
+    Rebuild the full suggested text by applying ``edits`` to ``original``.
+    """
+    parts = []
+    last = 0
+    for start, end, replacement in locate_edits(original, edits):
+        parts.append(original[last:start])
+        parts.append(replacement)
+        last = end
+    parts.append(original[last:])
+    return "".join(parts)
+
+
+def edit_output_to_model_output(edit_output: EditOutput, original: str) -> ModelOutput:
+    """
+    Convert a patch-style ``EditOutput`` into the full-text ``ModelOutput``
+    the rest of the app works with.
+
+    Raises:
+        EditApplyError: If the edits are missing, invalid or do not apply.
+    """
+    change_type = edit_output.change_type.strip().lower()
+    if change_type == "unchanged":
+        return ModelOutput(change_type="unchanged", suggested=original)
+    if change_type == "removed":
+        return ModelOutput(change_type="removed", suggested="")
+    if change_type != "modified":
+        raise EditApplyError(f"Unknown change type: {edit_output.change_type!r}")
+    if not edit_output.edits:
+        raise EditApplyError("Change type is modified but no edits were returned")
+
+    suggested = apply_edit_operations(original, edit_output.edits)
+    if suggested == original:
+        return ModelOutput(change_type="unchanged", suggested=original)
+    return ModelOutput(change_type="modified", suggested=suggested)
@@ -0,0 +1,57 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; only threads of one process are serialized there
+    fcntl = None
+
+
+class _PathLock:
+    """
+    Thread lock plus the advisory file lock held while the thread lock is held.
+    """
+    __slots__ = ("rlock", "depth", "fd")
+
+    def __init__(self):
+        self.rlock = threading.RLock()
+        self.depth = 0
+        self.fd = None
+
+
+_path_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _path_lock(lock_path: str) -> _PathLock:
+    with _registry_lock:
+        return _path_locks.setdefault(lock_path, _PathLock())
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    """
+    Hold an exclusive lock named by ``lock_path``: a thread lock within this
+    process and, where ``fcntl`` is available, an ``flock`` on ``lock_path``
+    (created if missing) across processes such as several uvicorn workers.
+    Re-entrant within a thread.
+
+    Args:
+        lock_path (str): Lock file, e.g. next to the file being rewritten. It
+            is never replaced, so its lock outlives atomic renames of that file.
+    """
+    lock = _path_lock(os.path.abspath(lock_path))
+    with lock.rlock:
+        if lock.depth == 0 and fcntl is not None:
+            lock.fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(lock.fd, fcntl.LOCK_EX)
+        lock.depth += 1
+        try:
+            yield
+        finally:
+            lock.depth -= 1
+            if lock.depth == 0 and lock.fd is not None:
+                fcntl.flock(lock.fd, fcntl.LOCK_UN)
+                os.close(lock.fd)
+                lock.fd = None
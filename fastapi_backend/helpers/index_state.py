@@ -0,0 +1,67 @@
+import threading
+from contextlib import contextmanager
+
+from fastapi_backend.helpers.chunk_store import ChunkStore
+from fastapi_backend.helpers.lexical_index import BM25Index
+
+
+class IndexState:
+    """
+    Immutable bundle of the chunk store and the BM25 index built over it.
+
+    Writers build a new state next to the current one and publish it with a
+    single attribute assignment, so a query that reads ``pipeline.index_state``
+    once always sees a chunk store and lexical index that belong together.
+    ``version`` increases with every published update.
+    """
+    __slots__ = ("chunk_store", "lexical_index", "version")
+
+    def __init__(self, chunk_store: ChunkStore, lexical_index: BM25Index, version: int = 0):
+        self.chunk_store = chunk_store
+        self.lexical_index = lexical_index
+        self.version = version
+
+
+class ReadWriteLock:
+    """
+    Lock for an index that is updated in several steps (e.g. a Chroma upsert
+    followed by a delete): searches hold it shared, the update holds it
+    exclusively, so a search sees the index either before or after the whole
+    update. Waiting writers go first, so a stream of searches cannot starve
+    an update.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def reading(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
@@ -0,0 +1,230 @@
+import re
+import sys
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from fastapi_backend.helpers.chunk_store import ChunkStore
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokenizer. ``\\w`` keeps identifiers such as ``run_agent``
+    intact, which matters for API rename queries. Unlike the whitespace split
+    of LangChain's ``BM25Retriever``, punctuation and case do not make
+    ``Runner.run()`` and ``runner`` different terms.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index of a ``ChunkStore``.
+
+    Each term maps to a posting list of (chunk index, term frequency) numpy
+    arrays, so a query only touches the postings of its own terms instead of
+    scoring every chunk.
+
+    Scores match ``rank_bm25.BM25Okapi``: idf is ``log((N - df + 0.5) /
+    (df + 0.5))``, and terms in more than half of the chunks (negative idf)
+    get ``epsilon`` times the average idf over all terms instead.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self.num_docs = 0
+        self._idf_floor = None
+
+    @classmethod
+    def from_chunk_store(cls, chunk_store: ChunkStore, k1: float = 1.5, b: float = 0.75,
+                         epsilon: float = 0.25) -> "BM25Index":
+        index = cls(k1=k1, b=b, epsilon=epsilon)
+        term_docs: Dict[str, List[int]] = {}
+        term_freqs: Dict[str, List[int]] = {}
+        doc_lengths = np.zeros(chunk_store.num_slots, dtype=np.float32)
+
+        for i in chunk_store:
+            tokens = tokenize(chunk_store.text(i))
+            doc_lengths[i] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_docs.setdefault(term, []).append(i)
+                term_freqs.setdefault(term, []).append(tf)
+
+        index.postings = {
+            term: (np.asarray(docs, dtype=np.int32), np.asarray(term_freqs[term], dtype=np.float32))
+            for term, docs in term_docs.items()
+        }
+        index.doc_lengths = doc_lengths
+        index.num_docs = len(chunk_store)
+        return index
+
+    def updated(self, removed: Dict[int, str], added: Dict[int, str], num_slots: int) -> "BM25Index":
+        """
+        Return a new index with the chunks in ``removed`` dropped and the chunks
+        in ``added`` indexed (both map chunk index -> text). Only the posting
+        lists of affected terms are rebuilt; all others are shared with ``self``.
+        """
+        index = BM25Index(k1=self.k1, b=self.b, epsilon=self.epsilon)
+        index.postings = dict(self.postings)
+        index.doc_lengths = np.zeros(num_slots, dtype=np.float32)
+        index.doc_lengths[:len(self.doc_lengths)] = self.doc_lengths
+
+        removed_terms = set()
+        for i, text in removed.items():
+            removed_terms.update(tokenize(text))
+            index.doc_lengths[i] = 0
+        removed_docs = np.asarray(sorted(removed), dtype=np.int32)
+
+        added_postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        for i, text in added.items():
+            tokens = tokenize(text)
+            index.doc_lengths[i] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                docs, tfs = added_postings.setdefault(term, ([], []))
+                docs.append(i)
+                tfs.append(tf)
+
+        for term in removed_terms | added_postings.keys():
+            docs, tfs = index.postings.get(term, (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)))
+            if len(removed_docs):
+                keep = ~np.isin(docs, removed_docs)
+                docs, tfs = docs[keep], tfs[keep]
+            if term in added_postings:
+                new_docs, new_tfs = added_postings[term]
+                docs = np.concatenate([docs, np.asarray(new_docs, dtype=np.int32)])
+                tfs = np.concatenate([tfs, np.asarray(new_tfs, dtype=np.float32)])
+            if len(docs):
+                index.postings[term] = (docs, tfs)
+            else:
+                index.postings.pop(term, None)
+
+        index.num_docs = self.num_docs - len(removed) + len(added)
+        return index
+
+    def compacted(self, remap: np.ndarray, num_slots: int) -> "BM25Index":
+        """
+        Return the index renumbered with ``remap`` (old chunk index -> new
+        index, -1 for removed chunks) from ``ChunkStore.compacted``, without
+        re-tokenizing. Removed chunks have no postings left, and ``remap``
+        keeps the order of live chunks, so posting lists stay sorted.
+        """
+        index = BM25Index(k1=self.k1, b=self.b, epsilon=self.epsilon)
+        index.postings = {term: (remap[docs], tfs) for term, (docs, tfs) in self.postings.items()}
+        index.doc_lengths = np.zeros(num_slots, dtype=np.float32)
+        live = np.flatnonzero(remap >= 0)
+        index.doc_lengths[remap[live]] = self.doc_lengths[live]
+        index.num_docs = self.num_docs
+        return index
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate in-memory size of the posting lists and document lengths.
+        """
+        size = self.doc_lengths.nbytes + sys.getsizeof(self.postings)
+        for term, (docs, tfs) in self.postings.items():
+            size += sys.getsizeof(term) + docs.nbytes + tfs.nbytes
+        return size
+
+    def to_arrays(self) -> Dict[str, object]:
+        """
+        Flatten the posting lists into contiguous arrays (see ``from_arrays``).
+        """
+        terms = list(self.postings)
+        lengths = [len(self.postings[term][0]) for term in terms]
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=term_offsets[1:])
+        empty_docs, empty_tfs = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        return {
+            "terms": terms,
+            "term_offsets": term_offsets,
+            "docs": np.concatenate([self.postings[t][0] for t in terms]) if terms else empty_docs,
+            "tfs": np.concatenate([self.postings[t][1] for t in terms]) if terms else empty_tfs,
+            "doc_lengths": self.doc_lengths,
+            "params": {"k1": self.k1, "b": self.b, "epsilon": self.epsilon, "num_docs": self.num_docs},
+        }
+
+    @classmethod
+    def from_arrays(cls, terms, term_offsets, docs, tfs, doc_lengths, params) -> "BM25Index":
+        """
+        Rebuild an index from ``to_arrays`` output. Posting lists are views into
+        ``docs``/``tfs``, so memory-mapped arrays are not copied.
+        """
+        index = cls(k1=params["k1"], b=params["b"], epsilon=params.get("epsilon", 0.25))
+        index.postings = {
+            term: (docs[term_offsets[i]:term_offsets[i + 1]], tfs[term_offsets[i]:term_offsets[i + 1]])
+            for i, term in enumerate(terms)
+        }
+        index.doc_lengths = doc_lengths
+        index.num_docs = params["num_docs"]
+        return index
+
+    @property
+    def idf_floor(self) -> float:
+        """
+        Idf given to terms whose Okapi idf is negative: ``epsilon`` times the
+        average idf over all terms. Computed once, since an index is never
+        modified after it is built.
+        """
+        if self._idf_floor is None:
+            dfs = np.fromiter((len(docs) for docs, _ in self.postings.values()), dtype=np.float64,
+                              count=len(self.postings))
+            idfs = np.log(self.num_docs - dfs + 0.5) - np.log(dfs + 0.5)
+            self._idf_floor = self.epsilon * float(idfs.mean()) if len(idfs) else 0.0
+        return self._idf_floor
+
+    def idf(self, term: str) -> float:
+        postings = self.postings.get(term)
+        if postings is None:
+            return 0.0
+        df = len(postings[0])
+        idf = float(np.log(self.num_docs - df + 0.5) - np.log(df + 0.5))
+        return idf if idf >= 0 else self.idf_floor
+
+    def scores(self, query: str, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        BM25 score of every chunk slot for ``query``. With a boolean ``mask``
+        over chunk slots, posting lists are restricted to the selected chunks
+        and all others score 0.
+
+        Corpus statistics (idf, average length) stay those of the whole index,
+        so a chunk scores the same with or without a filter.
+        """
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        if not self.num_docs:
+            return scores
+        avg_length = float(self.doc_lengths.sum()) / self.num_docs or 1.0
+
+        for term in tokenize(query):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            docs, tfs = postings
+            if mask is not None:
+                keep = mask[docs]
+                docs, tfs = docs[keep], tfs[keep]
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[docs] / avg_length)
+            scores[docs] += self.idf(term) * tfs * (self.k1 + 1.0) / (tfs + norm)
+        return scores
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Return up to ``k`` (chunk index, score) pairs with a positive score,
+        best first, optionally only among the chunks selected by ``mask``.
+        """
+        if k <= 0:
+            return []
+        scores = self.scores(query, mask)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(i), float(scores[i])) for i in candidates]
@@ -1,6 +1,6 @@
+from typing import Any, Dict, List
+
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 
 class LLMManager:
@@ -8,6 +8,7 @@ class LLMManager:
     Manages initialization and interaction with Gemini and embedding models.
 
     Provides methods to invoke the LLM with prompts and to generate embeddings for text.
+    Provider packages are imported lazily, so only the configured provider is loaded.
     """
     def __init__(self, provider: str="google", api_key: str=None, llm_model_name="gemini-2.0-flash-exp", embedding_model_name="nomic-embed-text"):
         
@@ -15,6 +16,8 @@ class LLMManager:
         verbose = True
 
         if provider == "google":
+            from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+
             self.llm_model = ChatGoogleGenerativeAI(
                 model=llm_model_name,
                 google_api_key=api_key,
@@ -24,6 +27,8 @@ class LLMManager:
             self.embeddings = GoogleGenerativeAIEmbeddings(model=embedding_model_name, 
                                           google_api_key=api_key)
         elif provider == "openai":
+            from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
             self.llm_model = ChatOpenAI(
                 model=llm_model_name,
                 api_key=api_key,
@@ -44,4 +49,26 @@ class LLMManager:
             # prompt: ChatPromptTemplate
             messages = prompt.format_messages(**kwargs)
             response = self.llm_model.invoke(messages)
-        return response.content
\ No newline at end of file
+        return response.content
+
+    def batch(self, prompt: ChatPromptTemplate, inputs: List[Dict[str, Any]], max_concurrency: int = 8) -> List[Any]:
+        """
+        Run ``prompt`` for every input dict concurrently. Failed calls are
+        returned as exceptions in place of their response text.
+        """
+        messages = [prompt.format_messages(**kwargs) for kwargs in inputs]
+        responses = self.llm_model.batch(messages, config={"max_concurrency": max_concurrency}, return_exceptions=True)
+        return [response if isinstance(response, Exception) else response.content for response in responses]
+
+
+def embed_queries(embeddings, queries: List[str]) -> List[List[float]]:
+    """
+    Embed several queries with one batched embeddings call.
+
+    ``embed_documents`` is the batched endpoint, but Google models embed
+    documents with the RETRIEVAL_DOCUMENT task type, so the query task type is
+    requested explicitly for them.
+    """
+    if type(embeddings).__name__ == "GoogleGenerativeAIEmbeddings":
+        return embeddings.embed_documents(queries, task_type="RETRIEVAL_QUERY")
+    return embeddings.embed_documents(queries)
@@ -0,0 +1,55 @@
+import fnmatch
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class MetadataFilter:
+    """
+    Page-level filter that narrows a search to part of the corpus.
+
+    Args:
+        url_prefix (str, optional): Keep pages whose ``source_url`` starts with it.
+        file_glob (str, optional): Keep pages whose file path (or file name)
+            matches this glob, e.g. ``*/guides/*`` or ``handoffs*.json``.
+        title (str, optional): Keep pages whose title contains it (case-insensitive).
+
+    Unset criteria match every page; set ones must all match.
+    """
+
+    def __init__(self, url_prefix: str = None, file_glob: str = None, title: str = None):
+        self.url_prefix = url_prefix or None
+        self.file_glob = file_glob or None
+        self.title = title.casefold() if title else None
+
+    def __bool__(self) -> bool:
+        return bool(self.url_prefix or self.file_glob or self.title)
+
+    def matches(self, title: str, source_url: str, file_path: str) -> bool:
+        if self.url_prefix and not (source_url or "").startswith(self.url_prefix):
+            return False
+        if self.file_glob and not (fnmatch.fnmatchcase(file_path or "", self.file_glob)
+                                   or fnmatch.fnmatchcase(os.path.basename(file_path or ""), self.file_glob)):
+            return False
+        if self.title and self.title not in (title or "").casefold():
+            return False
+        return True
+
+    def matching_files(self, pages: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        File paths of the pages (metadata dicts) that pass the filter.
+        """
+        return sorted({page.get("file_path", "") for page in pages
+                       if self.matches(page.get("title", ""), page.get("source_url", ""), page.get("file_path", ""))})
+
+    @staticmethod
+    def where(file_paths: List[str]) -> Dict[str, Any]:
+        """
+        Chroma-style ``where`` clause restricting a vector search to ``file_paths``.
+        """
+        return {"file_path": {"$in": list(file_paths)}}
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        return {"url_prefix": self.url_prefix, "file_glob": self.file_glob, "title": self.title}
+
+    def cache_key(self) -> str:
+        return "\x1f".join(value or "" for value in self.to_dict().values())
@@ -0,0 +1,991 @@
+import os
+import re
+import sys
+import json
+import shutil
+import threading
+from contextlib import nullcontext
+from uuid import uuid4
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from fastapi_backend.helpers.chunk_store import ChunkStore
+from fastapi_backend.helpers.file_lock import file_lock
+
+
+# Metadata keys that are unique per chunk. Every other key is page-level
+# metadata and is interned in the sidecar instead of being repeated per row.
+ROW_METADATA_KEYS = ("chunk_id",)
+
+EMBEDDING_DTYPES = ("float32", "float16", "int8")
+
+# Rows upcast per step on the quantized path. Small blocks keep the float32
+# scratch buffer cache resident, which matters more than the per-block overhead.
+SCORING_BLOCK_ROWS = 512
+
+# name of a version directory after the "<collection_name>." prefix
+VERSION_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def quantize(matrix: np.ndarray, embedding_dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert a float32 embedding matrix to the storage dtype.
+
+    int8 uses symmetric per-dimension scalar quantization: dimension ``d`` is
+    stored as ``round(v[d] / scale[d])`` with ``scale[d] = max|v[:, d]| / 127``.
+
+    Returns:
+        Tuple of (quantized_matrix, scale). ``scale`` is None for float dtypes.
+    """
+    if embedding_dtype == "float32":
+        return matrix, None
+    if embedding_dtype == "float16":
+        return matrix.astype(np.float16), None
+    if embedding_dtype == "int8":
+        scale = np.abs(matrix).max(axis=0) / 127.0 if len(matrix) else np.ones(matrix.shape[1], dtype=np.float32)
+        scale = np.where(scale == 0, 1.0, scale).astype(np.float32)
+        return np.clip(np.rint(matrix / scale), -127, 127).astype(np.int8), scale
+    raise ValueError(f"Unsupported embedding dtype: {embedding_dtype}")
+
+
+class _StoreData:
+    """
+    Immutable view of the store contents. Writers build a new instance and swap
+    it in with a single assignment, so readers never see a half-applied update.
+
+    Texts and metadata are either held by the store itself (``texts`` and
+    ``row_metadata``) or, when a ``ChunkStore`` is attached, resolved through
+    it: row ``r`` is chunk ``chunk_rows[r]`` and ``texts``/``row_metadata``
+    are None.
+    """
+    __slots__ = ("matrix", "quantized", "scale", "ids", "texts", "metadata_table", "metadata_index", "row_metadata",
+                 "id_to_row", "chunk_store", "chunk_rows")
+
+    def __init__(self, matrix, ids, texts, metadata_table, metadata_index, row_metadata, quantized=None, scale=None,
+                 chunk_store: ChunkStore = None, chunk_rows: np.ndarray = None):
+        self.matrix = matrix
+        # scoring matrix in the storage dtype; the float32 matrix itself when unquantized
+        self.quantized = matrix if quantized is None else quantized
+        self.scale = scale
+        self.ids = ids
+        self.texts = texts
+        self.metadata_table = metadata_table
+        self.metadata_index = metadata_index
+        self.row_metadata = row_metadata
+        self.id_to_row = {doc_id: row for row, doc_id in enumerate(ids)}
+        self.chunk_store = chunk_store
+        self.chunk_rows = chunk_rows
+
+
+def compact_metadata(metadata_table: List[dict], metadata_index: np.ndarray) -> Tuple[List[dict], np.ndarray]:
+    """
+    Drop interned metadata entries that no row references any more (e.g. the
+    pages of deleted rows) and renumber ``metadata_index`` accordingly.
+    """
+    if not len(metadata_index):
+        return [], np.zeros(0, dtype=np.int32)
+    used, inverse = np.unique(metadata_index, return_inverse=True)
+    if len(used) == len(metadata_table):
+        return metadata_table, metadata_index
+    return [metadata_table[i] for i in used], inverse.astype(np.int32)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact vector search over a flat matrix of L2-normalized embeddings.
+
+    Every write is published as a new version directory
+    ``<collection_name>.<version>/`` holding the matrix (``vectors.npy``) and a
+    compact sidecar with ids, texts and interned metadata (``store.json``). The
+    ``<collection_name>.version`` pointer file is then switched to it with a
+    single rename. The matrix is opened with ``mmap_mode="r"``, so several
+    worker processes share one copy of the vectors through the OS page cache.
+    Writes hold a cross-process lock and start from the latest published
+    version; ``refresh`` picks up versions published by other processes.
+    Queries are answered with a single matrix-vector product followed by an
+    ``argpartition`` top-k.
+
+    With ``embedding_dtype`` set to ``"float16"`` or ``"int8"``, queries scan a
+    quantized copy (``vectors.<dtype>.npy``) that is 2x or 4x smaller
+    than the float32 matrix. The float32 file stays on disk, memory-mapped, and
+    is only touched when ``rescore_factor > 0``: the top ``k * rescore_factor``
+    quantized candidates are then re-scored exactly.
+
+    A pipeline that already keeps the chunk texts in a ``ChunkStore`` can
+    ``attach_chunk_store`` it: the store then drops its own copies of texts and
+    per-row metadata and resolves them through the chunk store by row index.
+
+    The constructor and ``get`` mirror ``langchain_community.vectorstores.Chroma``
+    so the pipelines can switch backends without further changes.
+    """
+
+    def __init__(self,
+                collection_name: str = "default_collection",
+                embedding_function: Embeddings = None,
+                persist_directory: str = None,
+                embedding_dtype: str = "float32",
+                rescore_factor: int = 0,
+                ):
+        if embedding_dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {embedding_dtype}. Expected one of {EMBEDDING_DTYPES}")
+        self.collection_name = collection_name
+        self.embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self.embedding_dtype = embedding_dtype
+        self.rescore_factor = rescore_factor
+        self._data = _StoreData(np.zeros((0, 0), dtype=np.float32), [], [], [], np.zeros(0, dtype=np.int32), [])
+        # loaded version (None: nothing persisted yet, or the unversioned layout) and the pointer's stat then
+        self.version = None
+        self._pointer_stat = None
+        self._reload_lock = threading.RLock()
+        self._thread_lock = threading.RLock()
+
+        if persist_directory and self.exists(persist_directory, collection_name):
+            self._data, self.version, self._pointer_stat = self._load()
+            if embedding_dtype != "float32" and not isinstance(self._data.quantized, np.memmap):
+                # collection was written with another dtype; quantize once and persist
+                self._write(lambda data: None if isinstance(data.quantized, np.memmap) else data)
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.embedding_function
+
+    def __len__(self) -> int:
+        return len(self._data.ids)
+
+    @property
+    def chunk_store(self) -> Optional[ChunkStore]:
+        """
+        The attached ``ChunkStore`` texts and metadata are resolved through, if any.
+        """
+        return self._data.chunk_store
+
+    @property
+    def scoring_nbytes(self) -> int:
+        """
+        Size of the matrix scanned on every query.
+        """
+        return int(self._data.quantized.nbytes)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate resident size: the scoring matrix (plus the float32 matrix
+        when re-scoring), ids and texts. Texts resolved through an attached
+        ``ChunkStore`` are not counted here.
+        """
+        data = self._data
+        size = data.quantized.nbytes
+        if self.rescore_factor > 0 and data.quantized is not data.matrix:
+            size += data.matrix.nbytes
+        if data.chunk_store is not None:
+            size += data.chunk_rows.nbytes
+        else:
+            size += sum(sys.getsizeof(doc_id) for doc_id in data.ids)
+            size += sum(sys.getsizeof(text) for text in data.texts)
+        return int(size)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pointer_path(persist_directory: str, collection_name: str) -> str:
+        return os.path.join(persist_directory, f"{collection_name}.version")
+
+    @staticmethod
+    def _paths(persist_directory: str, collection_name: str, version: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Matrix and sidecar paths of ``version``, or of the unversioned layout
+        written before versions were introduced (still readable).
+        """
+        if version is None:
+            return (os.path.join(persist_directory, f"{collection_name}.npy"),
+                    os.path.join(persist_directory, f"{collection_name}.json"))
+        version_dir = os.path.join(persist_directory, f"{collection_name}.{version}")
+        return os.path.join(version_dir, "vectors.npy"), os.path.join(version_dir, "store.json")
+
+    def _quantized_path(self, version: Optional[str]) -> str:
+        if version is None:
+            return os.path.join(self.persist_directory, f"{self.collection_name}.{self.embedding_dtype}.npy")
+        return os.path.join(self.persist_directory, f"{self.collection_name}.{version}", f"vectors.{self.embedding_dtype}.npy")
+
+    @classmethod
+    def exists(cls, persist_directory: str, collection_name: str = "default_collection") -> bool:
+        """
+        Check whether a persisted collection is present in ``persist_directory``.
+        """
+        if os.path.exists(cls._pointer_path(persist_directory, collection_name)):
+            return True
+        matrix_path, sidecar_path = cls._paths(persist_directory, collection_name)
+        return os.path.exists(matrix_path) and os.path.exists(sidecar_path)
+
+    def _stat_pointer(self):
+        try:
+            stat = os.stat(self._pointer_path(self.persist_directory, self.collection_name))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read_version(self) -> Optional[str]:
+        try:
+            with open(self._pointer_path(self.persist_directory, self.collection_name), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> Tuple[_StoreData, Optional[str], Any]:
+        """
+        Load the version the pointer file names.
+
+        Returns:
+            Tuple of (data, version, pointer_stat). ``version`` is None for the
+            unversioned layout.
+        """
+        for attempt in range(3):
+            # stat before reading: a pointer swap in between is picked up by the next refresh
+            pointer_stat = self._stat_pointer()
+            version = self._read_version()
+            try:
+                return self._load_version(version), version, pointer_stat
+            except FileNotFoundError:
+                # a writer removed the version while we were opening it; follow the pointer again
+                if attempt == 2:
+                    raise
+
+    def _load_version(self, version: Optional[str]) -> _StoreData:
+        matrix_path, sidecar_path = self._paths(self.persist_directory, self.collection_name, version)
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode="r")
+
+        quantized, scale = None, None
+        if self.embedding_dtype != "float32":
+            quantization = sidecar.get("quantization", {}).get(self.embedding_dtype)
+            if quantization is not None and os.path.exists(self._quantized_path(version)):
+                quantized = np.load(self._quantized_path(version), mmap_mode="r")
+                scale = np.asarray(quantization["scale"], dtype=np.float32) if quantization["scale"] else None
+            else:
+                quantized, scale = quantize(np.asarray(matrix), self.embedding_dtype)
+
+        return _StoreData(
+            matrix,
+            sidecar["ids"],
+            sidecar["texts"],
+            sidecar["metadata_table"],
+            np.asarray(sidecar["metadata_index"], dtype=np.int32),
+            sidecar["row_metadata"],
+            quantized=quantized,
+            scale=scale,
+        )
+
+    def is_stale(self) -> bool:
+        """
+        Whether another process published a newer version since this one was
+        loaded. Costs one ``stat`` of the pointer file.
+        """
+        return bool(self.persist_directory) and self._stat_pointer() != self._pointer_stat
+
+    def refresh(self) -> bool:
+        """
+        Reload the store if another process published a newer version.
+
+        Returns:
+            bool: True if a newer version was loaded. Its texts and metadata
+            are the store's own again; an attached ``ChunkStore`` has to be
+            rebuilt and re-attached by the caller.
+        """
+        if not self.is_stale():
+            return False
+        with self._reload_lock:
+            if not self.is_stale():
+                return False
+            data, version, pointer_stat = self._load()
+            if version == self.version:
+                self._pointer_stat = pointer_stat
+                return False
+            self._data, self.version, self._pointer_stat = data, version, pointer_stat
+        return True
+
+    def write_lock(self):
+        """
+        Lock held while the store is updated: an ``flock`` shared by every
+        process using ``persist_directory`` (see ``file_lock``), or a thread
+        lock for a store that is not persisted. Re-entrant, so a pipeline can
+        hold it across a whole update that ends in ``replace``.
+        """
+        if not self.persist_directory:
+            return self._thread_lock
+        os.makedirs(self.persist_directory, exist_ok=True)
+        return file_lock(os.path.join(self.persist_directory, f"{self.collection_name}.lock"))
+
+    def _write(self, update: Callable[[_StoreData], Optional[_StoreData]]):
+        """
+        Apply ``update`` to the latest published contents and publish the
+        result. ``update`` returns None if there is nothing to write.
+        """
+        with self.write_lock():
+            # build on what other workers published, never on a stale copy
+            self.refresh()
+            data = update(self._data)
+            if data is None:
+                return
+            with self._reload_lock:
+                self._data = self._persist(data)
+
+    def _persist(self, data: _StoreData) -> _StoreData:
+        """
+        Write ``data`` as a new version directory and switch the pointer file
+        to it with a single rename, so other processes see either the old or
+        the new version. Returns a view of ``data`` backed by the
+        memory-mapped files. Must be called under ``write_lock``.
+        """
+        if self.embedding_dtype != "float32" and data.quantized is data.matrix:
+            data.quantized, data.scale = quantize(np.asarray(data.matrix), self.embedding_dtype)
+
+        if not self.persist_directory:
+            return data
+
+        version = uuid4().hex
+        matrix_path, sidecar_path = self._paths(self.persist_directory, self.collection_name, version)
+        os.makedirs(os.path.dirname(matrix_path))
+
+        with open(matrix_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(data.matrix))
+        quantized = None
+        if self.embedding_dtype != "float32":
+            with open(self._quantized_path(version), "wb") as f:
+                np.save(f, np.ascontiguousarray(data.quantized))
+            quantized = np.load(self._quantized_path(version), mmap_mode="r")
+        with open(sidecar_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "ids": data.ids,
+                "texts": [self._text(data, row) for row in range(len(data.ids))] if data.chunk_store is not None else data.texts,
+                "metadata_table": data.metadata_table,
+                "metadata_index": data.metadata_index.tolist(),
+                "row_metadata": [self._row_metadata(data, row) for row in range(len(data.ids))],
+                "quantization": {
+                    self.embedding_dtype: {"scale": data.scale.tolist() if data.scale is not None else None},
+                } if self.embedding_dtype != "float32" else {},
+            }, f, ensure_ascii=False)
+
+        pointer_path = self._pointer_path(self.persist_directory, self.collection_name)
+        tmp_pointer_path = f"{pointer_path}.{uuid4().hex}.tmp"
+        with open(tmp_pointer_path, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp_pointer_path, pointer_path)
+
+        previous = self.version
+        self.version, self._pointer_stat = version, self._stat_pointer()
+        self._remove_old_versions(keep={version, previous})
+
+        return _StoreData(
+            np.load(matrix_path, mmap_mode="r"),
+            data.ids,
+            data.texts,
+            data.metadata_table,
+            data.metadata_index,
+            data.row_metadata,
+            quantized=quantized,
+            scale=data.scale,
+            chunk_store=data.chunk_store,
+            chunk_rows=data.chunk_rows,
+        )
+
+    def _remove_old_versions(self, keep: set):
+        """
+        Delete version directories other than ``keep`` (the previous version is
+        kept for processes still opening it) and the unversioned files once
+        they have been migrated. Processes that still map deleted files keep
+        reading them until they refresh.
+        """
+        prefix = f"{self.collection_name}."
+        for name in os.listdir(self.persist_directory):
+            version = name[len(prefix):]
+            if name.startswith(prefix) and VERSION_PATTERN.fullmatch(version) and version not in keep:
+                shutil.rmtree(os.path.join(self.persist_directory, name), ignore_errors=True)
+        if None in keep:
+            legacy_paths = list(self._paths(self.persist_directory, self.collection_name))
+            legacy_paths += [os.path.join(self.persist_directory, f"{self.collection_name}.{dtype}.npy")
+                             for dtype in EMBEDDING_DTYPES if dtype != "float32"]
+            for path in legacy_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add_texts(self,
+                texts: Iterable[str],
+                metadatas: Optional[List[dict]] = None,
+                *,
+                ids: Optional[List[str]] = None,
+                **kwargs: Any,
+                ) -> List[str]:
+        if self.embedding_function is None:
+            raise ValueError("Embedding model is not set")
+
+        texts = list(texts)
+        if not texts:
+            return []
+        embeddings = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(texts, embeddings, metadatas=metadatas, ids=ids)
+
+    def add_embeddings(self,
+                    texts: List[str],
+                    embeddings: List[List[float]],
+                    metadatas: Optional[List[dict]] = None,
+                    ids: Optional[List[str]] = None,
+                    ) -> List[str]:
+        """
+        Add pre-computed embeddings to the store. Existing rows with the same id
+        are replaced.
+        """
+        ids = ids or [str(uuid4()) for _ in texts]
+        self.replace_embeddings([], texts, embeddings, metadatas=metadatas, ids=ids)
+        return list(ids)
+
+    def replace(self,
+                delete_ids: List[str],
+                texts: List[str],
+                metadatas: Optional[List[dict]] = None,
+                ids: Optional[List[str]] = None,
+                chunk_store: ChunkStore = None,
+                ) -> List[str]:
+        """
+        Delete ``delete_ids`` and add (or replace) the given texts in one
+        update: the new texts are embedded first, then readers switch from the
+        old rows to the new ones with a single swap and the store is persisted
+        once.
+
+        Args:
+            delete_ids (List[str]): Ids of the rows to remove.
+            texts (List[str]): Texts to embed and add.
+            metadatas (List[dict], optional): Metadata of the added texts.
+            ids (List[str], optional): Ids of the added texts (generated if omitted).
+            chunk_store (ChunkStore, optional): Chunk store to resolve texts and
+                metadata through from now on; it must contain every remaining
+                and added row.
+
+        Returns:
+            List[str]: The ids of the added texts.
+        """
+        texts = list(texts)
+        ids = ids or [str(uuid4()) for _ in texts]
+        if texts and self.embedding_function is None:
+            raise ValueError("Embedding model is not set")
+        embeddings = self.embedding_function.embed_documents(texts) if texts else []
+        self.replace_embeddings(delete_ids, texts, embeddings, metadatas=metadatas, ids=ids, chunk_store=chunk_store)
+        return list(ids)
+
+    def replace_embeddings(self,
+                        delete_ids: List[str],
+                        texts: List[str],
+                        embeddings: List[List[float]],
+                        metadatas: Optional[List[dict]] = None,
+                        ids: Optional[List[str]] = None,
+                        chunk_store: ChunkStore = None,
+                        ):
+        """
+        ``replace`` with pre-computed embeddings.
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        ids = list(ids or [str(uuid4()) for _ in texts])
+        if not (len(texts) == len(embeddings) == len(metadatas) == len(ids)):
+            raise ValueError("texts, embeddings, metadatas and ids must have the same length")
+
+        self._write(lambda data: self._replaced(data, delete_ids, texts, embeddings, metadatas, ids, chunk_store))
+
+    def _replaced(self, data: _StoreData, delete_ids, texts, embeddings, metadatas, ids, chunk_store) -> Optional[_StoreData]:
+        removed = (set(delete_ids) | set(ids)) & data.id_to_row.keys()
+        if not removed and not ids and chunk_store is None:
+            return None
+        if removed:
+            data = self._without_rows([data.id_to_row[doc_id] for doc_id in removed], data)
+
+        if ids:
+            vectors = self._normalize(embeddings)
+            matrix = np.concatenate([np.asarray(data.matrix), vectors]) if len(data.ids) else vectors
+        else:
+            matrix = data.matrix
+
+        if chunk_store is not None:
+            return self._chunk_store_data(matrix, data.ids + ids, chunk_store)
+        if data.chunk_store is not None:
+            if not ids:
+                return _StoreData(matrix, data.ids, None, data.metadata_table, data.metadata_index, None,
+                                  chunk_store=data.chunk_store, chunk_rows=data.chunk_rows)
+            # rows the attached chunk store does not know about: keep copies from now on
+            data = self._detached(data)
+
+        metadata_table = list(data.metadata_table)
+        table_lookup = {json.dumps(m, sort_keys=True): i for i, m in enumerate(metadata_table)}
+        new_index = []
+        new_row_metadata = []
+        for metadata in metadatas:
+            shared = {k: v for k, v in metadata.items() if k not in ROW_METADATA_KEYS}
+            row = {k: v for k, v in metadata.items() if k in ROW_METADATA_KEYS}
+            key = json.dumps(shared, sort_keys=True)
+            if key not in table_lookup:
+                table_lookup[key] = len(metadata_table)
+                metadata_table.append(shared)
+            new_index.append(table_lookup[key])
+            new_row_metadata.append(row)
+
+        return _StoreData(
+            matrix,
+            data.ids + ids,
+            data.texts + list(texts),
+            metadata_table,
+            np.concatenate([data.metadata_index, np.asarray(new_index, dtype=np.int32)]),
+            data.row_metadata + new_row_metadata,
+        )
+
+    @staticmethod
+    def _chunk_store_data(matrix, ids: List[str], chunk_store: ChunkStore, quantized=None, scale=None) -> _StoreData:
+        """
+        Store contents whose texts and metadata are resolved through ``chunk_store``.
+        """
+        chunk_rows = np.empty(len(ids), dtype=np.int64)
+        for row, doc_id in enumerate(ids):
+            index = chunk_store.index_of(doc_id)
+            if index is None:
+                raise ValueError(f"Row {doc_id} is not in the chunk store")
+            chunk_rows[row] = index
+        chunks = chunk_store.chunks
+        pages = np.fromiter((chunks[index].page for index in chunk_rows), dtype=np.int32, count=len(chunk_rows))
+        used, metadata_index = np.unique(pages, return_inverse=True)
+        return _StoreData(
+            matrix,
+            # the chunk store's id strings, not copies
+            [chunks[index].chunk_id for index in chunk_rows],
+            None,
+            [chunk_store.page_metadata(int(page)) for page in used],
+            metadata_index.astype(np.int32),
+            None,
+            quantized=quantized,
+            scale=scale,
+            chunk_store=chunk_store,
+            chunk_rows=chunk_rows,
+        )
+
+    @classmethod
+    def _detached(cls, data: _StoreData) -> _StoreData:
+        """
+        Copy of ``data`` that holds its own texts and per-row metadata.
+        """
+        return _StoreData(
+            data.matrix,
+            data.ids,
+            [cls._text(data, row) for row in range(len(data.ids))],
+            data.metadata_table,
+            data.metadata_index,
+            [cls._row_metadata(data, row) for row in range(len(data.ids))],
+        )
+
+    def attach_chunk_store(self, chunk_store: ChunkStore):
+        """
+        Resolve texts and metadata through ``chunk_store`` (which must contain
+        every row) and drop the store's own copies. Nothing is written to disk.
+        """
+        with self._reload_lock:
+            data = self._data
+            self._data = self._chunk_store_data(data.matrix, data.ids, chunk_store,
+                                                quantized=data.quantized if data.quantized is not data.matrix else None,
+                                                scale=data.scale)
+
+    @staticmethod
+    def _without_rows(rows: List[int], data: _StoreData) -> _StoreData:
+        keep = np.ones(len(data.ids), dtype=bool)
+        keep[rows] = False
+        kept_rows = np.flatnonzero(keep)
+        # interned metadata of pages that lost all their rows is dropped
+        metadata_table, metadata_index = compact_metadata(data.metadata_table, data.metadata_index[kept_rows])
+        return _StoreData(
+            np.asarray(data.matrix)[kept_rows],
+            [data.ids[i] for i in kept_rows],
+            [data.texts[i] for i in kept_rows] if data.texts is not None else None,
+            metadata_table,
+            metadata_index,
+            [data.row_metadata[i] for i in kept_rows] if data.row_metadata is not None else None,
+            chunk_store=data.chunk_store,
+            chunk_rows=data.chunk_rows[kept_rows] if data.chunk_rows is not None else None,
+        )
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        deleted = []
+
+        def update(data: _StoreData) -> Optional[_StoreData]:
+            rows = [data.id_to_row[doc_id] for doc_id in ids if doc_id in data.id_to_row]
+            deleted.extend(rows)
+            return self._without_rows(rows, data) if rows else None
+
+        self._write(update)
+        return bool(deleted)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _text(data: _StoreData, row: int) -> str:
+        if data.chunk_store is not None:
+            return data.chunk_store.text(int(data.chunk_rows[row]))
+        return data.texts[row]
+
+    @staticmethod
+    def _row_metadata(data: _StoreData, row: int) -> Dict[str, Any]:
+        if data.chunk_store is not None:
+            return {"chunk_id": data.ids[row]}
+        return data.row_metadata[row]
+
+    @staticmethod
+    def _metadata(data: _StoreData, row: int) -> Dict[str, Any]:
+        if data.chunk_store is not None:
+            return data.chunk_store.metadata(int(data.chunk_rows[row]))
+        metadata = dict(data.metadata_table[data.metadata_index[row]])
+        metadata.update(data.row_metadata[row])
+        return metadata
+
+    def _document(self, data: _StoreData, row: int) -> Document:
+        return Document(
+            page_content=self._text(data, row),
+            metadata=self._metadata(data, row),
+            id=data.ids[row],
+        )
+
+    @staticmethod
+    def _matches(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+        """
+        Evaluate a Chroma-style ``where`` clause (``$and``, ``$or``, ``$eq``,
+        ``$ne``, ``$in``, ``$nin``) against a metadata dict.
+        """
+        for key, condition in where.items():
+            if key == "$and":
+                if not all(NumpyVectorStore._matches(metadata, clause) for clause in condition):
+                    return False
+            elif key == "$or":
+                if not any(NumpyVectorStore._matches(metadata, clause) for clause in condition):
+                    return False
+            else:
+                value = metadata.get(key)
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for operator, operand in condition.items():
+                    if operator == "$eq" and value != operand:
+                        return False
+                    elif operator == "$ne" and value == operand:
+                        return False
+                    elif operator == "$in" and value not in operand:
+                        return False
+                    elif operator == "$nin" and value in operand:
+                        return False
+                    elif operator not in ("$eq", "$ne", "$in", "$nin"):
+                        raise ValueError(f"Unsupported where operator: {operator}")
+        return True
+
+    def _filter_rows(self, data: _StoreData, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        if not where:
+            return np.arange(len(data.ids))
+        # evaluate the page-level part once per interned metadata entry
+        row_keys = [k for k in where if k in ROW_METADATA_KEYS]
+        if row_keys:
+            return np.asarray([row for row in range(len(data.ids))
+                               if self._matches(self._metadata(data, row), where)], dtype=np.int64)
+        table_mask = np.asarray([self._matches(m, where) for m in data.metadata_table], dtype=bool)
+        if not len(table_mask):
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(table_mask[data.metadata_index])
+
+    def get(self,
+            ids: Optional[List[str]] = None,
+            where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            include: Optional[List[str]] = None,
+            ) -> Dict[str, Any]:
+        """
+        Return stored rows in the same shape as ``Chroma.get``.
+        """
+        data = self._data
+        include = include or ["documents", "metadatas"]
+
+        if ids is not None:
+            if isinstance(ids, str):
+                ids = [ids]
+            rows = [data.id_to_row[doc_id] for doc_id in ids if doc_id in data.id_to_row]
+            if where:
+                rows = [row for row in rows if self._matches(self._metadata(data, row), where)]
+        else:
+            rows = self._filter_rows(data, where).tolist()
+
+        rows = rows[offset or 0:]
+        if limit is not None:
+            rows = rows[:limit]
+
+        result = {
+            "ids": [data.ids[row] for row in rows],
+            "documents": None,
+            "metadatas": None,
+            "embeddings": None,
+        }
+        if "documents" in include:
+            result["documents"] = [self._text(data, row) for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadata(data, row) for row in rows]
+        if "embeddings" in include:
+            result["embeddings"] = np.asarray(data.matrix[rows])
+        return result
+
+    def get_by_ids(self, ids, /) -> List[Document]:
+        data = self._data
+        return [self._document(data, data.id_to_row[doc_id]) for doc_id in ids if doc_id in data.id_to_row]
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Indices of the ``k`` highest scores along axis 0, best first.
+        """
+        n = scores.shape[0]
+        if k >= n:
+            top = np.argsort(-scores, axis=0, kind="stable")
+        else:
+            top = np.argpartition(-scores, k - 1, axis=0)[:k]
+            order = np.argsort(-np.take_along_axis(scores, top, axis=0), axis=0, kind="stable")
+            top = np.take_along_axis(top, order, axis=0)
+        return top
+
+    def similarity_search_by_vectors(self,
+                                    embeddings: List[List[float]],
+                                    k: int = 4,
+                                    filter: Optional[Dict[str, Any]] = None,
+                                    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Score a batch of query embeddings with one matrix product.
+
+        Returns:
+            One list of ``(Document, cosine_similarity)`` per query, best first.
+        """
+        data = self._data
+        queries = self._normalize(embeddings)
+        if not len(data.ids) or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        rows = None
+        if filter:
+            rows = self._filter_rows(data, filter)
+            if not len(rows):
+                return [[] for _ in range(len(queries))]
+
+        scores = self._score(data, queries, rows)
+        rescore = self.embedding_dtype != "float32" and self.rescore_factor > 0
+        top = self._top_k(scores, k * self.rescore_factor if rescore else k)
+
+        results = []
+        for q in range(queries.shape[0]):
+            candidates = top[:, q]
+            candidate_scores = scores[candidates, q]
+            if rescore:
+                candidate_rows = rows[candidates] if rows is not None else candidates
+                # exact float32 scores for the short list only; sorted rows keep mmap reads sequential
+                order = np.argsort(candidate_rows)
+                candidates = candidates[order]
+                candidate_scores = np.asarray(data.matrix[candidate_rows[order]]) @ queries[q]
+                best = self._top_k(candidate_scores, k)
+                candidates, candidate_scores = candidates[best], candidate_scores[best]
+
+            hits = []
+            for idx, score in zip(candidates, candidate_scores):
+                row = int(rows[idx]) if rows is not None else int(idx)
+                hits.append((self._document(data, row), float(score)))
+            results.append(hits)
+        return results
+
+    @staticmethod
+    def _score(data: _StoreData, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similarity of every (optionally restricted) row to every query, shape
+        ``(num_rows, num_queries)``. Quantized matrices are upcast block by block.
+        """
+        matrix = data.quantized
+        if matrix.dtype == np.float32:
+            return (matrix if rows is None else matrix[rows]) @ queries.T
+
+        # fold the int8 per-dimension scale into the queries instead of the matrix
+        scaled_queries = (queries * data.scale if data.scale is not None else queries).T
+        num_rows = len(rows) if rows is not None else matrix.shape[0]
+        scores = np.empty((num_rows, queries.shape[0]), dtype=np.float32)
+        buffer = np.empty((min(SCORING_BLOCK_ROWS, num_rows), matrix.shape[1]), dtype=np.float32)
+        for start in range(0, num_rows, SCORING_BLOCK_ROWS):
+            end = min(start + SCORING_BLOCK_ROWS, num_rows)
+            block = buffer[:end - start]
+            np.copyto(block, matrix[start:end] if rows is None else matrix[rows[start:end]], casting="unsafe")
+            np.matmul(block, scaled_queries, out=scores[start:end])
+        return scores
+
+    def similarity_search_by_vector_with_relevance_scores(self,
+                                                        embedding: List[float],
+                                                        k: int = 4,
+                                                        filter: Optional[Dict[str, Any]] = None,
+                                                        **kwargs: Any,
+                                                        ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vectors([embedding], k=k, filter=filter)[0]
+
+    def similarity_search_by_vector(self,
+                                    embedding: List[float],
+                                    k: int = 4,
+                                    filter: Optional[Dict[str, Any]] = None,
+                                    **kwargs: Any,
+                                    ) -> List[Document]:
+        hits = self.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter)
+        return [doc for doc, _ in hits]
+
+    def similarity_search_with_score(self,
+                                    query: str,
+                                    k: int = 4,
+                                    filter: Optional[Dict[str, Any]] = None,
+                                    **kwargs: Any,
+                                    ) -> List[Tuple[Document, float]]:
+        if self.embedding_function is None:
+            raise ValueError("Embedding model is not set")
+        embedding = self.embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=filter)
+
+    def similarity_search(self,
+                        query: str,
+                        k: int = 4,
+                        filter: Optional[Dict[str, Any]] = None,
+                        **kwargs: Any,
+                        ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self):
+        # scores are already cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_chunk_store(cls,
+                        matrix: np.ndarray,
+                        chunk_store: ChunkStore,
+                        embedding_function: Embeddings = None,
+                        collection_name: str = "default_collection",
+                        embedding_dtype: str = "float32",
+                        rescore_factor: int = 0,
+                        ) -> "NumpyVectorStore":
+        """
+        Wrap an already normalized (possibly memory-mapped) embedding matrix
+        whose row ``i`` is the ``i``-th live chunk of ``chunk_store``, without
+        copying it. Texts and metadata are resolved through the chunk store.
+        The store is not persisted; writes stay in memory.
+        """
+        store = cls(collection_name=collection_name,
+                    embedding_function=embedding_function,
+                    embedding_dtype=embedding_dtype,
+                    rescore_factor=rescore_factor)
+        quantized, scale = quantize(np.asarray(matrix), embedding_dtype) if embedding_dtype != "float32" else (None, None)
+        store._data = cls._chunk_store_data(matrix, [chunk_store.chunks[i].chunk_id for i in chunk_store], chunk_store,
+                                            quantized=quantized, scale=scale)
+        return store
+
+    @classmethod
+    def from_texts(cls,
+                texts: List[str],
+                embedding: Embeddings,
+                metadatas: Optional[List[dict]] = None,
+                ids: Optional[List[str]] = None,
+                collection_name: str = "default_collection",
+                persist_directory: str = None,
+                embedding_dtype: str = "float32",
+                rescore_factor: int = 0,
+                **kwargs: Any,
+                ) -> "NumpyVectorStore":
+        store = cls(collection_name=collection_name,
+                    embedding_function=embedding,
+                    persist_directory=persist_directory,
+                    embedding_dtype=embedding_dtype,
+                    rescore_factor=rescore_factor)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+
+def vector_store_write_lock(vector_store):
+    """
+    Lock to hold across an index update: ``NumpyVectorStore.write_lock``, or
+    a no-op for Chroma, which serializes its own writes.
+    """
+    if isinstance(vector_store, NumpyVectorStore):
+        return vector_store.write_lock()
+    return nullcontext()
+
+
+def vector_store_nbytes(vector_store) -> int:
+    """
+    Approximate resident size of a vector store. ``NumpyVectorStore`` reports
+    its own size; for Chroma the in-memory HNSW index is estimated from the
+    number of vectors and their dimension.
+    """
+    if vector_store is None:
+        return 0
+    if isinstance(vector_store, NumpyVectorStore):
+        return vector_store.nbytes
+    collection = vector_store._collection
+    count = collection.count()
+    if not count:
+        return 0
+    sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+    return int(count * len(sample[0]) * 4)
+
+
+def vector_store_pages(vector_store) -> List[Dict[str, Any]]:
+    """
+    Page-level metadata (one dict per page file) of the documents in a vector
+    store. ``NumpyVectorStore`` keeps it interned; for Chroma every chunk's
+    metadata is read once.
+    """
+    if vector_store is None:
+        return []
+    if isinstance(vector_store, NumpyVectorStore):
+        return [dict(metadata) for metadata in vector_store._data.metadata_table]
+    pages = {}
+    for metadata in vector_store._collection.get(include=["metadatas"])["metadatas"]:
+        if metadata:
+            pages.setdefault(metadata.get("file_path", ""), metadata)
+    return list(pages.values())
+
+
+def batch_similarity_search(vector_store, embeddings: List[List[float]], k: int = 4,
+                            filter: Optional[Dict[str, Any]] = None) -> List[List[Document]]:
+    """
+    Top ``k`` documents for each of several query embeddings, in one call to
+    the vector store: a single matrix product for ``NumpyVectorStore`` and a
+    single multi-query ``collection.query`` for Chroma. ``filter`` is a
+    Chroma-style ``where`` clause applied before scoring.
+    """
+    if not len(embeddings):
+        return []
+    if isinstance(vector_store, NumpyVectorStore):
+        return [[doc for doc, _ in hits] for hits in vector_store.similarity_search_by_vectors(embeddings, k=k, filter=filter)]
+
+    results = vector_store._collection.query(query_embeddings=embeddings, n_results=k, where=filter,
+                                             include=["documents", "metadatas"])
+    return [
+        [Document(page_content=text, metadata=metadata or {}, id=doc_id)
+         for doc_id, text, metadata in zip(ids, texts, metadatas)]
+        for ids, texts, metadatas in zip(results["ids"], results["documents"], results["metadatas"])
+    ]
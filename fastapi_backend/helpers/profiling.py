@@ -0,0 +1,243 @@
+"""
+On-demand profiling of live requests.
+
+``RequestProfiler`` runs a single request under cProfile when it carries the
+``X-Profile: 1`` header or the ``profile=1`` query flag, and keeps the last
+profiles for the admin endpoints. ``sample_stacks`` samples the stacks of all
+threads for a short window, for slowness that is not tied to one request.
+
+Nothing here is installed unless ``PROFILING_ENABLED`` is set, so requests do
+not pay for it otherwise.
+"""
+import contextvars
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_FLAG = "profile"
+TRUE_VALUES = ("1", "true", "yes", "on")
+# modules whose frames at the top of a stack mean the thread is waiting
+IDLE_MODULES = ("threading.py", "selectors.py", "queue.py", "thread.py", "base_events.py")
+
+# set by the middleware for a profiled request; copied into the worker thread of sync endpoints
+current_capture: contextvars.ContextVar = contextvars.ContextVar("profile_capture", default=None)
+
+
+class ProfileRecord:
+    """
+    A captured request profile.
+    """
+    __slots__ = ("profile_id", "method", "path", "status_code", "duration_ms", "created_at", "profiler", "file_path")
+
+    def __init__(self, method: str, path: str, status_code: int, duration_ms: float, profiler: cProfile.Profile):
+        self.profile_id = uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.status_code = status_code
+        self.duration_ms = duration_ms
+        self.created_at = time.time()
+        self.profiler = profiler
+        self.file_path = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "duration_ms": self.duration_ms,
+            "created_at": self.created_at,
+            "file_path": self.file_path,
+        }
+
+    def stats_text(self, sort_by: str = "cumulative", limit: int = 40) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.strip_dirs().sort_stats(sort_by).print_stats(limit)
+        return stream.getvalue()
+
+
+class RequestProfiler:
+    """
+    Profiles single requests on demand.
+
+    ``middleware`` marks requests that ask for a profile and ``profiled``
+    wraps endpoint functions so the profiler is started and stopped around
+    the endpoint call. The profile id is returned in the ``X-Profile-Id``
+    response header.
+
+    From Python 3.12, cProfile is built on ``sys.monitoring``, which is
+    process-wide. A profile therefore covers every thread of the process
+    while the endpoint runs, not only its own request. Only one profile can
+    run at a time. A request that asks for a profile while another one is
+    running is served unprofiled, with ``X-Profile-Id: busy``.
+
+    Args:
+        history (int): Number of profiles kept in memory.
+        profile_dir (str, optional): Also write each profile as ``<id>.prof``
+            (pstats format, e.g. for snakeviz) to this directory.
+    """
+
+    def __init__(self, history: int = 20, profile_dir: str = None):
+        self.records: "deque[ProfileRecord]" = deque(maxlen=history)
+        self.profile_dir = profile_dir
+        self.lock = threading.Lock()
+        # held while a profile runs; cProfile cannot run twice in one process
+        self.profile_lock = threading.Lock()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    @staticmethod
+    def is_requested(request) -> bool:
+        return (request.headers.get(PROFILE_HEADER, "").lower() in TRUE_VALUES
+                or request.query_params.get(PROFILE_QUERY_FLAG, "").lower() in TRUE_VALUES)
+
+    def profiled(self, fn: Callable) -> Callable:
+        """
+        Run ``fn`` under cProfile when the current request asked for a
+        profile, or unprofiled if a profile is already running.
+        """
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            capture = current_capture.get()
+            if capture is None:
+                return fn(*args, **kwargs)
+            if not self.profile_lock.acquire(blocking=False):
+                capture["busy"] = True
+                return fn(*args, **kwargs)
+            try:
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # another profiling tool is active in this process
+                    capture["busy"] = True
+                    return fn(*args, **kwargs)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    profiler.disable()
+                    capture["profiler"] = profiler
+            finally:
+                self.profile_lock.release()
+        return wrapper
+
+    async def middleware(self, request, call_next):
+        if not self.is_requested(request):
+            return await call_next(request)
+
+        capture = {}
+        token = current_capture.set(capture)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            current_capture.reset(token)
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        profiler = capture.get("profiler")
+        if capture.get("busy"):
+            response.headers["X-Profile-Id"] = "busy"
+            return response
+        if profiler is None:
+            # the endpoint is not profiled (e.g. health checks)
+            response.headers["X-Profile-Id"] = "unavailable"
+            return response
+        record = self.add(ProfileRecord(request.method, request.url.path, response.status_code, duration_ms, profiler))
+        response.headers["X-Profile-Id"] = record.profile_id
+        return response
+
+    def add(self, record: ProfileRecord) -> ProfileRecord:
+        if self.profile_dir:
+            record.file_path = os.path.join(self.profile_dir, f"{record.profile_id}.prof")
+            record.profiler.dump_stats(record.file_path)
+        with self.lock:
+            self.records.append(record)
+        print(f"Profiled {record.method} {record.path} ({record.duration_ms} ms): profile {record.profile_id}")
+        return record
+
+    def get(self, profile_id: str) -> Optional[ProfileRecord]:
+        with self.lock:
+            return next((record for record in self.records if record.profile_id == profile_id), None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [record.summary() for record in reversed(self.records)]
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def sample_stacks(seconds: float, interval: float = 0.01, include_idle: bool = False,
+                  max_depth: int = 64, top: int = 30) -> Dict[str, Any]:
+    """
+    Sample the Python stacks of all other threads every ``interval`` seconds
+    for ``seconds``.
+
+    Args:
+        seconds (float): Length of the sampling window.
+        interval (float): Time between samples.
+        include_idle (bool): Keep samples of threads waiting on locks, queues or I/O.
+        max_depth (int): Frames kept per stack (innermost first).
+        top (int): Number of functions and stacks reported.
+
+    Returns:
+        Dict[str, Any]: Sample counts, the functions with the most samples
+        (self = on top of the stack, total = anywhere on it) and the hottest
+        stacks in folded format (``outer;...;inner count``, as used by flame graph tools).
+    """
+    own_thread = threading.get_ident()
+    thread_names = {}
+    stacks: Counter = Counter()
+    ticks, idle = 0, 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        ticks += 1
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            if not include_idle and os.path.basename(frame.f_code.co_filename) in IDLE_MODULES:
+                idle += 1
+                continue
+            stack = []
+            while frame is not None and len(stack) < max_depth:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            if thread_id not in thread_names:
+                thread_names.update({thread.ident: thread.name for thread in threading.enumerate()})
+            stack.append(thread_names.get(thread_id, str(thread_id)))
+            stacks[tuple(reversed(stack))] += 1
+        time.sleep(interval)
+
+    self_samples, total_samples = Counter(), Counter()
+    for stack, count in stacks.items():
+        self_samples[stack[-1]] += count
+        for label in set(stack[1:]):
+            total_samples[label] += count
+    samples = sum(stacks.values())
+    return {
+        "seconds": seconds,
+        "interval_ms": interval * 1000,
+        "ticks": ticks,
+        "samples": samples,
+        "idle_samples": idle,
+        "top_functions": [{
+            "function": label,
+            "self_samples": self_samples[label],
+            "total_samples": count,
+            "total_pct": round(100 * count / samples, 2),
+        } for label, count in total_samples.most_common(top)],
+        "folded": [f"{';'.join(stack)} {count}" for stack, count in stacks.most_common(top)],
+    }
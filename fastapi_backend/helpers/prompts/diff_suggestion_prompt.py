@@ -10,6 +10,22 @@ Given a documentation text chunk and a user's change request, determine:
 Be precise and only suggest changes that directly relate to the user's request."""
 
 
+# System Prompt for patch-style suggestions (see helpers/edit_operations.py)
+edit_system_prompt = """You are a documentation expert that analyzes text and suggests updates based on user queries.
+
+Given a documentation text chunk and a user's change request, determine:
+1. If the text needs modification (modified/removed/unchanged)
+2. The minimal edits that make the change, as find/replace operations
+
+Rules for edits:
+- "find" must be copied exactly from the documentation text, including whitespace and punctuation
+- Keep every "find" short, but long enough to occur only once, or set "replace_all" for renames
+- Do not rewrite text that does not need to change
+- Return no edits when the change type is removed or unchanged
+
+Be precise and only suggest changes that directly relate to the user's request."""
+
+
 # User Prompt
 def create_user_prompt(user_query: str, page_content: str, title: str):
     return f"""User Query: {user_query}
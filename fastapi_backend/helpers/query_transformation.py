@@ -44,3 +44,30 @@ Return only the improved query, nothing else.
         except Exception as e:
             print(f"LLM query improvement failed: {e}")
             return query
+
+    def improve_queries_with_llm(self, queries: List[str], max_concurrency: int = 8) -> List[str]:
+        """
+        Improve several queries with concurrent LLM calls; a query whose call
+        fails is kept as is.
+        """
+        if not self.llm_manager or not queries:
+            return list(queries)
+
+        try:
+            responses = self.llm_manager.batch(
+                self.query_improvement_prompt,
+                [{"original_query": query} for query in queries],
+                max_concurrency=max_concurrency,
+            )
+        except Exception as e:
+            print(f"LLM query improvement failed: {e}")
+            return list(queries)
+
+        improved_queries = []
+        for query, response in zip(queries, responses):
+            if isinstance(response, Exception):
+                print(f"LLM query improvement failed: {response}")
+                improved_queries.append(query)
+            else:
+                improved_queries.append(response.strip())
+        return improved_queries
@@ -0,0 +1,57 @@
+import json
+from typing import Any, Dict
+
+from fastapi.responses import JSONResponse
+
+from fastapi_backend.models import DocumentUpdate
+
+try:
+    import orjson
+except ImportError:  # declared dependency; the standard library encoder keeps stripped-down installs working
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode ``content`` as compact UTF-8 JSON, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with ``dumps`` (orjson when available).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def is_unchanged(update: DocumentUpdate) -> bool:
+    return (update.model_output.change_type.strip().lower() == "unchanged"
+            or update.model_output.suggested == update.document_metadata.original)
+
+
+def update_payload(update: DocumentUpdate, compact: bool = False, chunk_refs: bool = False) -> Dict[str, Any]:
+    """
+    Serialize a ``DocumentUpdate`` for a response.
+
+    Args:
+        update (DocumentUpdate): The suggested change.
+        compact (bool): Omit ``suggested`` when the chunk is unchanged (the
+            change type is ``unchanged`` or the text equals the original).
+        chunk_refs (bool): Omit ``original``; the chunk is referenced by its
+            ``chunk_id`` only.
+
+    Returns:
+        Dict[str, Any]: JSON-ready dict (serialized by pydantic-core, not
+        FastAPI's ``jsonable_encoder``).
+    """
+    exclude = {}
+    if chunk_refs:
+        exclude["document_metadata"] = {"original"}
+    if compact and is_unchanged(update):
+        exclude["model_output"] = {"suggested"}
+    return update.model_dump(mode="json", exclude=exclude or None)
@@ -0,0 +1,168 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+class CacheEntry:
+    """
+    A cached answer with the chunks it was generated from and how their
+    context was packed.
+    """
+    __slots__ = ("query", "answer", "sources", "chunk_ids", "context_info", "corpus_version", "created_at",
+                 "last_used", "hits")
+
+    def __init__(self, query: str, answer: str, sources: List[Dict[str, str]], chunk_ids: Iterable[str], corpus_version: str,
+                 context_info: Dict[str, Any] = None):
+        self.query = query
+        self.answer = answer
+        self.sources = sources
+        self.chunk_ids = frozenset(chunk_ids)
+        self.context_info = context_info or {}
+        self.corpus_version = corpus_version
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.hits = 0
+
+
+class SemanticCache:
+    """
+    Answer cache keyed by question embeddings.
+
+    A lookup returns the most similar cached question if its cosine similarity
+    reaches ``similarity_threshold`` and it was answered against the same
+    ``corpus_version``. After every index update (``invalidate_chunks``),
+    entries are dropped if one of their source chunks was changed or removed,
+    or if they were answered without any context. The least recently used
+    entry is evicted once ``max_entries`` is reached.
+
+    ``generation`` increases with every index update. A caller records it
+    before retrieval and passes it to ``add``. If the index was updated in
+    between, the answer may come from the old index and is not cached.
+
+    Question embeddings are kept L2-normalized in one matrix, so a lookup is a
+    single matrix-vector product.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, max_entries: int = 1000):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.entries: List[CacheEntry] = []
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.stats = {"lookups": 0, "hits": 0, "inserts": 0, "skipped": 0, "invalidated": 0, "evicted": 0}
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, embedding: List[float], corpus_version: str) -> Tuple[Optional[CacheEntry], float]:
+        """
+        Return (entry, similarity) of the best cached answer, or (None, best
+        similarity) on a miss.
+        """
+        query = self._normalize(embedding)
+        with self.lock:
+            self.stats["lookups"] += 1
+            if not self.entries or self.vectors.shape[1] != query.shape[0]:
+                return None, 0.0
+            scores = self.vectors[:len(self.entries)] @ query
+            for i, entry in enumerate(self.entries):
+                if entry.corpus_version != corpus_version:
+                    scores[i] = -1.0
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < self.similarity_threshold:
+                return None, similarity
+
+            entry = self.entries[best]
+            entry.hits += 1
+            entry.last_used = time.time()
+            self.stats["hits"] += 1
+            return entry, similarity
+
+    def add(self, embedding: List[float], corpus_version: str, query: str, answer: str,
+            sources: List[Dict[str, str]], chunk_ids: Iterable[str], generation: int = None,
+            context_info: Dict[str, Any] = None) -> Optional[CacheEntry]:
+        """
+        Cache ``answer`` for the question with ``embedding``.
+
+        Args:
+            context_info (dict, optional): Packing counters of the answer's
+                context, returned again on a hit.
+            generation (int, optional): ``self.generation`` read before the
+                answer's context was retrieved. If the index was updated
+                since, nothing is cached.
+
+        Returns:
+            Optional[CacheEntry]: The new entry, or None if it was skipped.
+        """
+        vector = self._normalize(embedding)
+        entry = CacheEntry(query, answer, sources, chunk_ids, corpus_version, context_info=context_info)
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                self.stats["skipped"] += 1
+                return None
+            if self.entries and self.vectors.shape[1] != vector.shape[0]:
+                # the embedding model changed: nothing cached is comparable any more
+                self._remove(range(len(self.entries)))
+            if len(self.entries) >= self.max_entries:
+                self._remove([min(range(len(self.entries)), key=lambda i: self.entries[i].last_used)])
+                self.stats["evicted"] += 1
+
+            size = len(self.entries)
+            if size == self.vectors.shape[0] or self.vectors.shape[1] != vector.shape[0]:
+                # grow geometrically so inserts stay amortized O(dim)
+                grown = np.zeros((max(16, 2 * size), vector.shape[0]), dtype=np.float32)
+                if size:
+                    grown[:size] = self.vectors[:size]
+                self.vectors = grown
+            self.vectors[size] = vector
+            self.entries.append(entry)
+            self.stats["inserts"] += 1
+        return entry
+
+    def _remove(self, indices: Iterable[int]):
+        remove = set(indices)
+        if not remove:
+            return
+        keep = [i for i in range(len(self.entries)) if i not in remove]
+        self.vectors[:len(keep)] = self.vectors[keep]
+        self.entries = [self.entries[i] for i in keep]
+
+    def invalidate_chunks(self, chunk_ids: Iterable[str]) -> int:
+        """
+        Called after every index update. Drops every entry that was answered
+        from one of ``chunk_ids`` (the changed or removed chunks) or without
+        any context (new pages may answer it now), and bumps ``generation``.
+
+        Returns:
+            int: Number of entries dropped.
+        """
+        chunk_ids = set(chunk_ids)
+        with self.lock:
+            self.generation += 1
+            stale = [i for i, entry in enumerate(self.entries)
+                     if not entry.chunk_ids or not entry.chunk_ids.isdisjoint(chunk_ids)]
+            self._remove(stale)
+            self.stats["invalidated"] += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.entries = []
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def report(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["entries"] = len(self.entries)
+        stats["hit_ratio"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["similarity_threshold"] = self.similarity_threshold
+        return stats
@@ -0,0 +1,354 @@
+"""
+Versioned, checksummed single-file snapshots of a built index.
+
+A snapshot holds everything a replica needs to serve queries without parsing
+the corpus or calling the embedding model: the chunk store, the normalized
+embedding matrix, the BM25 posting lists and an ingestion manifest of the page
+files it was built from.
+
+File layout::
+
+    MAGIC (8 bytes) | format version (uint32) | manifest length (uint64)
+    manifest (JSON: metadata plus offset, length, sha256 of every section)
+    sections, each aligned to SECTION_ALIGNMENT bytes
+
+Array sections are stored raw, so the loader memory-maps the file and wraps
+them with ``np.frombuffer`` without copying.
+
+Usage:
+    python -m fastapi_backend.helpers.snapshot export --out index.snapshot
+    python -m fastapi_backend.helpers.snapshot verify index.snapshot
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import numpy as np
+
+from fastapi_backend.helpers.chunk_store import ChunkStore
+from fastapi_backend.helpers.lexical_index import BM25Index
+from fastapi_backend.helpers.numpy_vector_store import NumpyVectorStore
+
+
+MAGIC = b"DOCSNAP\x00"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIQ")
+SECTION_ALIGNMENT = 64
+# written next to a persisted vector store, so a reopened index knows what it was built from
+INGESTION_MANIFEST_FILE = "ingestion_manifest.json"
+
+
+class SnapshotError(ValueError):
+    """
+    Raised when a snapshot file is missing, corrupt or of an unsupported version.
+    """
+
+
+def build_ingestion_manifest(file_paths: List[str]) -> Dict[str, Dict[str, int]]:
+    """
+    Record size and modification time of every page file, so later updates can
+    tell which pages changed since the snapshot was taken.
+    """
+    manifest = {}
+    for file_path in file_paths:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        manifest[file_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    return manifest
+
+
+def save_ingestion_manifest(directory: str, manifest: Dict[str, Dict[str, int]]):
+    """
+    Persist the ingestion manifest of the index stored in ``directory`` (atomically, via rename).
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, INGESTION_MANIFEST_FILE)
+    tmp_path = f"{path}.{uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def load_ingestion_manifest(directory: str) -> Dict[str, Dict[str, int]]:
+    """
+    Ingestion manifest saved with ``save_ingestion_manifest``; empty if there is none
+    (an index built before manifests were persisted).
+    """
+    path = os.path.join(directory, INGESTION_MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_page_files(doc_dir_path: str) -> List[str]:
+    """
+    All page JSON files under ``doc_dir_path`` (hidden temp files excluded).
+    """
+    file_paths = []
+    for root, dirs, files in os.walk(doc_dir_path):
+        for file in files:
+            if file.endswith('.json') and not file.startswith('.'):
+                file_paths.append(os.path.join(root, file))
+    return file_paths
+
+
+def diff_ingestion_manifest(old: Dict[str, Dict[str, int]], new: Dict[str, Dict[str, int]]) -> List[str]:
+    """
+    Page files that were added, removed or modified between two manifests.
+    """
+    return sorted(path for path in old.keys() | new.keys() if old.get(path) != new.get(path))
+
+
+class Snapshot:
+    """
+    A loaded snapshot. Arrays are views into the memory-mapped file.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], chunk_store: ChunkStore, lexical_index: BM25Index,
+                vectors: np.ndarray, ingestion_manifest: Dict[str, Dict[str, int]], file_mmap: mmap.mmap = None):
+        self.manifest = manifest
+        self.chunk_store = chunk_store
+        self.lexical_index = lexical_index
+        self.vectors = vectors
+        self.ingestion_manifest = ingestion_manifest
+        # keep the mapping alive for as long as the arrays are in use
+        self._mmap = file_mmap
+
+    def vector_store(self, embedding_function=None, embedding_dtype: str = "float32", rescore_factor: int = 0) -> NumpyVectorStore:
+        """
+        Wrap the snapshot vectors in a ``NumpyVectorStore`` (no copy for
+        float32) that resolves texts and metadata through the snapshot's chunk
+        store instead of keeping its own copies.
+        """
+        return NumpyVectorStore.from_chunk_store(
+            self.vectors,
+            self.chunk_store,
+            embedding_function=embedding_function,
+            embedding_dtype=embedding_dtype,
+            rescore_factor=rescore_factor,
+        )
+
+
+def _array_section(array: np.ndarray) -> Dict[str, Any]:
+    array = np.ascontiguousarray(array)
+    return {"data": array.tobytes(), "dtype": array.dtype.str, "shape": list(array.shape)}
+
+
+def _json_section(value: Any) -> Dict[str, Any]:
+    return {"data": json.dumps(value, ensure_ascii=False).encode("utf-8")}
+
+
+def export_snapshot(snapshot_path: str,
+                    vector_store,
+                    ingestion_manifest: Dict[str, Dict[str, int]] = None,
+                    metadata: Dict[str, Any] = None,
+                    ) -> Dict[str, Any]:
+    """
+    Write a snapshot of ``vector_store`` (Chroma or NumpyVectorStore) to
+    ``snapshot_path``. The chunk store and BM25 index are rebuilt from the
+    stored rows, so they are guaranteed to line up with the vectors.
+
+    Args:
+        snapshot_path (str): Output file, replaced atomically.
+        vector_store: Vector store holding every chunk with its embedding.
+        ingestion_manifest (dict, optional): Size and mtime of the page files
+            as they were when they were indexed (not re-read at export time,
+            so pages edited since are still reported as changed on replicas).
+        metadata (dict, optional): Extra build information to record (models, chunking).
+
+    Returns:
+        dict: The snapshot manifest.
+    """
+    rows = vector_store.get(include=["documents", "metadatas", "embeddings"])
+    metadatas = []
+    for doc_id, row_metadata in zip(rows["ids"], rows["metadatas"]):
+        row_metadata = dict(row_metadata or {})
+        row_metadata.setdefault("chunk_id", doc_id)
+        metadatas.append(row_metadata)
+
+    chunk_store = ChunkStore.from_texts(rows["documents"], metadatas)
+    lexical_index = BM25Index.from_chunk_store(chunk_store)
+    vectors = NumpyVectorStore._normalize(rows["embeddings"]) if len(rows["ids"]) else np.zeros((0, 0), dtype=np.float32)
+
+    chunks = chunk_store.to_arrays()
+    lexical = lexical_index.to_arrays()
+    sections = {
+        "pages": _json_section(chunks["pages"]),
+        "chunk_ids": _json_section(chunks["chunk_ids"]),
+        "chunk_pages": _array_section(chunks["chunk_pages"]),
+        "chunk_offsets": _array_section(chunks["chunk_offsets"]),
+        "chunk_ends": _array_section(chunks["chunk_ends"]),
+        "texts": {"data": chunks["buffer"].encode("utf-8")},
+        "vectors": _array_section(vectors),
+        "lexical_terms": _json_section(lexical["terms"]),
+        "lexical_term_offsets": _array_section(lexical["term_offsets"]),
+        "lexical_docs": _array_section(lexical["docs"]),
+        "lexical_tfs": _array_section(lexical["tfs"]),
+        "lexical_doc_lengths": _array_section(lexical["doc_lengths"]),
+        "lexical_params": _json_section(lexical["params"]),
+        "ingestion_manifest": _json_section(ingestion_manifest or {}),
+    }
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "num_chunks": len(chunk_store),
+        "num_pages": len(chunk_store.pages),
+        "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+        "metadata": metadata or {},
+        "sections": {},
+    }
+
+    # Offsets depend on the manifest length, which depends on the offsets;
+    # reserve room for the offsets by laying out with a generous manifest size.
+    section_table = {name: {"length": len(s["data"]),
+                            "sha256": hashlib.sha256(s["data"]).hexdigest(),
+                            **{k: v for k, v in s.items() if k != "data"}}
+                     for name, s in sections.items()}
+    for name in section_table:
+        section_table[name]["offset"] = 0
+    manifest["sections"] = section_table
+    reserved = len(json.dumps(manifest).encode("utf-8")) + 32 * len(sections) + 256
+
+    offset = HEADER.size + reserved
+    for name, entry in section_table.items():
+        offset += -offset % SECTION_ALIGNMENT
+        entry["offset"] = offset
+        offset += entry["length"]
+
+    manifest_bytes = json.dumps(manifest).encode("utf-8")
+    if len(manifest_bytes) > reserved:
+        raise SnapshotError("Snapshot manifest does not fit in the reserved header space")
+    manifest_bytes = manifest_bytes.ljust(reserved, b" ")
+
+    os.makedirs(os.path.dirname(os.path.abspath(snapshot_path)), exist_ok=True)
+    tmp_path = f"{snapshot_path}.{uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, reserved))
+        f.write(manifest_bytes)
+        for name, entry in section_table.items():
+            f.write(b"\0" * (entry["offset"] - f.tell()))
+            f.write(sections[name]["data"])
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, snapshot_path)
+    return manifest
+
+
+def read_manifest(snapshot_path: str) -> Dict[str, Any]:
+    """
+    Read and validate the header of a snapshot without touching its sections.
+    """
+    with open(snapshot_path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise SnapshotError(f"Not a snapshot file: {snapshot_path}")
+        magic, version, manifest_length = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise SnapshotError(f"Not a snapshot file: {snapshot_path}")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version} (expected {FORMAT_VERSION})")
+        return json.loads(f.read(manifest_length).decode("utf-8"))
+
+
+def load_snapshot(snapshot_path: str, verify: bool = True) -> Snapshot:
+    """
+    Memory-map a snapshot and rebuild the chunk store and BM25 index from it.
+
+    Args:
+        snapshot_path (str): Snapshot file written by ``export_snapshot``.
+        verify (bool): Check the sha256 of every section before using it.
+
+    Returns:
+        Snapshot: The loaded snapshot.
+    """
+    if not os.path.exists(snapshot_path):
+        raise SnapshotError(f"Snapshot not found: {snapshot_path}")
+    manifest = read_manifest(snapshot_path)
+
+    with open(snapshot_path, "rb") as f:
+        file_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def raw(name: str) -> memoryview:
+        entry = manifest["sections"][name]
+        view = memoryview(file_mmap)[entry["offset"]:entry["offset"] + entry["length"]]
+        if verify and hashlib.sha256(view).hexdigest() != entry["sha256"]:
+            raise SnapshotError(f"Checksum mismatch in snapshot section '{name}'")
+        return view
+
+    def array(name: str) -> np.ndarray:
+        entry = manifest["sections"][name]
+        return np.frombuffer(raw(name), dtype=np.dtype(entry["dtype"])).reshape(entry["shape"])
+
+    def json_value(name: str) -> Any:
+        return json.loads(bytes(raw(name)).decode("utf-8"))
+
+    chunk_store = ChunkStore.from_arrays(
+        pages=json_value("pages"),
+        chunk_ids=json_value("chunk_ids"),
+        chunk_pages=array("chunk_pages"),
+        chunk_offsets=array("chunk_offsets"),
+        chunk_ends=array("chunk_ends"),
+        buffer=bytes(raw("texts")).decode("utf-8"),
+    )
+    lexical_index = BM25Index.from_arrays(
+        terms=json_value("lexical_terms"),
+        term_offsets=array("lexical_term_offsets"),
+        docs=array("lexical_docs"),
+        tfs=array("lexical_tfs"),
+        doc_lengths=array("lexical_doc_lengths"),
+        params=json_value("lexical_params"),
+    )
+    return Snapshot(
+        manifest=manifest,
+        chunk_store=chunk_store,
+        lexical_index=lexical_index,
+        vectors=array("vectors"),
+        ingestion_manifest=json_value("ingestion_manifest"),
+        file_mmap=file_mmap,
+    )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Export or verify index snapshots.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Build (or load) the index from settings and export it")
+    export_parser.add_argument("--out", required=True, help="Snapshot file to write")
+    export_parser.add_argument("--corpus", default=None, help="Corpus to export (see CORPORA); default corpus if omitted")
+    verify_parser = subparsers.add_parser("verify", help="Check the checksums of a snapshot")
+    verify_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        snapshot = load_snapshot(args.path, verify=True)
+        print(json.dumps({k: v for k, v in snapshot.manifest.items() if k != "sections"}, indent=2))
+        print("Snapshot OK")
+        return
+
+    from fastapi_backend.config import settings
+    from fastapi_backend.helpers.llm_manager import LLMManager
+    from fastapi_backend.pipelines.corpus_registry import corpus_settings
+    from fastapi_backend.pipelines.factory import create_rag_pipeline
+
+    llm_manager = LLMManager(api_key=settings.API_KEY,
+                            provider=settings.PROVIDER,
+                            llm_model_name=settings.LLM_MODEL_NAME,
+                            embedding_model_name=settings.EMBEDDING_MODEL_NAME)
+    rag_pipeline = create_rag_pipeline(llm_manager, corpus_settings(settings, args.corpus or settings.DEFAULT_CORPUS))
+    start = time.perf_counter()
+    manifest = rag_pipeline.export_snapshot(args.out)
+    print(f"Exported {manifest['num_chunks']} chunks from {manifest['num_pages']} pages "
+          f"to {args.out} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
+from typing import List, Optional
+
 from pydantic import BaseModel, Field
 
 class ModelOutput(BaseModel):
     change_type:str = Field(description="Mention the change type: modified, removed, unchanged")
     suggested: str = Field(description="Suggested changes to the page content")
 
+class EditOperation(BaseModel):
+    find: str = Field(description="Exact text to replace, copied verbatim from the documentation text. Include enough surrounding words to make it unique")
+    replace: str = Field(description="Text to put in place of the found text (empty string to delete it)")
+    replace_all: bool = Field(default=False, description="Replace every occurrence of the found text instead of exactly one")
+
+class EditOutput(BaseModel):
+    change_type: str = Field(description="Mention the change type: modified, removed, unchanged")
+    edits: List[EditOperation] = Field(default_factory=list, description="Minimal find/replace edits that turn the documentation text into the updated text. Empty unless change_type is modified")
+
 class DocumentMetadata(BaseModel):
     chunk_id: str = Field(description="Unique chunk ID")
     original: str = Field(description="Original page content")
@@ -13,4 +24,50 @@ class DocumentMetadata(BaseModel):
     
 class DocumentUpdate(BaseModel):
     model_output: ModelOutput = Field(description="Model output")
-    document_metadata: DocumentMetadata = Field(description="Document metadata")
\ No newline at end of file
+    document_metadata: DocumentMetadata = Field(description="Document metadata")
+
+class ModelOutputPayload(BaseModel):
+    change_type: str = Field(description="Mention the change type: modified, removed, unchanged")
+    suggested: Optional[str] = Field(default=None, description="Suggested changes to the page content; omitted with compact=true when the chunk is unchanged")
+
+class DocumentMetadataPayload(BaseModel):
+    chunk_id: str = Field(description="Unique chunk ID")
+    original: Optional[str] = Field(default=None, description="Original page content; omitted with chunk_refs=true")
+    title: str = Field(description="Title of the page")
+    source_url: str = Field(description="Source URL of the page")
+    file_path: str = Field(description="File path of the page")
+
+class DocumentUpdatePayload(BaseModel):
+    model_output: ModelOutputPayload = Field(description="Model output")
+    document_metadata: DocumentMetadataPayload = Field(description="Document metadata")
+
+class QueryUpdates(BaseModel):
+    query: str = Field(description="Query as sent by the caller")
+    updates: List[DocumentUpdatePayload] = Field(description="Suggested changes for the documents retrieved for this query")
+
+class BatchRetrieveResponse(BaseModel):
+    results: List[QueryUpdates] = Field(description="Suggested changes grouped by query, in request order")
+    unique_chunks: int = Field(description="Distinct chunks retrieved across all queries")
+    llm_calls: int = Field(description="Suggestion requests sent to the LLM (one per distinct query and chunk)")
+    retrieval_ms: float = Field(description="Time spent rewriting, embedding and searching the queries")
+    suggestion_ms: float = Field(description="Time spent generating suggestions")
+    total_ms: float = Field(description="Total request time")
+
+class FileApplyResult(BaseModel):
+    file_path: str = Field(description="Page file the updates belong to")
+    updates: int = Field(description="Number of approved updates for this file")
+    applied: List[str] = Field(default_factory=list, description="Chunk IDs whose edit was written back")
+    not_found: List[str] = Field(default_factory=list, description="Chunk IDs whose original text was not found in the page")
+    error: Optional[str] = Field(default=None, description="Error that prevented patching the file")
+    write_ms: float = Field(default=0, description="Time spent patching and writing the page file")
+    reindex_ms: float = Field(default=0, description="Time spent re-splitting and diffing the page's chunks")
+    chunks_kept: int = Field(default=0, description="Chunks left untouched in the index")
+    chunks_removed: int = Field(default=0, description="Chunks removed from the index")
+    chunks_added: int = Field(default=0, description="Chunks (re-)embedded and added to the index")
+
+class ApplyChangesResponse(BaseModel):
+    total_approved: int = Field(description="Number of approved updates received")
+    total_applied: int = Field(description="Number of updates written back to page files")
+    files: List[FileApplyResult] = Field(description="Per-file results and timings")
+    embed_ms: float = Field(description="Time spent embedding new chunks and updating the vector store")
+    total_ms: float = Field(description="Total request time")
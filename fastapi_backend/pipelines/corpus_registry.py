@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+
+class UnknownCorpusError(KeyError):
+    """
+    Raised when a request names a corpus that is not configured.
+    """
+
+
+def corpus_names(settings) -> List[str]:
+    """
+    The default corpus (the base settings) followed by the ``CORPORA`` entries.
+    """
+    return [settings.DEFAULT_CORPUS] + [name for name in settings.CORPORA if name != settings.DEFAULT_CORPUS]
+
+
+def corpus_settings(settings, name: str):
+    """
+    Settings of corpus ``name``: the base settings with the corpus overrides
+    from ``CORPORA`` applied (e.g. ``DOC_DIR_PATH``, ``CHROMA_DB_NAME``, ``SNAPSHOT_PATH``).
+    """
+    if name == settings.DEFAULT_CORPUS:
+        return settings
+    if name not in settings.CORPORA:
+        raise UnknownCorpusError(name)
+    return settings.model_copy(update=settings.CORPORA[name])
+
+
+class CorpusRegistry:
+    """
+    Named documentation corpora served by one process.
+
+    Each corpus is a RAG pipeline built by ``loader`` on first use. Loaded
+    corpora are kept in least-recently-used order; once their combined
+    ``memory_usage()`` exceeds ``memory_budget_bytes`` the idle ones are
+    evicted (``unloader`` is called first, e.g. to stop a file watcher) until
+    the budget is met again. The corpus being requested is never evicted, and
+    neither is one that is still loading.
+
+    Args:
+        names (List[str]): Configured corpus names.
+        loader (Callable[[str], Any]): Builds and warms up the pipeline of a corpus.
+        unloader (Callable[[str, Any], None], optional): Called before a corpus is evicted.
+        memory_budget_bytes (int): Memory budget for all loaded corpora (0 = unlimited).
+    """
+
+    def __init__(self,
+                 names: List[str],
+                 loader: Callable[[str], Any],
+                 unloader: Callable[[str, Any], None] = None,
+                 memory_budget_bytes: int = 0,
+                 ):
+        self.names = list(names)
+        self.loader = loader
+        self.unloader = unloader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.pipelines: "OrderedDict[str, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.load_locks = {name: threading.Lock() for name in self.names}
+        self.stats = {name: {"loads": 0, "hits": 0, "evictions": 0, "load_ms": 0.0, "last_used": None}
+                      for name in self.names}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.load_locks
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.pipelines
+
+    def get(self, name: str):
+        """
+        Return the pipeline of corpus ``name``, loading it on first use.
+
+        Raises:
+            UnknownCorpusError: If ``name`` is not a configured corpus.
+        """
+        if name not in self:
+            raise UnknownCorpusError(name)
+
+        with self.lock:
+            pipeline = self.pipelines.get(name)
+            if pipeline is not None:
+                self.pipelines.move_to_end(name)
+                self.record_use(name, hit=True)
+                return pipeline
+
+        # load outside the registry lock so other corpora keep serving
+        with self.load_locks[name]:
+            pipeline = self.pipelines.get(name)
+            if pipeline is None:
+                start = time.perf_counter()
+                pipeline = self.loader(name)
+                with self.lock:
+                    self.pipelines[name] = pipeline
+                    self.stats[name]["loads"] += 1
+                    self.stats[name]["load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                    self.record_use(name, hit=False)
+                print(f"Loaded corpus '{name}' in {self.stats[name]['load_ms']} ms")
+            else:
+                with self.lock:
+                    self.pipelines.move_to_end(name)
+                    self.record_use(name, hit=True)
+                return pipeline
+
+        # memory only grows substantially when a corpus is loaded
+        self.evict_to_budget(keep=name)
+        return pipeline
+
+    def record_use(self, name: str, hit: bool):
+        if hit:
+            self.stats[name]["hits"] += 1
+        self.stats[name]["last_used"] = time.time()
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Approximate memory (bytes) of every loaded corpus.
+        """
+        with self.lock:
+            loaded = list(self.pipelines.items())
+        return {name: pipeline.memory_usage()["total"] for name, pipeline in loaded}
+
+    def evict_to_budget(self, keep: str = None):
+        """
+        Evict least recently used corpora until the loaded ones fit in the budget.
+        """
+        if not self.memory_budget_bytes:
+            return
+        usage = self.memory_usage()
+        total = sum(usage.values())
+        for name in list(usage):  # least recently used first
+            if total <= self.memory_budget_bytes:
+                break
+            if name == keep or self.load_locks[name].locked():
+                continue
+            total -= usage[name]
+            self.evict(name)
+            print(f"Evicted corpus '{name}' ({usage[name] / 2**20:.1f} MiB) to stay within the memory budget")
+
+    def evict(self, name: str):
+        with self.lock:
+            pipeline = self.pipelines.pop(name, None)
+            if pipeline is None:
+                return
+            self.stats[name]["evictions"] += 1
+        if self.unloader is not None:
+            self.unloader(name, pipeline)
+
+    def close(self):
+        """
+        Unload every corpus (on shutdown).
+        """
+        for name in list(self.pipelines):
+            self.evict(name)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Per-corpus load state, memory and hit statistics.
+        """
+        usage = self.memory_usage()
+        corpora = {}
+        for name in self.names:
+            stats = dict(self.stats[name])
+            requests = stats["hits"] + stats["loads"]
+            stats["loaded"] = name in usage
+            stats["memory_bytes"] = usage.get(name, 0)
+            stats["hit_ratio"] = round(stats["hits"] / requests, 4) if requests else 0.0
+            corpora[name] = stats
+        return {
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "memory_bytes": sum(usage.values()),
+            "corpora": corpora,
+        }
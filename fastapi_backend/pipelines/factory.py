@@ -0,0 +1,43 @@
+from fastapi_backend.helpers.llm_manager import LLMManager
+
+
+def create_rag_pipeline(llm_manager: LLMManager, settings, **overrides):
+    """
+    Build the RAG pipeline selected by ``settings.RETRIEVAL_METHOD``. Only the
+    selected pipeline module is imported.
+
+    Args:
+        llm_manager (LLMManager): Provides the LLM and embedding models.
+        settings (Settings): Application settings.
+        **overrides: Constructor arguments that take precedence over ``settings``.
+
+    Returns:
+        HybridRAGPipeline | VanillaRAGPipeline: The configured pipeline.
+    """
+    kwargs = dict(
+        llm_manager=llm_manager,
+        doc_dir_path=settings.DOC_DIR_PATH,
+        top_k_docs=settings.TOP_K_DOCS,
+        chunk_size=settings.CHUNK_SIZE,
+        chunk_overlap=settings.CHUNK_OVERLAP,
+        chroma_persist_dir=settings.CHROMA_DB_NAME,
+        vector_store_backend=settings.VECTOR_STORE_BACKEND,
+        embedding_dtype=settings.EMBEDDING_DTYPE,
+        rescore_factor=settings.RESCORE_FACTOR,
+        llm_max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    )
+    kwargs.update(overrides)
+
+    if settings.RETRIEVAL_METHOD == "hybrid":
+        from fastapi_backend.pipelines.hybrid_rag_pipeline import HybridRAGPipeline
+
+        kwargs.setdefault("fusion_weights", settings.FUSION_WEIGHTS)
+        print("Hybrid RAG pipeline selected")
+        return HybridRAGPipeline(**kwargs)
+    elif settings.RETRIEVAL_METHOD == "vanilla":
+        from fastapi_backend.pipelines.vanilla_rag_pipeline import VanillaRAGPipeline
+
+        print("Vanilla RAG pipeline selected")
+        return VanillaRAGPipeline(**kwargs)
+    else:
+        raise ValueError(f"Unsupported retrieval method: {settings.RETRIEVAL_METHOD}")
@@ -1,21 +1,25 @@
 import warnings
 import os
 import json
+import time
+import threading
 from uuid import uuid4
-from typing import List, Dict, Any, Tuple
-
-from langchain.schema import Document
-from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import CharacterTextSplitter, MarkdownTextSplitter, RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
-from langchain.text_splitter import Language
-from langchain_community.retrievers import BM25Retriever
-from langchain.retrievers.ensemble import EnsembleRetriever
+from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
+from langchain_core.documents import Document
 
+from fastapi_backend.helpers.chunk_store import ChunkStore, match_chunks
 from fastapi_backend.helpers.document_cleaner import DocumentCleaner
-from fastapi_backend.helpers.llm_manager import LLMManager
+from fastapi_backend.helpers.index_state import IndexState
+from fastapi_backend.helpers.lexical_index import BM25Index
+from fastapi_backend.helpers.llm_manager import LLMManager, embed_queries
+from fastapi_backend.helpers.metadata_filter import MetadataFilter
+from fastapi_backend.helpers.numpy_vector_store import (NumpyVectorStore, batch_similarity_search, vector_store_nbytes,
+                                                        vector_store_write_lock)
 from fastapi_backend.helpers.query_transformation import QueryTransformer
+from fastapi_backend.helpers.snapshot import (build_ingestion_manifest, diff_ingestion_manifest, export_snapshot, list_page_files,
+                                              load_ingestion_manifest, load_snapshot, save_ingestion_manifest)
 
 
 
@@ -29,9 +33,15 @@ class HybridRAGPipeline:
                 chunk_overlap: int = 0,
                 enable_query_preprocessing: bool = True,
                 enable_document_cleaning: bool = True,
+                vector_store_backend: str = "chroma",
+                embedding_dtype: str = "float32",
+                rescore_factor: int = 0,
+                llm_max_concurrency: int = 8,
+                fusion_weights: List[float] = (0.4, 0.6),
                 ):
         warnings.filterwarnings("ignore")
         # get all filenames inside doc_dir_paths
+        self.doc_dir_path = doc_dir_path
         self.file_paths = []
         if doc_dir_path:
             for root, dirs, files in os.walk(doc_dir_path):
@@ -39,9 +49,16 @@ class HybridRAGPipeline:
                     if file.endswith('.json'):
                         self.file_paths.append(os.path.join(root, file))
         
-        self.documents = None
-        self.filtered_docs = []
+        # chunk store + BM25 index, replaced as a whole on every update
+        self.index_state = None
         self.chromadbDocSearch = None
+        self.ingestion_manifest = {}
+        # where the ingestion manifest is persisted (next to the vector store; None for snapshots)
+        self.ingestion_manifest_dir = None
+        # identifies the opened index; changes when it is rebuilt or reloaded (not on incremental updates)
+        self.corpus_version = None
+        # serializes index writers (approved changes, file watcher)
+        self.index_lock = threading.Lock()
         self.llm_model = llm_manager.llm_model if llm_manager else None
         self.embedding_model = llm_manager.embeddings if llm_manager else None
         self.qa = None
@@ -51,11 +68,29 @@ class HybridRAGPipeline:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.chroma_db_dir = chroma_persist_dir
+        self.vector_store_backend = vector_store_backend
+        self.embedding_dtype = embedding_dtype
+        self.rescore_factor = rescore_factor
+        self.llm_max_concurrency = llm_max_concurrency
+        # reciprocal rank fusion weights of the BM25 and vector rankings
+        self.fusion_weights = list(fusion_weights)
         self.query_preprocessor=QueryTransformer(llm_manager=llm_manager) if enable_query_preprocessing else None
         self.document_cleaner = DocumentCleaner(llm_manager=llm_manager) if enable_document_cleaning else None
 
 
 
+    @property
+    def chunk_store(self) -> ChunkStore:
+        return self.index_state.chunk_store if self.index_state else None
+
+    @property
+    def lexical_index(self) -> BM25Index:
+        return self.index_state.lexical_index if self.index_state else None
+
+    @property
+    def index_version(self) -> int:
+        return self.index_state.version if self.index_state else 0
+
     def preprocess_query(self, query: str) -> Tuple[str, Dict[str, Any]]:
         """
         Preprocess the user query to improve retrieval.
@@ -69,6 +104,48 @@ class HybridRAGPipeline:
             return query
 
 
+    def load_page(self, file_path: str) -> Tuple[Document, Dict[str, Any]]:
+        """
+        Load and clean a single page file.
+
+        Returns:
+            Tuple of (document, cleaning_info). ``document`` is None for missing
+            or non-english pages; ``cleaning_info`` is None if cleaning is disabled.
+        """
+        if not file_path.endswith('.json'):
+            raise ValueError(f"Unsupported file format: {file_path}. Only JSON files are supported.")
+        if not os.path.exists(file_path):
+            return None, None
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        markdown = data.get("markdown", "")
+        metadata = data.get("metadata", {})
+
+        # Load only english language documents
+        if metadata.get("language", "") != "en":
+            return None, None
+
+        # apply document cleaning
+        cleaning_info = None
+        if self.document_cleaner:
+            markdown, cleaning_info = self.document_cleaner.clean_document(
+                markdown, 
+                use_llm=True
+            )
+
+        doc = Document(
+            page_content=markdown,
+            metadata={
+                "title": metadata.get("title", ""),
+                "source_url": metadata.get("sourceURL", ""),
+                "file_path": file_path,  # helpful for debugging
+                "scrape_id": metadata.get("scrapeId", "")
+            },
+            id=str(uuid4())
+        )
+        return doc, cleaning_info
+
     def load_documents(self):
         documents = []
         cleaning_stats = {
@@ -77,60 +154,84 @@ class HybridRAGPipeline:
             'total_reduction_percentage': 0,
         }
         for file_path in self.file_paths:
-            if file_path.endswith('.json'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    
-                    data = json.load(f)
-                    markdown = data.get("markdown", "")
-                    metadata = data.get("metadata", {})
-
-                    # Load only english language documents
-                    if metadata.get("language", "") != "en":
-                        continue
-
-                    cleaning_stats['total_documents'] += 1
-
-                    # apply document cleaning
-                    if self.document_cleaner:
-                        cleaned_content, cleaning_info = self.document_cleaner.clean_document(
-                            markdown, 
-                            use_llm=True
-                        )
-                        
-                        if cleaning_info['reduction_percentage'] > 0:
-                            cleaning_stats['cleaned_documents'] += 1
-                            cleaning_stats['total_reduction_percentage'] += cleaning_info['reduction_percentage']
-                        
-                        # Update metadata with cleaning info
-                        metadata['cleaning_info'] = cleaning_info
-                        markdown = cleaned_content
-                    else:
-                        markdown = markdown                        
-
-                    title = metadata.get("title", "")
-                    source_url = metadata.get("sourceURL", "")
-                    scrape_id = metadata.get("scrapeId", "")
-
-                    doc = Document(
-                        page_content=markdown,
-                        metadata={
-                            "title": title,
-                            "source_url": source_url,
-                            "file_path": file_path,  # helpful for debugging
-                            "scrape_id": scrape_id
-                        },
-                        id=str(uuid4())
-                    )
-                    documents.append(doc)
-            else:
-                raise ValueError(f"Unsupported file format: {file_path}. Only JSON files are supported.")
-             
-
-        self.documents = documents
+            doc, cleaning_info = self.load_page(file_path)
+            if doc is None:
+                continue
+
+            cleaning_stats['total_documents'] += 1
+            if cleaning_info and cleaning_info['reduction_percentage'] > 0:
+                cleaning_stats['cleaned_documents'] += 1
+                cleaning_stats['total_reduction_percentage'] += cleaning_info['reduction_percentage']
+
+            documents.append(doc)
+
+        # NOTE: full pages are not kept around; only the chunk store stays resident.
         return documents
 
-    def setup_bm25_vector_store(self, collection_name="default_collection"):
-        pass
+    def setup_bm25_vector_store(self, chunk_store: ChunkStore):
+        """
+        Build the BM25 index over ``chunk_store`` and publish both as the
+        current index state.
+        """
+        lexical_index = BM25Index.from_chunk_store(chunk_store)
+        self.index_state = IndexState(chunk_store, lexical_index, version=self.index_version + 1)
+        return lexical_index
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Split pages into markdown-aware chunks, drop chunks shorter than 100
+        characters and give every chunk a unique ``chunk_id``.
+        """
+        from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+        text_splitter = RecursiveCharacterTextSplitter.from_language(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            language=Language.MARKDOWN,
+        )
+        split_docs = text_splitter.split_documents(documents)
+
+        filtered_docs = []
+        for chunk in split_docs:
+            if len(chunk.page_content.strip()) < 100:
+                continue
+
+            # Add/Update metadata to include a unique chunk id
+            new_metadata = dict(chunk.metadata)
+            new_metadata["chunk_id"] = str(uuid4())
+            chunk.metadata = new_metadata
+            chunk.id = new_metadata["chunk_id"]
+
+            filtered_docs.append(chunk)
+
+        print(f"Total split docs before filtering: {len(split_docs)}")
+        print(f"Total split docs after filtering: {len(filtered_docs)}")
+        return filtered_docs
+
+    def vector_store_class(self):
+        """
+        Return the vector store class selected by ``vector_store_backend``.
+        """
+        if self.vector_store_backend == "chroma":
+            from langchain_community.vectorstores import Chroma
+            return Chroma
+        elif self.vector_store_backend == "numpy":
+            return NumpyVectorStore
+        else:
+            raise ValueError(f"Unsupported vector store backend: {self.vector_store_backend}")
+
+    def vector_store_kwargs(self) -> Dict[str, Any]:
+        """
+        Backend specific keyword arguments for the vector store constructor.
+        """
+        if self.vector_store_backend == "numpy":
+            return {"embedding_dtype": self.embedding_dtype, "rescore_factor": self.rescore_factor}
+        return {}
+
+    def vector_store_exists(self, collection_name="default_collection") -> bool:
+        if self.vector_store_backend == "numpy":
+            return NumpyVectorStore.exists(self.chroma_db_dir, collection_name)
+        return os.path.exists(os.path.join(self.chroma_db_dir, "chroma.sqlite3"))
 
     def setup_chromadb_vector_store(self, collection_name="default_collection"):
         if self.embedding_model is None:
@@ -140,92 +241,331 @@ class HybridRAGPipeline:
             os.makedirs(self.chroma_db_dir)
 
         persist_dir = self.chroma_db_dir
+        vector_store_class = self.vector_store_class()
 
-        chroma_db_path = os.path.join(persist_dir, "chroma.sqlite3")
-
-        print("Chroma DB path:", chroma_db_path)
+        print("Vector store backend:", self.vector_store_backend)
         print("Collection name:", collection_name)
         print("Persist directory:", persist_dir)
+        self.ingestion_manifest_dir = persist_dir
 
 
         # Check if the DB already exists
-        if os.path.exists(chroma_db_path):
-            print("Loading existing Chroma DB...")
-            self.chromadbDocSearch = Chroma(
+        if self.vector_store_exists(collection_name):
+            print("Loading existing vector store...")
+            self.ingestion_manifest = load_ingestion_manifest(persist_dir)
+            self.chromadbDocSearch = vector_store_class(
                 collection_name=collection_name,
                 embedding_function=self.embedding_model,
-                persist_directory=persist_dir
+                persist_directory=persist_dir,
+                **self.vector_store_kwargs()
             )
             
-            # Load existing documents from the DB to populate filtered_docs for BM25
-            print("Loading existing documents from Chroma DB for BM25 retriever...")
-            # Get all documents from the existing collection
-            all_docs = self.chromadbDocSearch.get()
-            if all_docs and 'ids' in all_docs:
-                # Retrieve the actual document content using the IDs
-                self.filtered_docs = []
-                for doc_id in all_docs['ids']:
-                    doc = self.chromadbDocSearch.get(ids=[doc_id])
-                    if doc and 'documents' in doc and doc['documents']:
-                        # Create Document objects with the retrieved content
-                        content = doc['documents'][0]
-                        metadata = doc['metadatas'][0] if doc['metadatas'] else {}
-                        document = Document(
-                            page_content=content,
-                            metadata=metadata,
-                            id=doc_id
-                        )
-                        self.filtered_docs.append(document)
-                print(f"Loaded {len(self.filtered_docs)} existing documents from Chroma DB")
-            else:
-                print("No existing documents found in Chroma DB")
-                self.filtered_docs = []
+            # Load existing chunks from the DB (in one call) to populate the chunk store for BM25
+            print("Loading existing documents from vector store for BM25 retriever...")
+            chunk_store = self.load_chunk_store()
 
         else:
-            print("Creating new Chroma DB...")
+            print("Creating new vector store...")
+            ingestion_manifest = build_ingestion_manifest(self.file_paths)
             documents = self.load_documents()
-            text_splitter = RecursiveCharacterTextSplitter.from_language(
-                chunk_size=1000,
-                chunk_overlap=0,
-                language=Language.MARKDOWN,
+            filtered_docs = self.split_documents(documents)
+            
+            chunk_store = ChunkStore.from_documents(filtered_docs)
+            self.chromadbDocSearch = vector_store_class.from_documents(
+                filtered_docs, 
+                self.embedding_model, 
+                collection_name=collection_name,
+                persist_directory=persist_dir,
+                **self.vector_store_kwargs()
             )
-            split_docs = text_splitter.split_documents(documents)
+            self.ingestion_manifest = ingestion_manifest
+            save_ingestion_manifest(persist_dir, ingestion_manifest)
 
-            # filtered_docs = [doc for doc in split_docs if len(doc.page_content.strip()) >= 100]
-            for chunk in split_docs:
-                if len(chunk.page_content.strip()) < 100:
-                    continue
+        self.setup_bm25_vector_store(chunk_store)
+        if isinstance(self.chromadbDocSearch, NumpyVectorStore):
+            # serve texts and metadata from the chunk store instead of keeping a second copy
+            self.chromadbDocSearch.attach_chunk_store(chunk_store)
+        self.corpus_version = uuid4().hex
 
-                # Create a unique ID for the chunk
-                chunk_id = str(uuid4())
+        return self.chromadbDocSearch, self.chunk_store
 
-                # Add/Update metadata to include original and chunk IDs
-                new_metadata = dict(chunk.metadata)
-                # new_metadata["scrape_id"] = original_id  # original document id
-                new_metadata["chunk_id"] = chunk_id      # unique chunk id
+    def load_chunk_store(self) -> ChunkStore:
+        """
+        Build the chunk store from the chunks in the vector store.
+        """
+        all_docs = self.chromadbDocSearch.get(include=["documents", "metadatas"])
+        if not all_docs or not all_docs.get('ids'):
+            print("No existing documents found in vector store")
+            return ChunkStore()
+        metadatas = []
+        for doc_id, metadata in zip(all_docs['ids'], all_docs['metadatas']):
+            metadata = dict(metadata or {})
+            metadata.setdefault("chunk_id", doc_id)
+            metadatas.append(metadata)
+        chunk_store = ChunkStore.from_texts(all_docs['documents'], metadatas)
+        print(f"Loaded {len(chunk_store)} existing documents from vector store")
+        return chunk_store
+
+    def sync_index(self):
+        """
+        Pick up an index update another worker process published to the
+        shared NumPy store: reload the store and rebuild the chunk store, BM25
+        index and ingestion manifest from it. Costs one ``stat`` when nothing
+        changed.
+        """
+        vector_store = self.chromadbDocSearch
+        if isinstance(vector_store, NumpyVectorStore) and vector_store.is_stale():
+            with self.index_lock:
+                self._reload_index()
+
+    def _reload_index(self):
+        # callers hold index_lock
+        vector_store = self.chromadbDocSearch
+        if not isinstance(vector_store, NumpyVectorStore) or not vector_store.refresh():
+            return
+        print(f"Vector store version {vector_store.version} was published by another worker, reloading")
+        chunk_store = self.load_chunk_store()
+        self.setup_bm25_vector_store(chunk_store)
+        vector_store.attach_chunk_store(chunk_store)
+        self.ingestion_manifest = load_ingestion_manifest(self.ingestion_manifest_dir)
+        self.corpus_version = uuid4().hex
+
+    def warm_up(self):
+        """
+        Open (or build) the vector store and the BM25 index ahead of the first query.
+        """
+        if not self.chromadbDocSearch:
+            self.setup_chromadb_vector_store()
 
-                # Replace metadata with new metadata
-                chunk.metadata = new_metadata
+    def reindex_files(self, file_paths: List[str], skip_unchanged: bool = False) -> Dict[str, Any]:
+        """
+        Re-split and re-embed only the given pages and update the index in
+        place by ``chunk_id``. Chunks whose text did not change keep their id
+        and embedding; pages that no longer exist (or are not english) are
+        removed from the index.
+
+        The new chunk store and BM25 index are published together as one
+        ``IndexState`` after the new vectors are added and before the old ones
+        are deleted; vector hits unknown to the current state are ignored, so
+        queries never see a half-applied update. ``NumpyVectorStore`` swaps
+        to the new rows (resolved through the new chunk store) in one step.
+        With the NumPy backend the update holds the store's cross-process
+        write lock and starts from the version other workers published.
+
+        Args:
+            file_paths (List[str]): Page files that changed.
+            skip_unchanged (bool): Skip files whose size and mtime match the
+                ingestion manifest (used by the file watcher).
+
+        Returns:
+            dict: Per-file chunk counts and timings, the batched embedding time and
+            the ids of the chunks that were removed or replaced.
+        """
+        if not self.chromadbDocSearch:
+            self.setup_chromadb_vector_store()
 
-                self.filtered_docs.append(chunk)            
+        # the store's write lock keeps other worker processes out until the update is published
+        with self.index_lock, vector_store_write_lock(self.chromadbDocSearch):
+            # start from what other workers published, so their changes are not overwritten
+            self._reload_index()
+            files = {}
+            removed_ids, added_chunks = [], []
+            for file_path in file_paths:
+                file_start = time.perf_counter()
+                # stat before reading, so a write racing with us shows up as a change next time
+                stat = build_ingestion_manifest([file_path]).get(file_path)
+                if skip_unchanged and stat == self.ingestion_manifest.get(file_path):
+                    continue
+                try:
+                    doc, _ = self.load_page(file_path)
+                except (OSError, ValueError) as e:
+                    # e.g. a page that is still being written; retried on its next event
+                    files[file_path] = {"error": str(e)}
+                    continue
+                new_chunks = self.split_documents([doc]) if doc is not None else []
+                existing = self.chromadbDocSearch.get(where={"file_path": file_path}, include=["documents", "metadatas"])
+                kept, removed, added = match_chunks(existing["ids"], existing["documents"], existing["metadatas"], new_chunks)
+                removed_ids.extend(removed)
+                added_chunks.extend(added)
+
+                if stat is not None:
+                    self.ingestion_manifest[file_path] = stat
+                else:
+                    self.ingestion_manifest.pop(file_path, None)
+                if doc is not None and file_path not in self.file_paths:
+                    self.file_paths.append(file_path)
+                elif doc is None and file_path in self.file_paths and not os.path.exists(file_path):
+                    self.file_paths.remove(file_path)
+                files[file_path] = {
+                    "chunks_kept": len(kept),
+                    "chunks_removed": len(removed),
+                    "chunks_added": len(added),
+                    "reindex_ms": round((time.perf_counter() - file_start) * 1000, 2),
+                }
+
+            if not removed_ids and not added_chunks:
+                self.persist_ingestion_manifest()
+                return {"files": files, "embed_ms": 0.0, "removed_chunk_ids": []}
+
+            index_state = self.index_state
+            chunk_store = index_state.chunk_store
+            new_chunk_store = chunk_store.updated(removed_ids,
+                                                  [chunk.page_content for chunk in added_chunks],
+                                                  [chunk.metadata for chunk in added_chunks])
+            removed_texts = {}
+            for chunk_id in removed_ids:
+                index = chunk_store.index_of(chunk_id)
+                if index is not None:
+                    removed_texts[index] = chunk_store.text(index)
+            added_texts = {new_chunk_store.index_of(chunk.metadata["chunk_id"]): chunk.page_content for chunk in added_chunks}
+            new_lexical_index = index_state.lexical_index.updated(removed_texts, added_texts, new_chunk_store.num_slots)
+            if new_chunk_store.needs_compaction():
+                # drop tombstones and dead text so repeated updates do not grow the index
+                new_chunk_store, remap = new_chunk_store.compacted()
+                new_lexical_index = new_lexical_index.compacted(remap, new_chunk_store.num_slots)
+
+            # one batched embedding call for all new chunks
+            embed_start = time.perf_counter()
+            is_numpy = isinstance(self.chromadbDocSearch, NumpyVectorStore)
+            if is_numpy:
+                self.chromadbDocSearch.replace(removed_ids,
+                                               [chunk.page_content for chunk in added_chunks],
+                                               [chunk.metadata for chunk in added_chunks],
+                                               ids=[chunk.metadata["chunk_id"] for chunk in added_chunks],
+                                               chunk_store=new_chunk_store)
+            elif added_chunks:
+                self.chromadbDocSearch.add_documents(added_chunks, ids=[chunk.metadata["chunk_id"] for chunk in added_chunks])
+            embed_ms = round((time.perf_counter() - embed_start) * 1000, 2)
+
+            self.index_state = IndexState(new_chunk_store, new_lexical_index, version=index_state.version + 1)
+
+            if removed_ids and not is_numpy:
+                self.chromadbDocSearch.delete(ids=removed_ids)
+
+            self.persist_ingestion_manifest()
+
+        return {"files": files, "embed_ms": embed_ms, "removed_chunk_ids": removed_ids}
+
+    def persist_ingestion_manifest(self):
+        if self.ingestion_manifest_dir:
+            save_ingestion_manifest(self.ingestion_manifest_dir, self.ingestion_manifest)
+
+    def indexed_file_paths(self) -> List[str]:
+        """
+        Page files that currently have chunks in the index.
+        """
+        if not self.chromadbDocSearch:
+            self.setup_chromadb_vector_store()
+        chunk_store = self.chunk_store
+        return list({chunk_store.pages[chunk_store.chunks[i].page].file_path for i in chunk_store})
 
-            print(f"Total split docs before filtering: {len(split_docs)}")
-            print(f"Total split docs after filtering: {len(self.filtered_docs)}")
-            
-            self.chromadbDocSearch = Chroma.from_documents(
-                self.filtered_docs, 
-                self.embedding_model, 
-                collection_name=collection_name,
-                persist_directory=persist_dir
-            )
+    def changed_files(self) -> List[str]:
+        """
+        Page files under ``doc_dir_path`` that were added, removed or modified
+        since they were indexed. Without an ingestion manifest (a vector store
+        built before manifests were recorded) only added and removed pages can
+        be detected; the current files become the baseline.
+        """
+        self.sync_index()
+        on_disk = build_ingestion_manifest(list_page_files(self.doc_dir_path)) if self.doc_dir_path else {}
+        if not self.ingestion_manifest:
+            indexed = set(self.indexed_file_paths())
+            self.ingestion_manifest = {path: stat for path, stat in on_disk.items() if path in indexed}
+            self.persist_ingestion_manifest()
+            return sorted((indexed - on_disk.keys()) | (on_disk.keys() - indexed))
+        return diff_ingestion_manifest(self.ingestion_manifest, on_disk)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Approximate in-memory size of the index in bytes, per component and in total.
+        """
+        index_state = self.index_state
+        usage = {
+            "chunk_store": index_state.chunk_store.nbytes if index_state else 0,
+            "lexical_index": index_state.lexical_index.nbytes if index_state else 0,
+            "vector_store": vector_store_nbytes(self.chromadbDocSearch),
+        }
+        usage["total"] = sum(usage.values())
+        return usage
+
+    def snapshot_metadata(self) -> Dict[str, Any]:
+        return {
+            "pipeline": type(self).__name__,
+            "embedding_model": getattr(self.embedding_model, "model", None),
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+        }
 
-        return self.chromadbDocSearch, self.filtered_docs
+    def export_snapshot(self, snapshot_path: str) -> Dict[str, Any]:
+        """
+        Export the index (chunks, vectors, BM25 postings, ingestion manifest)
+        to a single snapshot file. Builds the vector store first if needed.
+        """
+        if not self.chromadbDocSearch:
+            self.setup_chromadb_vector_store()
+        self.sync_index()
+        return export_snapshot(snapshot_path, self.chromadbDocSearch,
+                               ingestion_manifest=self.ingestion_manifest,
+                               metadata=self.snapshot_metadata())
+
+    def load_snapshot(self, snapshot_path: str, verify: bool = True):
+        """
+        Serve from a snapshot instead of building or opening the vector store.
+        Vectors are memory-mapped and searched with ``NumpyVectorStore``.
+        """
+        start = time.perf_counter()
+        snapshot = load_snapshot(snapshot_path, verify=verify)
+        expected = self.snapshot_metadata()
+        for key in ("embedding_model", "chunk_size", "chunk_overlap"):
+            if snapshot.manifest["metadata"].get(key) != expected[key]:
+                print(f"Warning: snapshot {key}={snapshot.manifest['metadata'].get(key)} does not match pipeline {key}={expected[key]}")
+        self.index_state = IndexState(snapshot.chunk_store, snapshot.lexical_index, version=self.index_version + 1)
+        self.corpus_version = uuid4().hex
+        self.chromadbDocSearch = snapshot.vector_store(self.embedding_model,
+                                                       embedding_dtype=self.embedding_dtype,
+                                                       rescore_factor=self.rescore_factor)
+        self.ingestion_manifest = snapshot.ingestion_manifest
+        self.ingestion_manifest_dir = None
+        print(f"Loaded snapshot {snapshot_path} ({snapshot.manifest['num_chunks']} chunks) in {time.perf_counter() - start:.2f}s")
+        return snapshot
+
+    def fuse_rankings(self, rankings: List[List[int]], weights: List[float], c: int = 60) -> List[int]:
+        """
+        Weighted reciprocal rank fusion of several rankings of chunk indices
+        (same scoring as LangChain's ``EnsembleRetriever``).
+        """
+        fused_scores: Dict[int, float] = {}
+        for ranking, weight in zip(rankings, weights):
+            for rank, index in enumerate(ranking, start=1):
+                fused_scores[index] = fused_scores.get(index, 0.0) + weight / (rank + c)
+        return sorted(fused_scores, key=fused_scores.get, reverse=True)
 
 
 
-    def retrieve_documents(self, query: str, use_preprocessing: bool = True) -> Tuple[List[Tuple[Document, float]], Dict[str, Any]]:
+    def resolve_filter(self, index_state: IndexState, metadata_filter: MetadataFilter, retrieval_info: Dict[str, Any]) -> Tuple[Optional[np.ndarray], Optional[Dict[str, Any]]]:
         """
-        Retrieve relevant documents with optional query preprocessing.
+        Turn a page-level ``metadata_filter`` into a chunk mask for the BM25
+        posting lists and a ``where`` clause for the vector store, so both
+        searches only score the selected pages. Returns (None, None) without
+        a filter.
+        """
+        if not metadata_filter:
+            return None, None
+        chunk_store = index_state.chunk_store
+        pages = [i for i, page in enumerate(chunk_store.pages)
+                 if metadata_filter.matches(page.title, page.source_url, page.file_path)]
+        mask = chunk_store.chunk_mask(pages)
+        retrieval_info['metadata_filter'] = {**metadata_filter.to_dict(), 'candidate_chunks': int(mask.sum())}
+        return mask, metadata_filter.where([chunk_store.pages[i].file_path for i in pages])
+
+    def retrieve_documents(self, query: str, use_preprocessing: bool = True, metadata_filter: MetadataFilter = None,
+                           query_embedding: List[float] = None) -> Tuple[List[Tuple[Document, float]], Dict[str, Any]]:
+        """
+        Retrieve relevant documents with optional query preprocessing, only
+        among the pages selected by ``metadata_filter`` if given.
+        ``query_embedding`` (the caller's embedding of ``query``) is used for
+        the vector search instead of embedding the query again, unless the
+        query was rewritten.
         """
         retrieval_info = {
             'original_query': query,
@@ -233,6 +573,19 @@ class HybridRAGPipeline:
             'preprocessing_info': {},
             'retrieval_metrics': {}
         }
+
+        if not self.chromadbDocSearch:
+            self.setup_chromadb_vector_store()
+        self.sync_index()
+
+        # read the index state once: chunk store and BM25 index always match
+        index_state = self.index_state
+        chunk_store = index_state.chunk_store
+        mask, where = self.resolve_filter(index_state, metadata_filter, retrieval_info)
+        if mask is not None and not mask.any():
+            # nothing to search: skip query rewriting as well
+            retrieval_info['retrieval_metrics'] = {'total_docs_retrieved': 0}
+            return [], retrieval_info
         
         # Preprocess query if enabled
         if use_preprocessing and self.query_preprocessor:
@@ -241,25 +594,22 @@ class HybridRAGPipeline:
             retrieval_info['improved_query'] = improved_query
             query = improved_query
         
-        if self.documents is None:
-            self.load_documents()
-
         # Perform retrieval
-        if not self.chromadbDocSearch:
-            self.setup_chromadb_vector_store()
-            # NOTE: not called--> self.setup_bm25_vector_store()
-
-
-        retriever_chromadb = self.chromadbDocSearch.as_retriever(search_kwargs={"k": self.top_k_docs})
-        bm25_retriever = BM25Retriever.from_documents(documents=self.filtered_docs)
-        bm25_retriever.k = self.top_k_docs
+        bm25_ranking = [index for index, _ in index_state.lexical_index.search(query, k=self.top_k_docs, mask=mask)]
 
-
-        # Initialize the ensemble retriever
-        ensemble_retriever = EnsembleRetriever(retrievers=[bm25_retriever, retriever_chromadb],
-                                       weights=[0.4, 0.6])
-
-        found_docs = ensemble_retriever.get_relevant_documents(query=query)
+        if query_embedding is not None and query == retrieval_info['original_query']:
+            vector_hits = self.chromadbDocSearch.similarity_search_by_vector(query_embedding, k=self.top_k_docs, filter=where)
+        else:
+            vector_hits = self.chromadbDocSearch.similarity_search(query, k=self.top_k_docs, filter=where)
+        vector_ranking = []
+        for doc in vector_hits:
+            index = chunk_store.index_of(doc.metadata.get("chunk_id", doc.id))
+            if index is not None:
+                vector_ranking.append(index)
+
+        # Fuse both rankings and materialize Documents only for the returned chunks
+        fused = self.fuse_rankings([bm25_ranking, vector_ranking], weights=self.fusion_weights)
+        found_docs = [chunk_store.to_document(index) for index in fused]
         
         # print(found_docs)
         # Add retrieval metrics
@@ -271,3 +621,73 @@ class HybridRAGPipeline:
         }
         
         return found_docs, retrieval_info
+
+    def retrieve_documents_batch(self, queries: List[str], use_preprocessing: bool = True, metadata_filter: MetadataFilter = None) -> Tuple[List[List[Document]], Dict[str, Any]]:
+        """
+        Retrieve documents for several queries at once: queries are improved
+        with concurrent LLM calls, embedded with one embeddings call and scored
+        against the vector store in one batch. ``metadata_filter`` applies to
+        every query.
+
+        Returns:
+            Tuple of (one list of documents per query, retrieval_info). A chunk
+            found by several queries is the same ``Document`` object in each list.
+        """
+        retrieval_info = {
+            'original_queries': list(queries),
+            'query_transformation_applied': False,
+            'retrieval_metrics': {}
+        }
+
+        if not self.chromadbDocSearch:
+            self.setup_chromadb_vector_store()
+        self.sync_index()
+
+        # read the index state once: chunk store and BM25 index always match
+        index_state = self.index_state
+        chunk_store = index_state.chunk_store
+        mask, where = self.resolve_filter(index_state, metadata_filter, retrieval_info)
+        if mask is not None and not mask.any():
+            # nothing to search: skip query rewriting and embedding as well
+            retrieval_info['retrieval_metrics'] = {'total_docs_retrieved': 0, 'unique_docs_retrieved': 0}
+            return [[] for _ in queries], retrieval_info
+
+        start = time.perf_counter()
+        if use_preprocessing and self.query_preprocessor:
+            queries = self.query_preprocessor.improve_queries_with_llm(queries, max_concurrency=self.llm_max_concurrency)
+            retrieval_info['query_transformation_applied'] = True
+            retrieval_info['improved_queries'] = queries
+        preprocess_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        start = time.perf_counter()
+        query_embeddings = embed_queries(self.embedding_model, queries)
+        embed_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        start = time.perf_counter()
+        vector_hits = batch_similarity_search(self.chromadbDocSearch, query_embeddings, k=self.top_k_docs, filter=where)
+
+        # fuse per query, but materialize every chunk only once across the batch
+        documents: Dict[int, Document] = {}
+        results = []
+        for query, hits in zip(queries, vector_hits):
+            bm25_ranking = [index for index, _ in index_state.lexical_index.search(query, k=self.top_k_docs, mask=mask)]
+            vector_ranking = []
+            for doc in hits:
+                index = chunk_store.index_of(doc.metadata.get("chunk_id", doc.id))
+                if index is not None:
+                    vector_ranking.append(index)
+            fused = self.fuse_rankings([bm25_ranking, vector_ranking], weights=self.fusion_weights)
+            for index in fused:
+                if index not in documents:
+                    documents[index] = chunk_store.to_document(index)
+            results.append([documents[index] for index in fused])
+        search_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        retrieval_info['retrieval_metrics'] = {
+            'total_docs_retrieved': sum(len(found_docs) for found_docs in results),
+            'unique_docs_retrieved': len(documents),
+            'preprocess_ms': preprocess_ms,
+            'embed_ms': embed_ms,
+            'search_ms': search_ms,
+        }
+        return results, retrieval_info
@@ -1,19 +1,23 @@
-from calendar import c
 import warnings
 import os
 import json
+import time
+import threading
 from uuid import uuid4
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 
-from langchain.schema import Document
-from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import CharacterTextSplitter, MarkdownTextSplitter, RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
-from langchain.text_splitter import Language
+from langchain_core.documents import Document
 
-from fastapi_backend.helpers.llm_manager import LLMManager
+from fastapi_backend.helpers.index_state import ReadWriteLock
+from fastapi_backend.helpers.llm_manager import LLMManager, embed_queries
+from fastapi_backend.helpers.metadata_filter import MetadataFilter
+from fastapi_backend.helpers.numpy_vector_store import (NumpyVectorStore, batch_similarity_search, vector_store_nbytes,
+                                                        vector_store_pages, vector_store_write_lock)
 from fastapi_backend.helpers.query_transformation import QueryTransformer
+from fastapi_backend.helpers.chunk_store import match_chunks
 from fastapi_backend.helpers.document_cleaner import DocumentCleaner
+from fastapi_backend.helpers.snapshot import (build_ingestion_manifest, diff_ingestion_manifest, export_snapshot, list_page_files,
+                                              load_ingestion_manifest, load_snapshot, save_ingestion_manifest)
 
 
 
@@ -28,9 +32,14 @@ class VanillaRAGPipeline:
                 chunk_overlap: int = 0,
                 enable_query_preprocessing: bool = True,
                 enable_document_cleaning: bool = True,
+                vector_store_backend: str = "chroma",
+                embedding_dtype: str = "float32",
+                rescore_factor: int = 0,
+                llm_max_concurrency: int = 8,
                 ):
         warnings.filterwarnings("ignore")
         # get all filenames inside doc_dir_paths
+        self.doc_dir_path = doc_dir_path
         self.file_paths = []
         if doc_dir_path:
             for root, dirs, files in os.walk(doc_dir_path):
@@ -38,8 +47,20 @@ class VanillaRAGPipeline:
                     if file.endswith('.json'):
                         self.file_paths.append(os.path.join(root, file))
         
-        self.documents = None
         self.docSearch = None
+        self.ingestion_manifest = {}
+        # where the ingestion manifest is persisted (next to the vector store; None for snapshots)
+        self.ingestion_manifest_dir = None
+        # identifies the opened index; changes when it is rebuilt or reloaded (not on incremental updates)
+        self.corpus_version = None
+        # increases with every index update (see reindex_files)
+        self.index_version = 0
+        # (index_version, page metadata) used to resolve metadata filters
+        self.page_catalog_cache = None
+        # serializes index writers (approved changes, file watcher)
+        self.index_lock = threading.Lock()
+        # searches hold it shared; a Chroma update (upsert + delete) holds it exclusively
+        self.search_lock = ReadWriteLock()
         self.llm_model = llm_manager.llm_model if llm_manager else None
         self.embedding_model = llm_manager.embeddings if llm_manager else None
         self.qa = None
@@ -49,11 +70,68 @@ class VanillaRAGPipeline:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.chroma_db_dir = chroma_persist_dir
+        self.vector_store_backend = vector_store_backend
+        self.embedding_dtype = embedding_dtype
+        self.rescore_factor = rescore_factor
+        self.llm_max_concurrency = llm_max_concurrency
         self.query_preprocessor=QueryTransformer(llm_manager=llm_manager) if enable_query_preprocessing else None
+        self.document_cleaner = DocumentCleaner(llm_manager=llm_manager) if enable_document_cleaning else None
 
 
-    
+    def preprocess_query(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Preprocess the user query to improve retrieval.
+        """
+        if self.query_preprocessor:
+            improved_query = self.query_preprocessor.improve_query_with_llm(
+                query=query,
+            )
+            return improved_query
+        else:
+            return query
+
 
+    def load_page(self, file_path: str) -> Tuple[Document, Dict[str, Any]]:
+        """
+        Load and clean a single page file.
+
+        Returns:
+            Tuple of (document, cleaning_info). ``document`` is None for missing
+            or non-english pages; ``cleaning_info`` is None if cleaning is disabled.
+        """
+        if not file_path.endswith('.json'):
+            raise ValueError(f"Unsupported file format: {file_path}. Only JSON files are supported.")
+        if not os.path.exists(file_path):
+            return None, None
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        markdown = data.get("markdown", "")
+        metadata = data.get("metadata", {})
+
+        # Load only english language documents
+        if metadata.get("language", "") != "en":
+            return None, None
+
+        # apply document cleaning
+        cleaning_info = None
+        if self.document_cleaner:
+            markdown, cleaning_info = self.document_cleaner.clean_document(
+                markdown, 
+                use_llm=True
+            )
+
+        doc = Document(
+            page_content=markdown,
+            metadata={
+                "title": metadata.get("title", ""),
+                "source_url": metadata.get("sourceURL", ""),
+                "file_path": file_path,  # helpful for debugging
+                "scrape_id": metadata.get("scrapeId", "")
+            },
+            id=str(uuid4())
+        )
+        return doc, cleaning_info
 
     def load_documents(self):
         documents = []
@@ -62,68 +140,77 @@ class VanillaRAGPipeline:
             'cleaned_documents': 0,
             'total_reduction_percentage': 0,
         }
-
         for file_path in self.file_paths:
-            if file_path.endswith('.json'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    
-                    data = json.load(f)
-                    markdown = data.get("markdown", "")
-                    metadata = data.get("metadata", {})
-
-                    # Load only english language documents
-                    if metadata.get("language", "") != "en":
-                        continue
-
-                    cleaning_stats['total_documents'] += 1
-
-                    # apply document cleaning
-                    if self.document_cleaner:
-                        cleaned_content, cleaning_info = self.document_cleaner.clean_document(
-                            markdown, 
-                            use_llm=True
-                        )
-                        
-                        if cleaning_info['reduction_percentage'] > 0:
-                            cleaning_stats['cleaned_documents'] += 1
-                            cleaning_stats['total_reduction_percentage'] += cleaning_info['reduction_percentage']
-                        
-                        # Update metadata with cleaning info
-                        metadata['cleaning_info'] = cleaning_info
-                        markdown = cleaned_content
-                    else:
-                        markdown = markdown                        
-
-
-
-                    title = metadata.get("title", "")
-                    source_url = metadata.get("sourceURL", "")
-                    scrape_id = metadata.get("scrapeId", "")
-
-                    doc = Document(
-                        page_content=markdown,
-                        metadata={
-                            "title": title,
-                            "source_url": source_url,
-                            "file_path": file_path,  # helpful for debugging
-                            "scrape_id": scrape_id
-                        },
-                        id=str(uuid4())
-                    )
-                    documents.append(doc)
-            else:
-                raise ValueError(f"Unsupported file format: {file_path}. Only JSON files are supported.")
-        
-        # print("Debugging...")
-        # for i, doc in enumerate(documents):
-        #     print(f"\nRaw Document {i+1}:")
-        #     print(f"Length: {len(doc.page_content)} characters")
-        #     # print(f"Content:\n{doc.page_content}")
-        #     print(f"Metadata: {doc.metadata}")        
-
-        self.documents = documents
+            doc, cleaning_info = self.load_page(file_path)
+            if doc is None:
+                continue
+
+            cleaning_stats['total_documents'] += 1
+            if cleaning_info and cleaning_info['reduction_percentage'] > 0:
+                cleaning_stats['cleaned_documents'] += 1
+                cleaning_stats['total_reduction_percentage'] += cleaning_info['reduction_percentage']
+
+            documents.append(doc)
+
+        # NOTE: full pages are not kept around once they are split and embedded
         return documents
 
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Split pages into markdown-aware chunks, drop chunks shorter than 100
+        characters and give every chunk a unique ``chunk_id``.
+        """
+        from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+        text_splitter = RecursiveCharacterTextSplitter.from_language(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            language=Language.MARKDOWN,
+        )
+        split_docs = text_splitter.split_documents(documents)
+
+        filtered_docs = []
+        for chunk in split_docs:
+            if len(chunk.page_content.strip()) < 100:
+                continue
+
+            # Add/Update metadata to include a unique chunk id
+            new_metadata = dict(chunk.metadata)
+            new_metadata["chunk_id"] = str(uuid4())
+            chunk.metadata = new_metadata
+            chunk.id = new_metadata["chunk_id"]
+
+            filtered_docs.append(chunk)
+
+        print(f"Total split docs before filtering: {len(split_docs)}")
+        print(f"Total split docs after filtering: {len(filtered_docs)}")
+        return filtered_docs
+
+    def vector_store_class(self):
+        """
+        Return the vector store class selected by ``vector_store_backend``.
+        """
+        if self.vector_store_backend == "chroma":
+            from langchain_community.vectorstores import Chroma
+            return Chroma
+        elif self.vector_store_backend == "numpy":
+            return NumpyVectorStore
+        else:
+            raise ValueError(f"Unsupported vector store backend: {self.vector_store_backend}")
+
+    def vector_store_kwargs(self) -> Dict[str, Any]:
+        """
+        Backend specific keyword arguments for the vector store constructor.
+        """
+        if self.vector_store_backend == "numpy":
+            return {"embedding_dtype": self.embedding_dtype, "rescore_factor": self.rescore_factor}
+        return {}
+
+    def vector_store_exists(self, collection_name="default_collection") -> bool:
+        if self.vector_store_backend == "numpy":
+            return NumpyVectorStore.exists(self.chroma_db_dir, collection_name)
+        return os.path.exists(os.path.join(self.chroma_db_dir, "chroma.sqlite3"))
+
     def setup_vector_store(self, collection_name="default_collection"):
         if self.embedding_model is None:
             raise ValueError("Embedding model is not set")
@@ -132,67 +219,276 @@ class VanillaRAGPipeline:
             os.makedirs(self.chroma_db_dir)
 
         persist_dir = self.chroma_db_dir
+        vector_store_class = self.vector_store_class()
 
-        chroma_db_path = os.path.join(persist_dir, "chroma.sqlite3")
-
-        print("Chroma DB path:", chroma_db_path)
+        print("Vector store backend:", self.vector_store_backend)
         print("Collection name:", collection_name)
         print("Persist directory:", persist_dir)
+        self.ingestion_manifest_dir = persist_dir
 
         # Check if the DB already exists
-        if os.path.exists(chroma_db_path):
-            print("Loading existing Chroma DB...")
-            self.docSearch = Chroma(
+        if self.vector_store_exists(collection_name):
+            print("Loading existing vector store...")
+            self.ingestion_manifest = load_ingestion_manifest(persist_dir)
+            self.docSearch = vector_store_class(
                 collection_name=collection_name,
                 embedding_function=self.embedding_model,
-                persist_directory=persist_dir
+                persist_directory=persist_dir,
+                **self.vector_store_kwargs()
             )
         else:
-            print("Creating new Chroma DB...")
+            print("Creating new vector store...")
+            ingestion_manifest = build_ingestion_manifest(self.file_paths)
             documents = self.load_documents()
-            text_splitter = RecursiveCharacterTextSplitter.from_language(
-                chunk_size=1000,
-                chunk_overlap=0,
-                language=Language.MARKDOWN,
+            filtered_docs = self.split_documents(documents)
+            
+            self.docSearch = vector_store_class.from_documents(
+                filtered_docs, 
+                self.embedding_model, 
+                collection_name=collection_name,
+                persist_directory=persist_dir,
+                **self.vector_store_kwargs()
             )
-            split_docs = text_splitter.split_documents(documents)
+            self.ingestion_manifest = ingestion_manifest
+            save_ingestion_manifest(persist_dir, ingestion_manifest)
 
-            # filtered_docs = [doc for doc in split_docs if len(doc.page_content.strip()) >= 100]
-            filtered_docs = []
-            for chunk in split_docs:
-                if len(chunk.page_content.strip()) < 100:
-                    continue
+        self.index_version += 1
+        self.corpus_version = uuid4().hex
+        return self.docSearch
 
-                # Create a unique ID for the chunk
-                chunk_id = str(uuid4())
 
-                # Add/Update metadata to include original and chunk IDs
-                new_metadata = dict(chunk.metadata)
-                # new_metadata["scrape_id"] = original_id  # original document id
-                new_metadata["chunk_id"] = chunk_id      # unique chunk id
 
-                # Replace metadata with new metadata
-                chunk.metadata = new_metadata
+    def warm_up(self):
+        """
+        Open (or build) the vector store ahead of the first query.
+        """
+        if not self.docSearch:
+            self.setup_vector_store()
 
-                filtered_docs.append(chunk)            
+    def sync_index(self):
+        """
+        Pick up an index update another worker process published to the
+        shared NumPy store, together with its ingestion manifest. Costs one
+        ``stat`` when nothing changed.
+        """
+        if isinstance(self.docSearch, NumpyVectorStore) and self.docSearch.is_stale():
+            with self.index_lock:
+                self._reload_index()
+
+    def _reload_index(self):
+        # callers hold index_lock
+        if not isinstance(self.docSearch, NumpyVectorStore) or not self.docSearch.refresh():
+            return
+        print(f"Vector store version {self.docSearch.version} was published by another worker, reloading")
+        self.ingestion_manifest = load_ingestion_manifest(self.ingestion_manifest_dir)
+        self.index_version += 1
+        self.corpus_version = uuid4().hex
+
+    def reindex_files(self, file_paths: List[str], skip_unchanged: bool = False) -> Dict[str, Any]:
+        """
+        Re-split and re-embed only the given pages and update the index in
+        place by ``chunk_id``. Chunks whose text did not change keep their id
+        and embedding; pages that no longer exist (or are not english) are
+        removed from the index. With the NumPy backend the update holds the
+        store's cross-process write lock and starts from the version other
+        workers published.
+
+        Queries see the index either before or after the whole update: the
+        NumPy store swaps the removed rows for the new ones in one step; with
+        Chroma the new chunks are embedded first, then upserted and the old
+        ones deleted while ``search_lock`` is held exclusively.
+
+        Args:
+            file_paths (List[str]): Page files that changed.
+            skip_unchanged (bool): Skip files whose size and mtime match the
+                ingestion manifest (used by the file watcher).
+
+        Returns:
+            dict: Per-file chunk counts and timings, the batched embedding time and
+            the ids of the chunks that were removed or replaced.
+        """
+        if not self.docSearch:
+            self.setup_vector_store()
 
-            print(f"Total split docs before filtering: {len(split_docs)}")
-            print(f"Total split docs after filtering: {len(filtered_docs)}")
-            
-            self.docSearch = Chroma.from_documents(
-                filtered_docs, 
-                self.embedding_model, 
-                collection_name=collection_name,
-                persist_directory=persist_dir
-            )
+        with self.index_lock, vector_store_write_lock(self.docSearch):
+            # start from what other workers published, so their changes are not overwritten
+            self._reload_index()
+            files = {}
+            removed_ids, added_chunks = [], []
+            for file_path in file_paths:
+                file_start = time.perf_counter()
+                # stat before reading, so a write racing with us shows up as a change next time
+                stat = build_ingestion_manifest([file_path]).get(file_path)
+                if skip_unchanged and stat == self.ingestion_manifest.get(file_path):
+                    continue
+                try:
+                    doc, _ = self.load_page(file_path)
+                except (OSError, ValueError) as e:
+                    # e.g. a page that is still being written; retried on its next event
+                    files[file_path] = {"error": str(e)}
+                    continue
+                new_chunks = self.split_documents([doc]) if doc is not None else []
+                existing = self.docSearch.get(where={"file_path": file_path}, include=["documents", "metadatas"])
+                kept, removed, added = match_chunks(existing["ids"], existing["documents"], existing["metadatas"], new_chunks)
+                removed_ids.extend(removed)
+                added_chunks.extend(added)
+
+                if stat is not None:
+                    self.ingestion_manifest[file_path] = stat
+                else:
+                    self.ingestion_manifest.pop(file_path, None)
+                if doc is not None and file_path not in self.file_paths:
+                    self.file_paths.append(file_path)
+                elif doc is None and file_path in self.file_paths and not os.path.exists(file_path):
+                    self.file_paths.remove(file_path)
+                files[file_path] = {
+                    "chunks_kept": len(kept),
+                    "chunks_removed": len(removed),
+                    "chunks_added": len(added),
+                    "reindex_ms": round((time.perf_counter() - file_start) * 1000, 2),
+                }
+
+            if not removed_ids and not added_chunks:
+                self.persist_ingestion_manifest()
+                return {"files": files, "embed_ms": 0.0, "removed_chunk_ids": []}
+
+            texts = [chunk.page_content for chunk in added_chunks]
+            metadatas = [chunk.metadata for chunk in added_chunks]
+            ids = [chunk.metadata["chunk_id"] for chunk in added_chunks]
+            # one batched embedding call for all new chunks
+            embed_start = time.perf_counter()
+            if isinstance(self.docSearch, NumpyVectorStore):
+                self.docSearch.replace(removed_ids, texts, metadatas, ids=ids)
+                embed_ms = round((time.perf_counter() - embed_start) * 1000, 2)
+            else:
+                embeddings = self.embedding_model.embed_documents(texts) if texts else []
+                embed_ms = round((time.perf_counter() - embed_start) * 1000, 2)
+                with self.search_lock.writing():
+                    if ids:
+                        self.docSearch._collection.upsert(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+                    if removed_ids:
+                        self.docSearch.delete(ids=removed_ids)
+            self.index_version += 1
 
-        return self.docSearch
+            self.persist_ingestion_manifest()
+
+        return {"files": files, "embed_ms": embed_ms, "removed_chunk_ids": removed_ids}
+
+    def persist_ingestion_manifest(self):
+        if self.ingestion_manifest_dir:
+            save_ingestion_manifest(self.ingestion_manifest_dir, self.ingestion_manifest)
+
+    def indexed_file_paths(self) -> List[str]:
+        """
+        Page files that currently have chunks in the index.
+        """
+        if not self.docSearch:
+            self.setup_vector_store()
+        rows = self.docSearch.get(include=["metadatas"])
+        return list({(metadata or {}).get("file_path", "") for metadata in rows["metadatas"]} - {""})
 
+    def changed_files(self) -> List[str]:
+        """
+        Page files under ``doc_dir_path`` that were added, removed or modified
+        since they were indexed. Without an ingestion manifest (a vector store
+        built before manifests were recorded) only added and removed pages can
+        be detected; the current files become the baseline.
+        """
+        self.sync_index()
+        on_disk = build_ingestion_manifest(list_page_files(self.doc_dir_path)) if self.doc_dir_path else {}
+        if not self.ingestion_manifest:
+            indexed = set(self.indexed_file_paths())
+            self.ingestion_manifest = {path: stat for path, stat in on_disk.items() if path in indexed}
+            self.persist_ingestion_manifest()
+            return sorted((indexed - on_disk.keys()) | (on_disk.keys() - indexed))
+        return diff_ingestion_manifest(self.ingestion_manifest, on_disk)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Approximate in-memory size of the index in bytes, per component and in total.
+        """
+        # a vector store loaded from a snapshot resolves its texts through the snapshot's chunk store
+        chunk_store = self.docSearch.chunk_store if isinstance(self.docSearch, NumpyVectorStore) else None
+        usage = {
+            "chunk_store": chunk_store.nbytes if chunk_store is not None else 0,
+            "vector_store": vector_store_nbytes(self.docSearch),
+        }
+        usage["total"] = sum(usage.values())
+        return usage
+
+    def snapshot_metadata(self) -> Dict[str, Any]:
+        return {
+            "pipeline": type(self).__name__,
+            "embedding_model": getattr(self.embedding_model, "model", None),
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+        }
 
+    def export_snapshot(self, snapshot_path: str) -> Dict[str, Any]:
+        """
+        Export the index (chunks, vectors, BM25 postings, ingestion manifest)
+        to a single snapshot file. Builds the vector store first if needed.
+        """
+        if not self.docSearch:
+            self.setup_vector_store()
+        self.sync_index()
+        return export_snapshot(snapshot_path, self.docSearch,
+                               ingestion_manifest=self.ingestion_manifest,
+                               metadata=self.snapshot_metadata())
+
+    def load_snapshot(self, snapshot_path: str, verify: bool = True):
+        """
+        Serve from a snapshot instead of building or opening the vector store.
+        Vectors are memory-mapped and searched with ``NumpyVectorStore``.
+        """
+        start = time.perf_counter()
+        snapshot = load_snapshot(snapshot_path, verify=verify)
+        expected = self.snapshot_metadata()
+        for key in ("embedding_model", "chunk_size", "chunk_overlap"):
+            if snapshot.manifest["metadata"].get(key) != expected[key]:
+                print(f"Warning: snapshot {key}={snapshot.manifest['metadata'].get(key)} does not match pipeline {key}={expected[key]}")
+        self.docSearch = snapshot.vector_store(self.embedding_model,
+                                               embedding_dtype=self.embedding_dtype,
+                                               rescore_factor=self.rescore_factor)
+        self.ingestion_manifest = snapshot.ingestion_manifest
+        self.ingestion_manifest_dir = None
+        self.index_version += 1
+        self.corpus_version = uuid4().hex
+        print(f"Loaded snapshot {snapshot_path} ({snapshot.manifest['num_chunks']} chunks) in {time.perf_counter() - start:.2f}s")
+        return snapshot
+
+
+    def page_catalog(self) -> List[Dict[str, Any]]:
+        """
+        Page-level metadata of the indexed pages, read from the vector store
+        once per index version.
+        """
+        catalog = self.page_catalog_cache
+        if catalog is None or catalog[0] != self.index_version:
+            catalog = (self.index_version, vector_store_pages(self.docSearch))
+            self.page_catalog_cache = catalog
+        return catalog[1]
 
-    def retrieve_documents(self, query: str, use_preprocessing: bool = True) -> Tuple[List[Tuple[Document, float]], Dict[str, Any]]:
+    def resolve_filter(self, metadata_filter: MetadataFilter, retrieval_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Turn a page-level ``metadata_filter`` into a ``where`` clause for the
+        vector store, so only the selected pages are scored. Returns None
+        without a filter and an empty clause if no page matches.
         """
-        Retrieve relevant documents with optional query preprocessing.
+        if not metadata_filter:
+            return None
+        file_paths = metadata_filter.matching_files(self.page_catalog())
+        retrieval_info['metadata_filter'] = {**metadata_filter.to_dict(), 'candidate_pages': len(file_paths)}
+        return metadata_filter.where(file_paths) if file_paths else {}
+
+    def retrieve_documents(self, query: str, use_preprocessing: bool = True, metadata_filter: MetadataFilter = None,
+                           query_embedding: List[float] = None) -> Tuple[List[Tuple[Document, float]], Dict[str, Any]]:
+        """
+        Retrieve relevant documents with optional query preprocessing, only
+        among the pages selected by ``metadata_filter`` if given.
+        ``query_embedding`` (the caller's embedding of ``query``) is used for
+        the vector search instead of embedding the query again, unless the
+        query was rewritten.
         """
         retrieval_info = {
             'original_query': query,
@@ -200,6 +496,16 @@ class VanillaRAGPipeline:
             'preprocessing_info': {},
             'retrieval_metrics': {}
         }
+
+        if not self.docSearch:
+            self.setup_vector_store()
+        self.sync_index()
+
+        where = self.resolve_filter(metadata_filter, retrieval_info)
+        if where == {}:
+            # nothing to search: skip query rewriting as well
+            retrieval_info['retrieval_metrics'] = {'total_docs_retrieved': 0}
+            return [], retrieval_info
         
         # Preprocess query if enabled
         if use_preprocessing and self.query_preprocessor:
@@ -207,19 +513,19 @@ class VanillaRAGPipeline:
             retrieval_info['query_transformation_applied'] = True
             retrieval_info['improved_query'] = improved_query
             query = improved_query
-        
-        if self.documents is None:
-            self.load_documents()
 
         # Perform retrieval
-        if not self.chromadbDocSearch:
-            self.setup_chromadb_vector_store()
-            # NOTE: not called--> self.setup_bm25_vector_store()
+        search_kwargs = {"k": self.top_k_docs}
+        if where:
+            search_kwargs["filter"] = where
+        retriever_chromadb = self.docSearch.as_retriever(search_kwargs=search_kwargs)
 
-        retriever_chromadb = self.chromadbDocSearch.as_retriever(search_kwargs={"k": self.top_k_docs})
 
-
-        found_docs = retriever_chromadb.get_relevant_documents(query=query)
+        with self.search_lock.reading():
+            if query_embedding is not None and query == retrieval_info['original_query']:
+                found_docs = self.docSearch.similarity_search_by_vector(query_embedding, **search_kwargs)
+            else:
+                found_docs = retriever_chromadb.get_relevant_documents(query=query)
         
         # print(found_docs)
         # Add retrieval metrics
@@ -233,12 +539,76 @@ class VanillaRAGPipeline:
         return found_docs, retrieval_info
 
     
+    def retrieve_documents_batch(self, queries: List[str], use_preprocessing: bool = True, metadata_filter: MetadataFilter = None) -> Tuple[List[List[Document]], Dict[str, Any]]:
+        """
+        Retrieve documents for several queries at once: queries are improved
+        with concurrent LLM calls, embedded with one embeddings call and scored
+        against the vector store in one batch. ``metadata_filter`` applies to
+        every query.
+
+        Returns:
+            Tuple of (one list of documents per query, retrieval_info). A chunk
+            found by several queries is the same ``Document`` object in each list.
+        """
+        retrieval_info = {
+            'original_queries': list(queries),
+            'query_transformation_applied': False,
+            'retrieval_metrics': {}
+        }
+
+        if not self.docSearch:
+            self.setup_vector_store()
+        self.sync_index()
+
+        where = self.resolve_filter(metadata_filter, retrieval_info)
+        if where == {}:
+            # nothing to search: skip query rewriting and embedding as well
+            retrieval_info['retrieval_metrics'] = {'total_docs_retrieved': 0, 'unique_docs_retrieved': 0}
+            return [[] for _ in queries], retrieval_info
+
+        start = time.perf_counter()
+        if use_preprocessing and self.query_preprocessor:
+            queries = self.query_preprocessor.improve_queries_with_llm(queries, max_concurrency=self.llm_max_concurrency)
+            retrieval_info['query_transformation_applied'] = True
+            retrieval_info['improved_queries'] = queries
+        preprocess_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        start = time.perf_counter()
+        query_embeddings = embed_queries(self.embedding_model, queries)
+        embed_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        start = time.perf_counter()
+        with self.search_lock.reading():
+            vector_hits = batch_similarity_search(self.docSearch, query_embeddings, k=self.top_k_docs, filter=where)
+
+        # share one Document per chunk across the batch
+        documents: Dict[str, Document] = {}
+        results = []
+        for hits in vector_hits:
+            found_docs = []
+            for doc in hits:
+                chunk_id = doc.metadata.get("chunk_id", doc.id)
+                found_docs.append(documents.setdefault(chunk_id, doc))
+            results.append(found_docs)
+        search_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        retrieval_info['retrieval_metrics'] = {
+            'total_docs_retrieved': sum(len(found_docs) for found_docs in results),
+            'unique_docs_retrieved': len(documents),
+            'preprocess_ms': preprocess_ms,
+            'embed_ms': embed_ms,
+            'search_ms': search_ms,
+        }
+        return results, retrieval_info
+
     def setup_qa_chain(self):
         """
         User can interact with the documentation and get a summarized response.
         In the current implementation, we haven't used qa chain. 
         It can be easily incorporated by using a query classifier which decides if the query is about document retrieval or summarization.
         """
+        from langchain.chains import RetrievalQA
+
         if self.llm_model is None:
             raise ValueError("LLM model is not set")
         if self.docSearch is None:
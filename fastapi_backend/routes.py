@@ -1,19 +1,151 @@
-from fastapi import FastAPI
+import os
+import time
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
-from langchain.schema import Document
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from typing import List, Tuple
+from langchain_core.documents import Document
 import uvicorn
 
 from fastapi_backend.config import settings
-from fastapi_backend.helpers.prompts.diff_suggestion_prompt import system_prompt
+from fastapi_backend.helpers.change_applier import ChangeApplier, group_updates_by_file
+from fastapi_backend.helpers.context_packer import ContextPacker
+from fastapi_backend.helpers.doc_watcher import DocumentWatcher
+from fastapi_backend.helpers.edit_operations import EditApplyError, edit_output_to_model_output
 from fastapi_backend.helpers.llm_manager import LLMManager
+from fastapi_backend.helpers.metadata_filter import MetadataFilter
+from fastapi_backend.helpers.profiling import RequestProfiler, sample_stacks
 from fastapi_backend.helpers.prompts import diff_suggestion_prompt
-from fastapi_backend.pipelines.vanilla_rag_pipeline import VanillaRAGPipeline
-from fastapi_backend.pipelines.hybrid_rag_pipeline import HybridRAGPipeline
-from fastapi_backend.models import ModelOutput, DocumentMetadata, DocumentUpdate
+from fastapi_backend.helpers.response_encoding import FastJSONResponse, update_payload
+from fastapi_backend.helpers.semantic_cache import SemanticCache
+from fastapi_backend.pipelines.corpus_registry import CorpusRegistry, UnknownCorpusError, corpus_names, corpus_settings
+from fastapi_backend.pipelines.factory import create_rag_pipeline
+from fastapi_backend.models import ModelOutput, EditOutput, DocumentMetadata, DocumentUpdate, BatchRetrieveResponse, FileApplyResult, ApplyChangesResponse
 
 
-app = FastAPI()
+# LLM manager and corpus registry are built in the application lifespan, not at import time
+llm_manager = None
+corpus_registry = None
+doc_watchers = {}
+answer_caches = {}
+pipeline_ready = threading.Event()
+startup_error = None
+# only built when profiling is enabled; otherwise endpoints run unwrapped
+request_profiler = RequestProfiler(history=settings.PROFILE_HISTORY, profile_dir=settings.PROFILE_DIR or None) if settings.PROFILING_ENABLED else None
+sampling_lock = threading.Lock()
+
+
+def profiled(fn):
+    """
+    Make an endpoint profilable on request (no-op unless profiling is enabled).
+    """
+    return request_profiler.profiled(fn) if request_profiler is not None else fn
+
+
+def load_corpus(name: str):
+    """
+    Build the RAG pipeline of corpus ``name`` and load its snapshot or warm up
+    its index; start its file watcher if enabled.
+    """
+    corpus = corpus_settings(settings, name)
+    pipeline = create_rag_pipeline(llm_manager, corpus)
+    if corpus.SNAPSHOT_PATH and os.path.exists(corpus.SNAPSHOT_PATH):
+        pipeline.load_snapshot(corpus.SNAPSHOT_PATH, verify=corpus.SNAPSHOT_VERIFY)
+    else:
+        pipeline.warm_up()
+
+    if corpus.WATCH_DOC_DIR:
+        doc_watcher = DocumentWatcher(corpus.DOC_DIR_PATH,
+                                      on_change=lambda paths: reindex_corpus(name, pipeline, paths, skip_unchanged=True),
+                                      debounce_seconds=corpus.WATCH_DEBOUNCE_SECONDS,
+                                      max_delay_seconds=corpus.WATCH_MAX_DELAY_SECONDS,
+                                      poll_interval=corpus.WATCH_POLL_SECONDS,
+                                      use_inotify=corpus.WATCH_USE_INOTIFY)
+        # pick up pages that changed while the corpus was not loaded (or since the snapshot)
+        doc_watcher.start(initial_paths=pipeline.changed_files())
+        doc_watchers[name] = doc_watcher
+    if settings.ANSWER_CACHE_ENABLED:
+        answer_caches[name] = SemanticCache(similarity_threshold=settings.ANSWER_CACHE_SIMILARITY,
+                                            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES)
+    return pipeline
+
+
+def unload_corpus(name: str, pipeline):
+    doc_watcher = doc_watchers.pop(name, None)
+    if doc_watcher is not None:
+        doc_watcher.stop()
+    answer_caches.pop(name, None)
+
+
+def reindex_corpus(name: str, pipeline, file_paths: List[str], **kwargs) -> dict:
+    """
+    Re-index ``file_paths`` of corpus ``name`` and drop the cached /chat
+    answers that were generated from a chunk that changed or was removed, or
+    without any context.
+    """
+    reindex_info = pipeline.reindex_files(file_paths, **kwargs)
+    answer_cache = answer_caches.get(name)
+    index_changed = reindex_info["removed_chunk_ids"] or any(info.get("chunks_added")
+                                                             for info in reindex_info["files"].values())
+    if answer_cache is not None and index_changed:
+        invalidated = answer_cache.invalidate_chunks(reindex_info["removed_chunk_ids"])
+        if invalidated:
+            print(f"Invalidated {invalidated} cached answers of corpus '{name}'")
+    return reindex_info
+
+
+def build_rag_pipeline():
+    """
+    Create the LLM manager and the corpus registry, then load the default
+    corpus so the first request does not pay for it.
+    """
+    global llm_manager, corpus_registry, startup_error
+    try:
+        llm_manager = LLMManager(api_key=settings.API_KEY,
+                                provider=settings.PROVIDER,
+                                llm_model_name=settings.LLM_MODEL_NAME, 
+                                embedding_model_name=settings.EMBEDDING_MODEL_NAME)
+
+        corpus_registry = CorpusRegistry(corpus_names(settings),
+                                         loader=load_corpus,
+                                         unloader=unload_corpus,
+                                         memory_budget_bytes=int(settings.CORPUS_MEMORY_BUDGET_MB * 2**20))
+        if settings.WARMUP_ON_STARTUP:
+            corpus_registry.get(settings.DEFAULT_CORPUS)
+        # load the tokenizer now rather than on the first /chat request
+        get_context_packer()
+
+        pipeline_ready.set()
+    except Exception as e:
+        startup_error = e
+        print(f"RAG pipeline startup failed: {e}")
+        raise
+
+
+def get_context_packer() -> ContextPacker:
+    """
+    Context packer for the configured LLM, using its per-model token budget.
+    """
+    token_budget = settings.CONTEXT_TOKEN_BUDGETS.get(settings.LLM_MODEL_NAME, settings.CONTEXT_TOKEN_BUDGET)
+    return ContextPacker(token_budget=token_budget, model_name=settings.LLM_MODEL_NAME)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARMUP_IN_BACKGROUND:
+        # serve liveness (and 503 readiness) while the index is being built
+        threading.Thread(target=build_rag_pipeline, name="rag-pipeline-warmup", daemon=True).start()
+    else:
+        build_rag_pipeline()
+    yield
+    if corpus_registry is not None:
+        corpus_registry.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,64 +153,103 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id"],
 )
 
-# define LLM manager
-llm_manager = LLMManager(api_key=settings.API_KEY,
-                        provider=settings.PROVIDER,
-                        llm_model_name=settings.LLM_MODEL_NAME, 
-                        embedding_model_name=settings.EMBEDDING_MODEL_NAME)
-
-# define rag pipeline
-if settings.RETRIEVAL_METHOD == "hybrid":
-    print("Hybrid RAG pipeline selected")
-    rag_pipeline = HybridRAGPipeline(llm_manager=llm_manager, 
-                                    doc_dir_path=settings.DOC_DIR_PATH,
-                                    top_k_docs=settings.TOP_K_DOCS,
-                                    chunk_size=settings.CHUNK_SIZE,
-                                    chunk_overlap=settings.CHUNK_OVERLAP,
-                                    chroma_persist_dir=settings.CHROMA_DB_NAME                                
-                                    )
-
-elif settings.RETRIEVAL_METHOD == "vanilla":
-    print("Vanilla RAG pipeline selected")
-    rag_pipeline = VanillaRAGPipeline(llm_manager=llm_manager, 
-                                    doc_dir_path=settings.DOC_DIR_PATH,
-                                    top_k_docs=settings.TOP_K_DOCS,
-                                    chunk_size=settings.CHUNK_SIZE,
-                                    chunk_overlap=settings.CHUNK_OVERLAP,
-                                    chroma_persist_dir=settings.CHROMA_DB_NAME                                
-                                    )
+# compress large responses (suggestion sweeps) for clients that accept gzip
+if settings.GZIP_MIN_BYTES > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_BYTES, compresslevel=settings.GZIP_COMPRESS_LEVEL)
 
+if request_profiler is not None:
+    app.middleware("http")(request_profiler.middleware)
 
-def suggest_changes(query: str, docs: List[Document]):
+
+def require_pipeline(corpus: str = None):
     """
-    Suggests changes to a list of documents based on a user query.
+    Return the RAG pipeline of ``corpus`` (default corpus if None), loading it
+    on first use. Fails with 503 while the app is still starting up and with
+    404 for unknown corpora.
+    """
+    if not pipeline_ready.is_set():
+        raise HTTPException(status_code=503, detail="RAG pipeline is not ready yet")
+    name = corpus or settings.DEFAULT_CORPUS
+    try:
+        return corpus_registry.get(name)
+    except UnknownCorpusError:
+        raise HTTPException(status_code=404, detail=f"Unknown corpus: {name}")
 
-    Args:
-        query (str): The user's query string.
-        docs (List[Document]): A list of documents with their similarity scores.
 
-    Returns:
-        List[DocumentUpdate]: Suggested changes for each relevant document.
+def suggestion_messages(system_prompt: str, query: str, doc: Document) -> List[dict]:
+    user_prompt = diff_suggestion_prompt.create_user_prompt(query, doc.page_content, doc.metadata["title"])
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+def suggest_full_rewrites(pairs: List[Tuple[str, Document]]) -> List[ModelOutput]:
     """
-    system_prompt = diff_suggestion_prompt.system_prompt
-    change_suggestions = []
+    Ask the LLM to regenerate each chunk with the change applied, with up to
+    ``LLM_MAX_CONCURRENCY`` calls in flight.
+    """
+    if not pairs:
+        return []
+    changes_identifier = llm_manager.llm_model.with_structured_output(ModelOutput)
+    return changes_identifier.batch(
+        [suggestion_messages(diff_suggestion_prompt.system_prompt, query, doc) for query, doc in pairs],
+        config={"max_concurrency": settings.LLM_MAX_CONCURRENCY},
+    )
 
-    for doc in docs:
-        # score = doc[1]
-        # doc = doc[0]
-        # if score > settings.SCORE_THRESHOLD:
-        #     continue
+def suggest_edit_operations(pairs: List[Tuple[str, Document]]) -> List[ModelOutput]:
+    """
+    Ask the LLM for minimal find/replace edits and apply them to each chunk, so
+    output tokens scale with the size of the edit instead of the chunk. Chunks
+    whose edit call fails, returns nothing, or returns edits that do not apply
+    fall back to a full rewrite.
+    """
+    if not pairs:
+        return []
+    edit_identifier = llm_manager.llm_model.with_structured_output(EditOutput)
+    edit_outputs = edit_identifier.batch(
+        [suggestion_messages(diff_suggestion_prompt.edit_system_prompt, query, doc) for query, doc in pairs],
+        config={"max_concurrency": settings.LLM_MAX_CONCURRENCY},
+        return_exceptions=True,
+    )
 
-        user_prompt = diff_suggestion_prompt.create_user_prompt(query, doc.page_content, doc.metadata["title"])
-        
-        changes_identifier = llm_manager.llm_model.with_structured_output(ModelOutput)
-        selected_method = changes_identifier.invoke([
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ])
+    model_outputs, fallback = [None] * len(pairs), []
+    for i, ((query, doc), edit_output) in enumerate(zip(pairs, edit_outputs)):
+        try:
+            if isinstance(edit_output, Exception):
+                raise edit_output
+            if edit_output is None:
+                raise ValueError("no structured output")
+            model_outputs[i] = edit_output_to_model_output(edit_output, doc.page_content)
+        except Exception as e:
+            # EditApplyError, output that does not parse into EditOutput, or a failed LLM call
+            print(f"Edit operations failed for chunk {doc.metadata.get('chunk_id')}, regenerating full text: {e}")
+            fallback.append(i)
+
+    for i, model_output in zip(fallback, suggest_full_rewrites([pairs[i] for i in fallback])):
+        model_outputs[i] = model_output
+    return model_outputs
+
+def suggest_changes_batch(pairs: List[Tuple[str, Document]]) -> List[DocumentUpdate]:
+    """
+    Suggest changes for a list of (query, document) pairs; the LLM calls run
+    concurrently.
 
+    Args:
+        pairs (List[Tuple[str, Document]]): The query and the document to update for it.
+
+    Returns:
+        List[DocumentUpdate]: One suggested change per pair, in order.
+    """
+    if settings.SUGGESTION_MODE == "edits":
+        model_outputs = suggest_edit_operations(pairs)
+    else:
+        model_outputs = suggest_full_rewrites(pairs)
+
+    change_suggestions = []
+    for (_, doc), selected_method in zip(pairs, model_outputs):
         document_metadata = DocumentMetadata(
                             original=doc.page_content,
                             chunk_id=doc.metadata["chunk_id"],
@@ -94,61 +265,225 @@ def suggest_changes(query: str, docs: List[Document]):
 
     return change_suggestions
 
+def suggest_changes(query: str, docs: List[Document]):
+    """
+    Suggests changes to a list of documents based on a user query.
+
+    Args:
+        query (str): The user's query string.
+        docs (List[Document]): A list of documents with their similarity scores.
+
+    Returns:
+        List[DocumentUpdate]: Suggested changes for each relevant document.
+    """
+    return suggest_changes_batch([(query, doc) for doc in docs])
+
 @app.post("/retrieve_relevant_documents")
-def retrieve_relevant_documents(query: str):
+@profiled
+def retrieve_relevant_documents(query: str, corpus: str = None, compact: bool = False, chunk_refs: bool = False,
+                                url_prefix: str = None, file_glob: str = None, title: str = None):
     """
     Retrieve relevant documents for a given query and suggest possible changes.
 
     Args:
         query (str): The user's query string.
+        corpus (str, optional): Corpus to search (default corpus if not given).
+        compact (bool): Omit ``suggested`` for unchanged chunks.
+        chunk_refs (bool): Reference chunks by ``chunk_id`` instead of inlining ``original``.
+        url_prefix (str, optional): Only search pages whose source URL starts with this prefix.
+        file_glob (str, optional): Only search pages whose file path or name matches this glob.
+        title (str, optional): Only search pages whose title contains this text (case-insensitive).
 
     Returns:
         List[DocumentUpdate]: A list of suggested changes for the most relevant documents.
     """
-    found_docs, retrieval_info = rag_pipeline.retrieve_documents(query, use_preprocessing=True)
+    metadata_filter = MetadataFilter(url_prefix=url_prefix, file_glob=file_glob, title=title)
+    found_docs, retrieval_info = require_pipeline(corpus).retrieve_documents(query, use_preprocessing=True,
+                                                                             metadata_filter=metadata_filter)
 
     print(f"Retrieval Info: {retrieval_info}")
 
     suggested_changes = suggest_changes(query, found_docs)
 
-    return suggested_changes
+    return FastJSONResponse([update_payload(update, compact=compact, chunk_refs=chunk_refs) for update in suggested_changes])
+
+# the payload is serialized directly, so the schema is documented rather than validated
+@app.post("/retrieve_relevant_documents_batch",
+          responses={200: {"model": BatchRetrieveResponse, "description": "Suggested changes grouped by query"}})
+@profiled
+def retrieve_relevant_documents_batch(queries: List[str], corpus: str = None, compact: bool = False, chunk_refs: bool = False,
+                                      url_prefix: str = None, file_glob: str = None, title: str = None):
+    """
+    Retrieve relevant documents and suggest changes for many queries at once
+    (e.g. every entry of a changelog).
+
+    All queries are embedded in one call and searched in one batch. Each
+    distinct (query, chunk) pair gets one suggestion, and the suggestion LLM
+    calls run concurrently.
+
+    Args:
+        queries (List[str]): The change requests.
+        corpus (str, optional): Corpus to search (default corpus if not given).
+        compact (bool): Omit ``suggested`` for unchanged chunks.
+        chunk_refs (bool): Reference chunks by ``chunk_id`` instead of inlining ``original``.
+        url_prefix (str, optional): Only search pages whose source URL starts with this prefix.
+        file_glob (str, optional): Only search pages whose file path or name matches this glob.
+        title (str, optional): Only search pages whose title contains this text (case-insensitive).
 
-@app.post("/apply_approved_changes")
-def apply_approved_changes(docs: List[DocumentUpdate]):
+    Returns:
+        BatchRetrieveResponse: Suggested changes grouped by query.
     """
-    Receives a list of approved document changes from the frontend
-    and processes them.
+    start = time.perf_counter()
+    metadata_filter = MetadataFilter(url_prefix=url_prefix, file_glob=file_glob, title=title)
+    results, retrieval_info = require_pipeline(corpus).retrieve_documents_batch(queries, use_preprocessing=True,
+                                                                               metadata_filter=metadata_filter)
+    retrieval_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    print(f"Retrieval Info: {retrieval_info['retrieval_metrics']}")
+
+    # repeated queries share their suggestions
+    pairs = {}
+    for query, found_docs in zip(queries, results):
+        for doc in found_docs:
+            pairs.setdefault((query, doc.metadata["chunk_id"]), doc)
+
+    suggestion_start = time.perf_counter()
+    suggestions = dict(zip(pairs, suggest_changes_batch([(query, doc) for (query, _), doc in pairs.items()])))
+    suggestion_ms = round((time.perf_counter() - suggestion_start) * 1000, 2)
 
-    (Currently a placeholder implementation)
+    grouped = [{"query": query, "updates": [update_payload(suggestions[(query, doc.metadata["chunk_id"])], compact=compact, chunk_refs=chunk_refs)
+                                            for doc in found_docs]}
+               for query, found_docs in zip(queries, results)]
+    return FastJSONResponse(dict(
+        results=grouped,
+        unique_chunks=retrieval_info["retrieval_metrics"]["unique_docs_retrieved"],
+        llm_calls=len(pairs),
+        retrieval_ms=retrieval_ms,
+        suggestion_ms=suggestion_ms,
+        total_ms=round((time.perf_counter() - start) * 1000, 2),
+    ))
+
+@app.post("/apply_approved_changes", response_model=ApplyChangesResponse)
+@profiled
+def apply_approved_changes(docs: List[DocumentUpdate], corpus: str = None):
     """
-    # TODO: Implement the logic to apply the changes.
-    return f"Total approved documents: {len(docs)}"
+    Receives a list of approved document changes from the frontend, writes
+    them back into the page JSON files and re-indexes only the affected pages.
+
+    Updates are grouped by ``document_metadata.file_path`` so each page file
+    is patched (with an atomic rename) once, and all new chunks are embedded
+    in one batch.
+
+    Args:
+        docs (List[DocumentUpdate]): Approved document updates.
+        corpus (str, optional): Corpus the pages belong to (default corpus if not given).
+
+    Returns:
+        ApplyChangesResponse: Per-file results and timings.
+    """
+    start = time.perf_counter()
+    rag_pipeline = require_pipeline(corpus)
+    corpus_name = corpus or settings.DEFAULT_CORPUS
+    applier = ChangeApplier()
+    known_files = set(rag_pipeline.file_paths)
+
+    file_results = []
+    for file_path, updates in group_updates_by_file(docs).items():
+        # only page files that belong to the indexed corpus may be written
+        if file_path not in known_files:
+            file_results.append(FileApplyResult(file_path=file_path,
+                                                updates=len(updates),
+                                                not_found=[u.document_metadata.chunk_id for u in updates],
+                                                error="File is not part of the indexed documentation"))
+            continue
+        file_results.append(FileApplyResult(**applier.apply_to_file(file_path, updates)))
+
+    changed_files = [result.file_path for result in file_results if result.applied]
+    reindex_info = reindex_corpus(corpus_name, rag_pipeline, changed_files) if changed_files else {"files": {}, "embed_ms": 0}
+    for result in file_results:
+        for key, value in reindex_info["files"].get(result.file_path, {}).items():
+            setattr(result, key, value)
+
+    return ApplyChangesResponse(
+        total_approved=len(docs),
+        total_applied=sum(len(result.applied) for result in file_results),
+        files=file_results,
+        embed_ms=reindex_info["embed_ms"],
+        total_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
 
 @app.post("/chat")
-def chat_with_documents(query: str, context_docs: List[str] = None):
+@profiled
+def chat_with_documents(query: str, context_docs: List[str] = None, corpus: str = None,
+                        url_prefix: str = None, file_glob: str = None, title: str = None):
     """
     Chat interface for asking questions about documents.
+
+    Without ``context_docs`` the question is first looked up in the corpus'
+    semantic answer cache: if a question with a close enough embedding was
+    answered against the same corpus version (and filters), its answer is
+    returned without retrieval or an LLM call.
     
     Args:
         query (str): User's question
         context_docs (List[str], optional): Specific document content to use as context
+        corpus (str, optional): Corpus to search (default corpus if not given)
+        url_prefix (str, optional): Only search pages whose source URL starts with this prefix.
+        file_glob (str, optional): Only search pages whose file path or name matches this glob.
+        title (str, optional): Only search pages whose title contains this text (case-insensitive).
         
     Returns:
-        dict: Response containing answer and sources
+        dict: Response containing answer, sources and the packed context token count
     """
+    rag_pipeline = require_pipeline(corpus)
+    metadata_filter = MetadataFilter(url_prefix=url_prefix, file_glob=file_glob, title=title)
+    answer_cache = None if context_docs else answer_caches.get(corpus or settings.DEFAULT_CORPUS)
+    query_embedding = None
+    if answer_cache is not None:
+        # read before retrieval: an index update in between means the answer is not cached
+        cache_generation = answer_cache.generation
+        query_embedding = llm_manager.embeddings.embed_query(query)
+        corpus_version = rag_pipeline.corpus_version
+        if metadata_filter:
+            # answers of a filtered search are only reused for the same filter
+            corpus_version = f"{corpus_version}:{metadata_filter.cache_key()}"
+        cached, similarity = answer_cache.lookup(query_embedding, corpus_version)
+        if cached is not None:
+            return {
+                "answer": cached.answer,
+                "sources": cached.sources,
+                "query": query,
+                "context_tokens": cached.context_info.get("packed_tokens", 0),
+                "context_info": cached.context_info,
+                "cached": True,
+                "cached_query": cached.query,
+                "similarity": round(similarity, 4),
+            }
+
     # If no specific context provided, retrieve relevant documents
     if not context_docs:
-        found_docs, retrieval_info = rag_pipeline.retrieve_documents(query, use_preprocessing=True)
-        context_docs = [doc.page_content for doc in found_docs[:3]]  # Use top 3 docs
-        sources = [{"title": doc.metadata.get("title", "Unknown"), 
-                   "source_url": doc.metadata.get("source_url", "")} 
-                  for doc in found_docs[:3]]
+        found_docs, retrieval_info = rag_pipeline.retrieve_documents(query, use_preprocessing=True,
+                                                                     metadata_filter=metadata_filter,
+                                                                     query_embedding=query_embedding)
+        if metadata_filter and not found_docs:
+            _, packing_info = get_context_packer().pack([])
+            packing_info.pop("sources")
+            # nothing to answer from: no LLM call, and nothing worth caching
+            return {
+                "answer": "No documentation pages match the given filters.",
+                "sources": [],
+                "query": query,
+                "context_tokens": 0,
+                "context_info": packing_info,
+                "cached": False,
+            }
     else:
-        sources = []
-    
-    # Create context from documents
-    context = "\n\n".join(context_docs)
-    
+        found_docs = [Document(page_content=doc) for doc in context_docs]
+
+    # Pack the ranked chunks into the model's context token budget
+    context, packing_info = get_context_packer().pack(found_docs)
+    sources = packing_info.pop("sources")
+
     # Create chat prompt
     chat_prompt = f"""Based on the following documentation context, please answer the user's question clearly and accurately.
 
@@ -165,17 +500,27 @@ Please provide a helpful answer based on the documentation provided. If the answ
             {"role": "system", "content": "You are a helpful documentation assistant. Answer questions based on the provided context."},
             {"role": "user", "content": chat_prompt}
         ])
-        
+
+        if answer_cache is not None:
+            answer_cache.add(query_embedding, corpus_version, query, response.content, sources, packing_info["chunk_ids"],
+                             generation=cache_generation, context_info=packing_info)
+
         return {
             "answer": response.content,
             "sources": sources,
-            "query": query
+            "query": query,
+            "context_tokens": packing_info["packed_tokens"],
+            "context_info": packing_info,
+            "cached": False
         }
     except Exception as e:
         return {
             "answer": f"Sorry, I encountered an error: {str(e)}",
             "sources": [],
-            "query": query
+            "query": query,
+            "context_tokens": packing_info["packed_tokens"],
+            "context_info": packing_info,
+            "cached": False
         }
 
 
@@ -184,5 +529,76 @@ Please provide a helpful answer based on the documentation provided. If the answ
 async def health_check():
     return {"status": "healthy"}
 
+# add a readiness check endpoint
+@app.get("/ready")
+async def readiness_check():
+    if pipeline_ready.is_set():
+        loaded = list(corpus_registry.pipelines.items())
+        status = {"status": "ready", "index_version": {name: pipeline.index_version for name, pipeline in loaded}}
+        if doc_watchers:
+            status["watchers"] = {name: doc_watcher.stats for name, doc_watcher in list(doc_watchers.items())}
+        return status
+    if startup_error is not None:
+        return JSONResponse(status_code=503, content={"status": "failed", "error": str(startup_error)})
+    return JSONResponse(status_code=503, content={"status": "starting"})
+
+# add a corpus statistics endpoint
+@app.get("/corpora")
+def list_corpora():
+    """
+    Configured corpora with their load state, approximate memory and hit statistics.
+    """
+    if not pipeline_ready.is_set():
+        raise HTTPException(status_code=503, detail="RAG pipeline is not ready yet")
+    return corpus_registry.report()
+
+# add a /chat answer cache statistics endpoint
+@app.get("/chat/cache_stats")
+def chat_cache_stats():
+    """
+    Lookups, hits, hit ratio, entries and invalidations of each loaded corpus' answer cache.
+    """
+    if not pipeline_ready.is_set():
+        raise HTTPException(status_code=503, detail="RAG pipeline is not ready yet")
+    return {name: answer_cache.report() for name, answer_cache in list(answer_caches.items())}
+
+if request_profiler is not None:
+    # profiling admin endpoints, only served with PROFILING_ENABLED
+    @app.get("/admin/profiles")
+    def list_profiles():
+        """
+        Captured request profiles, newest first.
+        """
+        return request_profiler.list()
+
+    @app.get("/admin/profiles/{profile_id}")
+    def get_profile(profile_id: str, sort_by: str = "cumulative", limit: int = 40):
+        """
+        pstats report of a captured request profile.
+        """
+        record = request_profiler.get(profile_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}")
+        try:
+            stats = record.stats_text(sort_by=sort_by, limit=limit)
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Unsupported sort key: {sort_by}")
+        return {**record.summary(), "stats": stats}
+
+    @app.post("/admin/profile/sample")
+    def sample_process(seconds: float = 5.0, interval_ms: float = 10.0, include_idle: bool = False):
+        """
+        Sample the stacks of all threads for ``seconds`` (one window at a time).
+        """
+        if not 0 < seconds <= settings.PROFILE_MAX_SAMPLE_SECONDS:
+            raise HTTPException(status_code=400, detail=f"seconds must be in (0, {settings.PROFILE_MAX_SAMPLE_SECONDS}]")
+        if not sampling_lock.acquire(blocking=False):
+            raise HTTPException(status_code=409, detail="A sampling window is already running")
+        try:
+            return sample_stacks(seconds, interval=max(interval_ms, 1.0) / 1000, include_idle=include_idle)
+        finally:
+            sampling_lock.release()
+
+
 if __name__ == "__main__":
     uvicorn.run("routes:app", port=8000, log_level="info", reload=True)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import json
+import threading
+
+from fastapi_backend.helpers.change_applier import ChangeApplier
+from fastapi_backend.helpers.document_cleaner import DocumentCleaner
+from fastapi_backend.models import DocumentMetadata, DocumentUpdate, ModelOutput
+
+
+RAW_PAGE = "# Title\n\nIntro for run_agent.\n\n```python\ndef f():\n    return run_agent(1)\n```\n\nTail."
+
+
+def make_update(original: str, suggested: str, chunk_id: str = "c1", change_type: str = "modified") -> DocumentUpdate:
+    return DocumentUpdate(
+        model_output=ModelOutput(change_type=change_type, suggested=suggested),
+        document_metadata=DocumentMetadata(chunk_id=chunk_id, original=original, title="Title",
+                                           source_url="https://docs.example/page", file_path="page.json"),
+    )
+
+
+def cleaned_page() -> str:
+    cleaned, _ = DocumentCleaner().clean_document(RAW_PAGE, use_llm=False)
+    return cleaned
+
+
+def test_exact_match_is_replaced_verbatim():
+    markdown, applied, not_found = ChangeApplier().patch_markdown(
+        RAW_PAGE, [make_update("Intro for run_agent.", "Intro for Runner.run.")])
+
+    assert markdown == RAW_PAGE.replace("Intro for run_agent.", "Intro for Runner.run.")
+    assert applied == ["c1"] and not_found == []
+
+
+def test_cleaned_chunk_is_mapped_back_to_raw_offsets():
+    # cut from the cleaned text: blank lines and the code indentation are gone
+    original = "Intro for run_agent.\n```python\ndef f():\nreturn run_agent(1)"
+    assert original in cleaned_page() and original not in RAW_PAGE
+
+    markdown, applied, not_found = ChangeApplier().patch_markdown(
+        RAW_PAGE, [make_update(original, original.replace("run_agent", "Runner.run"))])
+
+    assert markdown == RAW_PAGE.replace("run_agent", "Runner.run")
+    assert applied == ["c1"] and not_found == []
+
+
+def test_chunk_that_lost_tokens_in_cleaning_is_not_found():
+    # the cleaned page no longer has the code fence closer, so it cannot be mapped back
+    original = cleaned_page()
+
+    markdown, applied, not_found = ChangeApplier().patch_markdown(
+        RAW_PAGE, [make_update(original, original.replace("Tail.", "End."))])
+
+    assert markdown == RAW_PAGE
+    assert applied == [] and not_found == ["c1"]
+
+
+def test_concurrent_applies_to_one_file_keep_every_edit(tmp_path):
+    page = tmp_path / "page.json"
+    words = [f"word{i}" for i in range(20)]
+    page.write_text(json.dumps({"markdown": "\n\n".join(words), "metadata": {}}), encoding="utf-8")
+    applier = ChangeApplier()
+
+    threads = [threading.Thread(target=applier.apply_to_file,
+                                args=(str(page), [make_update(word, word.upper(), chunk_id=word)]))
+               for word in words]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    markdown = json.loads(page.read_text(encoding="utf-8"))["markdown"]
+    assert markdown == "\n\n".join(word.upper() for word in words)
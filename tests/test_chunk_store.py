@@ -0,0 +1,44 @@
+import numpy as np
+
+from fastapi_backend.helpers.chunk_store import ChunkStore
+from fastapi_backend.helpers.lexical_index import BM25Index
+
+
+def page_metadata(file_path, chunk_id):
+    return {"file_path": file_path, "title": file_path, "source_url": f"https://docs.x/{file_path}", "chunk_id": chunk_id}
+
+
+def test_compaction_drops_tombstones_and_remaps_the_lexical_index():
+    texts = ["alpha agent setup", "beta tool calls", "gamma agent memory", "delta retries"]
+    metadatas = [page_metadata(f"p{i}.json", f"c{i}") for i in range(len(texts))]
+    chunk_store = ChunkStore.from_texts(texts, metadatas)
+    lexical_index = BM25Index.from_chunk_store(chunk_store)
+
+    # p0 is edited and p1 deleted
+    removed = {chunk_store.index_of(chunk_id): chunk_store.text(chunk_store.index_of(chunk_id)) for chunk_id in ("c0", "c1")}
+    updated = chunk_store.updated(["c0", "c1"], ["alpha agent setup, revised"], [page_metadata("p0.json", "c0b")])
+    added = {updated.index_of("c0b"): "alpha agent setup, revised"}
+    updated_index = lexical_index.updated(removed, added, updated.num_slots)
+    assert updated.needs_compaction() and updated.tombstone_ratio == 0.4
+
+    compacted, remap = updated.compacted()
+    compacted_index = updated_index.compacted(remap, compacted.num_slots)
+
+    assert compacted.num_slots == len(compacted) == 3 and compacted.tombstone_ratio == 0.0
+    assert compacted.buffer == "gamma agent memorydelta retriesalpha agent setup, revised"
+    assert [page.file_path for page in compacted.pages] == ["p2.json", "p3.json", "p0.json"]
+    assert compacted.metadata(compacted.index_of("c0b"))["source_url"] == "https://docs.x/p0.json"
+    assert remap.tolist() == [-1, -1, 0, 1, 2]
+    # same hits and scores as an index built from scratch on the compacted store
+    rebuilt = BM25Index.from_chunk_store(compacted)
+    for query in ("agent", "alpha retries", "tool"):
+        np.testing.assert_allclose(compacted_index.scores(query), rebuilt.scores(query))
+    assert [i for i, _ in compacted_index.search("agent", k=5)] == [i for i, _ in rebuilt.search("agent", k=5)]
+
+
+def test_store_with_tombstones_is_serialized_compacted():
+    chunk_store = ChunkStore.from_texts(["one", "two"], [page_metadata("a.json", "a"), page_metadata("b.json", "b")])
+    restored = ChunkStore.from_arrays(**chunk_store.updated(["a"], [], []).to_arrays())
+
+    assert len(restored) == restored.num_slots == 1
+    assert restored.text(restored.index_of("b")) == "two"
@@ -0,0 +1,60 @@
+from langchain_core.documents import Document
+
+from fastapi_backend.helpers.context_packer import ContextPacker, TokenCounter
+
+
+def make_packer(token_budget):
+    packer = ContextPacker(token_budget=token_budget)
+    # 4 characters per token, independent of the tiktoken encoding files
+    packer.token_counter = TokenCounter()
+    packer.token_counter.encoding = None
+    return packer
+
+
+def doc(text, file_path="a.json", chunk_id=None):
+    return Document(page_content=text, metadata={"file_path": file_path, "chunk_id": chunk_id or text[:8],
+                                                 "title": file_path, "source_url": f"https://docs.x/{file_path}"})
+
+
+FIRST = "Agents are configured with instructions and tools. " + "Handoffs let one agent delegate to another."
+SECOND = "Handoffs let one agent delegate to another." + " Guardrails validate the input of the agent."
+
+
+def test_duplicates_and_contained_chunks_are_skipped():
+    context, info = make_packer(1000).pack([doc(FIRST), doc(FIRST, chunk_id="copy"), doc("instructions and tools"),
+                                            doc("Tracing is on by default.", "b.json")])
+
+    assert context == FIRST + "\n\n" + "Tracing is on by default."
+    assert info["duplicates"] == 2 and info["packed_chunks"] == 2
+    assert [source["title"] for source in info["sources"]] == ["a.json", "b.json"]
+
+
+def test_overlapping_neighbours_are_stitched_in_either_order():
+    stitched = "Agents are configured with instructions and tools. Handoffs let one agent delegate to another. " \
+               "Guardrails validate the input of the agent."
+
+    forward, info = make_packer(1000).pack([doc(FIRST), doc(SECOND)])
+    assert forward == stitched and info["merged_chunks"] == 1
+    backward, info = make_packer(1000).pack([doc(SECOND), doc(FIRST)])
+    assert backward == stitched and info["merged_chunks"] == 1
+    # the overlap is counted once against the budget
+    assert info["packed_tokens"] == -(-len(stitched) // 4)
+
+
+def test_chunks_of_a_page_are_grouped_in_rank_order():
+    context, _ = make_packer(1000).pack([doc("alpha chunk", "a.json"), doc("beta chunk", "b.json"),
+                                         doc("gamma chunk", "a.json")])
+
+    assert context.split("\n\n") == ["alpha chunk", "gamma chunk", "beta chunk"]
+
+
+def test_budget_truncates_the_top_chunk_and_skips_what_does_not_fit():
+    context, info = make_packer(10).pack([doc("x" * 100), doc("short", "b.json"), doc("y" * 60, "c.json")])
+
+    assert context == "x" * 40
+    assert info["truncated"] and info["skipped"] == 2 and info["packed_chunks"] == 1
+
+    context, info = make_packer(20).pack([doc("x" * 40), doc("y" * 60, "b.json"), doc("short", "c.json")])
+    assert context == "x" * 40 + "\n\nshort"
+    assert not info["truncated"] and info["skipped"] == 1
+    assert info["chunk_ids"] == ["xxxxxxxx", "short"]
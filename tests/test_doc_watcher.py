@@ -0,0 +1,26 @@
+from fastapi_backend.helpers.doc_watcher import DocumentWatcher
+
+
+def test_failed_batch_is_requeued_with_backoff(tmp_path):
+    batches = []
+
+    def on_change(paths):
+        batches.append(paths)
+        if len(batches) == 1:
+            raise RuntimeError("embedding provider unavailable")
+        return {"files": {path: {"chunks_added": 1} for path in paths}}
+
+    watcher = DocumentWatcher(str(tmp_path), on_change, debounce_seconds=1.0, max_delay_seconds=10.0)
+    watcher.record(["a.json", "b.json"])
+    watcher.flush()
+
+    assert watcher.pending == {"a.json", "b.json"}
+    assert watcher.stats["errors"] == 1
+    # retried after 2 x debounce_seconds, not after the usual quiet period
+    assert 1.0 < watcher.flush_due_in() <= 2.0
+
+    watcher.record(["c.json"])
+    watcher.flush()
+    assert batches[1] == ["a.json", "b.json", "c.json"]
+    assert watcher.pending == set() and watcher.retry_at is None
+    assert watcher.stats["files"] == 3
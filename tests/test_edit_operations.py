@@ -0,0 +1,46 @@
+import pytest
+
+from fastapi_backend.helpers.edit_operations import EditApplyError, apply_edit_operations, edit_output_to_model_output, locate_edits
+from fastapi_backend.models import EditOperation, EditOutput
+
+
+ORIGINAL = "Call `run_agent()` to start. `run_agent()` returns a result.\n\nSee also: handoffs."
+
+
+def test_edits_are_matched_against_the_original_text():
+    edits = [EditOperation(find="See also: handoffs.", replace="See also: handoffs and tools."),
+             EditOperation(find="Call `run_agent()`", replace="Call `Runner.run()`")]
+
+    assert locate_edits(ORIGINAL, edits)[0][:2] == (0, len("Call `run_agent()`"))
+    assert apply_edit_operations(ORIGINAL, edits) == \
+        "Call `Runner.run()` to start. `run_agent()` returns a result.\n\nSee also: handoffs and tools."
+
+
+def test_anchor_not_found():
+    with pytest.raises(EditApplyError, match="not found"):
+        apply_edit_operations(ORIGINAL, [EditOperation(find="run_agents()", replace="Runner.run()")])
+
+
+def test_ambiguous_anchor_needs_replace_all():
+    edit = EditOperation(find="`run_agent()`", replace="`Runner.run()`")
+    with pytest.raises(EditApplyError, match="2 matches"):
+        apply_edit_operations(ORIGINAL, [edit])
+
+    edit.replace_all = True
+    assert apply_edit_operations(ORIGINAL, [edit]) == ORIGINAL.replace("`run_agent()`", "`Runner.run()`")
+
+
+def test_overlapping_edits_are_rejected():
+    edits = [EditOperation(find="to start. `run_agent()`", replace="to start. `Runner.run()`"),
+             EditOperation(find="`run_agent()` returns", replace="`Runner.run()` returns")]
+
+    with pytest.raises(EditApplyError, match="overlap"):
+        apply_edit_operations(ORIGINAL, edits)
+
+
+def test_edits_that_change_nothing_are_reported_unchanged():
+    output = EditOutput(change_type="modified", edits=[EditOperation(find="handoffs", replace="handoffs")])
+
+    assert edit_output_to_model_output(output, ORIGINAL).change_type == "unchanged"
+    with pytest.raises(EditApplyError):
+        edit_output_to_model_output(EditOutput(change_type="modified", edits=[]), ORIGINAL)
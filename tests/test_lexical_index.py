@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from fastapi_backend.helpers.chunk_store import ChunkStore
+from fastapi_backend.helpers.lexical_index import BM25Index
+
+
+TEXTS = ["Use Runner.run() to run an agent", "An agent can call a tool", "handoff to another agent",
+         "tracing is on by default for an agent run"]
+
+
+def build_index(texts):
+    return BM25Index.from_chunk_store(ChunkStore.from_texts(
+        texts, [{"file_path": f"p{i}.json", "chunk_id": f"c{i}"} for i in range(len(texts))]))
+
+
+def test_scores_match_bm25_okapi():
+    index = build_index(TEXTS)
+
+    # expected values from rank_bm25.BM25Okapi over the same tokens
+    np.testing.assert_allclose(index.scores("agent tool"), [0.1184, 1.0045, 0.1481, 0.1044], atol=1e-4)
+    np.testing.assert_allclose(index.scores("an agent run"), [0.2367, 0.2537, 0.1481, 0.2088], atol=1e-4)
+    # "agent" and "an" are in more than half of the chunks and get the epsilon floor, "run" is in half
+    assert index.idf("agent") == index.idf("an") == index.idf_floor > 0
+    assert index.idf("run") == 0.0
+
+
+def test_tokens_ignore_case_and_punctuation():
+    index = build_index(TEXTS)
+
+    np.testing.assert_allclose(index.scores("Runner.run()"), [0.8189, 0.0, 0.0, 0.0], atol=1e-4)
+    assert index.search("RUNNER", k=3) == index.search("runner", k=3)
+
+
+def test_updated_index_scores_like_a_rebuilt_one():
+    chunk_store = ChunkStore.from_texts(TEXTS, [{"file_path": f"p{i}.json", "chunk_id": f"c{i}"} for i in range(4)])
+    index = BM25Index.from_chunk_store(chunk_store)
+    new_text = "An agent can call a tool or another agent"
+    updated_store = chunk_store.updated(["c1"], [new_text], [{"file_path": "p1.json", "chunk_id": "c4"}])
+    updated = index.updated({1: TEXTS[1]}, {4: new_text}, updated_store.num_slots)
+    rebuilt = BM25Index.from_chunk_store(updated_store)
+
+    assert updated.idf_floor == pytest.approx(rebuilt.idf_floor)
+    for query in ("agent tool", "another agent", "tracing"):
+        np.testing.assert_allclose(updated.scores(query), rebuilt.scores(query), rtol=1e-6)
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from fastapi_backend.helpers.numpy_vector_store import NumpyVectorStore
+
+
+class HashEmbeddings:
+    """
+    Deterministic embeddings derived from the text hash.
+    """
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(16).tolist()
+
+
+def open_store(directory, embedding_dtype="float32") -> NumpyVectorStore:
+    return NumpyVectorStore(embedding_function=HashEmbeddings(), persist_directory=str(directory),
+                            embedding_dtype=embedding_dtype)
+
+
+def test_writes_of_two_workers_are_both_kept(tmp_path):
+    first = open_store(tmp_path)
+    first.add_texts(["alpha", "beta"], metadatas=[{"file_path": "a.json"}, {"file_path": "b.json"}], ids=["a", "b"])
+    second = open_store(tmp_path)
+
+    first.replace(["a"], ["alpha v2"], metadatas=[{"file_path": "a.json"}], ids=["a2"])
+    # second still holds the old version in memory; its write must build on first's
+    second.replace(["b"], ["beta v2"], metadatas=[{"file_path": "b.json"}], ids=["b2"])
+
+    assert sorted(open_store(tmp_path).get()["ids"]) == ["a2", "b2"]
+    assert first.is_stale()
+    assert first.refresh() and sorted(first.get()["ids"]) == ["a2", "b2"]
+    assert not first.is_stale() and not first.refresh()
+
+
+def test_only_current_and_previous_versions_are_kept(tmp_path):
+    store = open_store(tmp_path, embedding_dtype="int8")
+    for i in range(4):
+        store.add_texts([f"text {i}"], ids=[str(i)])
+
+    versions = [name for name in os.listdir(tmp_path) if os.path.isdir(tmp_path / name)]
+    assert len(versions) == 2
+    with open(tmp_path / "default_collection.version", encoding="utf-8") as f:
+        current = f.read()
+    assert f"default_collection.{current}" in versions
+    assert sorted(os.listdir(tmp_path / f"default_collection.{current}")) == ["store.json", "vectors.int8.npy", "vectors.npy"]
+
+
+def test_unversioned_layout_is_read_and_migrated(tmp_path):
+    embeddings = HashEmbeddings()
+    matrix = NumpyVectorStore._normalize(embeddings.embed_documents(["alpha"]))
+    np.save(tmp_path / "default_collection.npy", matrix)
+    with open(tmp_path / "default_collection.json", "w", encoding="utf-8") as f:
+        json.dump({"ids": ["a"], "texts": ["alpha"], "metadata_table": [{"file_path": "a.json"}],
+                   "metadata_index": [0], "row_metadata": [{}]}, f)
+
+    store = open_store(tmp_path)
+    assert store.version is None and store.get()["documents"] == ["alpha"]
+
+    store.add_texts(["beta"], ids=["b"])
+    assert not os.path.exists(tmp_path / "default_collection.npy")
+    assert sorted(open_store(tmp_path).get()["ids"]) == ["a", "b"]
@@ -0,0 +1,39 @@
+import threading
+
+from fastapi_backend.helpers.profiling import RequestProfiler, current_capture
+
+
+def test_concurrent_profile_request_runs_unprofiled():
+    profiler = RequestProfiler()
+    started, release = threading.Event(), threading.Event()
+
+    @profiler.profiled
+    def slow_endpoint():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    @profiler.profiled
+    def fast_endpoint():
+        return "fast"
+
+    captures = {"slow": {}, "fast": {}}
+
+    def call(name, endpoint, results):
+        current_capture.set(captures[name])
+        results[name] = endpoint()
+
+    results = {}
+    thread = threading.Thread(target=call, args=("slow", slow_endpoint, results))
+    thread.start()
+    started.wait(5)
+    call("fast", fast_endpoint, results)
+    release.set()
+    thread.join()
+
+    assert results == {"slow": "slow", "fast": "fast"}
+    assert captures["fast"] == {"busy": True}
+    assert "profiler" in captures["slow"] and not captures["slow"].get("busy")
+    # the lock is released again
+    call("fast", fast_endpoint, results)
+    assert "profiler" in captures["fast"]
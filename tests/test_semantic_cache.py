@@ -0,0 +1,31 @@
+from fastapi_backend.helpers.semantic_cache import SemanticCache
+
+
+def test_answer_retrieved_before_an_index_update_is_not_cached():
+    cache = SemanticCache()
+    generation = cache.generation
+    cache.invalidate_chunks(["c1"])
+
+    assert cache.add([1.0, 0.0], "v1", "q", "stale answer", [], ["c2"], generation=generation) is None
+    assert len(cache) == 0 and cache.stats["skipped"] == 1
+    assert cache.add([1.0, 0.0], "v1", "q", "answer", [], ["c2"], generation=cache.generation) is not None
+
+
+def test_index_update_drops_answers_without_context():
+    cache = SemanticCache()
+    cache.add([1.0, 0.0], "v1", "no context", "not in the docs", [], [])
+    cache.add([0.0, 1.0], "v1", "with context", "answer", [], ["c1"])
+
+    assert cache.invalidate_chunks([]) == 1
+    entry, _ = cache.lookup([0.0, 1.0], "v1")
+    assert entry.query == "with context"
+    assert cache.lookup([1.0, 0.0], "v1")[0] is None
+
+
+def test_hit_returns_the_context_counters_of_the_cached_answer():
+    cache = SemanticCache()
+    context_info = {"packed_tokens": 120, "packed_chunks": 2, "chunk_ids": ["c1", "c2"]}
+    cache.add([1.0, 0.0], "v1", "q", "answer", [], ["c1", "c2"], context_info=context_info)
+
+    entry, _ = cache.lookup([1.0, 0.0], "v1")
+    assert entry.context_info == context_info